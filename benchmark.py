@@ -0,0 +1,266 @@
+"""Headless benchmark for the core inventory operations on synthetic catalogs.
+
+Builds inventory databases of the requested sizes with realistic field
+distributions, runs the same SQL the app uses for scans, searches and both
+list views, and reports p50/p95/p99 latency, throughput and peak Python
+memory per operation as JSON. With --baseline, results are compared against a
+previous run and any operation whose p95 grew by more than --threshold is
+flagged as a regression (exit status 1).
+
+Usage: python benchmark.py [--sizes 1000 100000 1000000] [--iterations 200]
+                           [--data-dir DIR] [--output results.json]
+                           [--baseline baseline.json] [--threshold 0.2]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from inventory import (
+    InsufficientStockError, PartCache, connect_database, create_schema, fetch_list_page, fetch_low_stock,
+    scan_in_part, scan_out_part, search_inventory,
+)
+
+PART_WORDS = (
+    'Hex Bolt', 'Socket Cap Screw', 'Flat Washer', 'Lock Washer', 'Hex Nut', 'Nylon Insert Nut',
+    'Ball Bearing', 'Needle Bearing', 'Shaft Collar', 'Dowel Pin', 'Spring Pin', 'O-Ring',
+    'Hose Clamp', 'Cable Tie', 'Pipe Fitting', 'Quick Coupler', 'Timing Belt', 'Roller Chain',
+    'Proximity Sensor', 'Limit Switch', 'Fuse', 'Relay', 'Terminal Block', 'Air Filter',
+)
+MATERIALS = ('Steel', 'Stainless Steel', 'Brass', 'Aluminum', 'Nylon', 'Zinc-Plated Steel', 'Buna-N')
+SIZES = ('M3', 'M4', 'M5', 'M6', 'M8', 'M10', '1/4"-20', '5/16"-18', '3/8"-16', '1/2"-13')
+VENDORS = ('ACME', 'GRAINGER', 'FASTENAL', 'MSC', 'OEM', 'SKF', 'PARKER')
+SEARCH_TERMS = ('bolt', 'bearing', 'stainless', 'M8', 'washer', 'sensor', 'Aisle 3', '91251A', 'SKF-', 'nut')
+SCANS_PER_RUN_LIMIT = 5000
+
+
+def generate_rows(count, seed=1):
+    """Yield synthetic inventory rows with a long-tailed cost and stock distribution."""
+    rng = random.Random(seed)
+    for i in range(count):
+        part = rng.choice(PART_WORDS)
+        material = rng.choice(MATERIALS)
+        size = rng.choice(SIZES)
+        min_on_hand = rng.choice((0, 2, 5, 10, 25, 50, 100))
+        # Most parts sit comfortably above minimum; a minority are short or empty
+        roll = rng.random()
+        if roll < 0.05:
+            quantity = 0
+        elif roll < 0.15:
+            quantity = rng.randint(0, max(min_on_hand - 1, 0))
+        else:
+            quantity = min_on_hand + int(rng.expovariate(1 / 40))
+        yield (
+            f'{part} {size}',
+            f'{material} {part.lower()}, size {size}, pack of {rng.choice((1, 10, 25, 50, 100))}',
+            f'{rng.choice(VENDORS)}-{rng.randint(10000, 999999)}',
+            f'{rng.randint(1000, 99999)}A{rng.randint(1, 999)}' if rng.random() < 0.7 else '',
+            round(rng.lognormvariate(1.5, 1.2), 2),
+            quantity,
+            min_on_hand,
+            f'Aisle {rng.randint(1, 30)} Bay {rng.randint(1, 40)}',
+        )
+        if i % 100000 == 99999:
+            print(f'  generated {i + 1} rows', file=sys.stderr)
+
+
+def build_database(path, size):
+    """Return a connection to a fresh copy of the database of size synthetic parts kept at path.
+
+    The database at path is built once and never measured on. Every run gets
+    its own copy, taken with the backup API, so the scans and edits of an
+    earlier run never skew the next one when --data-dir reuses it.
+    """
+    pristine = build_pristine_database(path, size)
+    run_path = os.path.splitext(path)[0] + '-run.db'
+    for stale in (run_path, run_path + '-wal', run_path + '-shm'):
+        if os.path.exists(stale):
+            os.remove(stale)
+    conn = connect_database(run_path)
+    pristine.backup(conn)
+    pristine.close()
+    return conn
+
+
+def build_pristine_database(path, size):
+    """Create (or reuse) a database holding size synthetic parts."""
+    if os.path.exists(path):
+        conn = connect_database(path)
+        if conn.execute('SELECT COUNT(*) FROM inventory').fetchone()[0] == size:
+            create_schema(conn)  # Brings a copy made by an older version up to the current schema
+            return conn
+        conn.close()
+        os.remove(path)
+
+    print(f'Building {size}-row database at {path}', file=sys.stderr)
+    conn = connect_database(path)
+    create_schema(conn)
+    rows = generate_rows(size)
+    while True:
+        chunk = [row for _, row in zip(range(50000), rows)]
+        if not chunk:
+            break
+        conn.executemany('''
+            INSERT INTO inventory (
+                part_name, description, origin_partnumber,
+                mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', chunk)
+        conn.commit()
+    conn.execute('ANALYZE')
+    conn.commit()
+    return conn
+
+
+def percentile(sorted_samples, fraction):
+    """Return the nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_samples) - 1, max(0, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def measure(operation, iterations):
+    """Time operation(i) for each iteration, then sample its peak Python memory."""
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        operation(i)
+        samples.append((time.perf_counter() - op_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for i in range(min(iterations, 20)):
+        operation(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(samples, 0.50), 4),
+        'p95_ms': round(percentile(samples, 0.95), 4),
+        'p99_ms': round(percentile(samples, 0.99), 4),
+        'max_ms': round(samples[-1], 4),
+        'throughput_per_s': round(iterations / elapsed, 1) if elapsed else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_operations(conn, size, iterations, seed=2):
+    """Run every benchmarked operation against one database."""
+    rng = random.Random(seed)
+    fts_enabled = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'inventory_fts'").fetchone() is not None
+    part_numbers = [rng.randint(1, size) for _ in range(max(iterations, 1))]
+    page_keys = [rng.randint(0, max(size - 200, 0)) for _ in range(max(iterations, 1))]
+    cache = PartCache()
+
+    def scan_out(i):
+        try:
+            scan_out_part(conn, part_numbers[i], 1)
+        except InsufficientStockError:
+            pass  # Shortfalls are part of a realistic mix
+
+    def scan_out_cached(i):
+        try:
+            scan_out_part(conn, part_numbers[i], 1, cache)
+        except InsufficientStockError:
+            pass
+
+    operations = {
+        'process_scan': scan_out,
+        'process_scan_cached': scan_out_cached,
+        'process_scan_in': lambda i: scan_in_part(conn, part_numbers[i], 1),
+        'search_items': lambda i: search_inventory(conn, SEARCH_TERMS[i % len(SEARCH_TERMS)], fts_enabled),
+        'populate_list_tree': lambda i: fetch_list_page(conn),
+        'list_next_page': lambda i: fetch_list_page(conn, page_keys[i]),
+        'populate_check_tree': lambda i: fetch_low_stock(conn),
+    }
+    results = {}
+    for name, operation in operations.items():
+        print(f'  {size} rows: {name}', file=sys.stderr)
+        results[name] = measure(operation, min(iterations, SCANS_PER_RUN_LIMIT))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions where p95 grew by more than threshold over the baseline."""
+    regressions = []
+    for size, operations in results.items():
+        for name, stats in operations.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if not previous or not previous.get('p95_ms'):
+                continue
+            change = (stats['p95_ms'] - previous['p95_ms']) / previous['p95_ms']
+            stats['p95_change'] = round(change, 3)
+            if change > threshold:
+                regressions.append({
+                    'size': size, 'operation': name,
+                    'baseline_p95_ms': previous['p95_ms'], 'p95_ms': stats['p95_ms'],
+                    'change': round(change, 3),
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='catalog sizes to test')
+    parser.add_argument('--iterations', type=int, default=200, help='calls per operation')
+    parser.add_argument('--data-dir', help='keep generated databases here and reuse them between runs')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p95 growth before flagging (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        data_dir = tmp_dir.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    report = {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for size in args.sizes:
+        conn = build_database(os.path.join(data_dir, f'bench_{size}.db'), size)
+        report['results'][str(size)] = run_operations(conn, size, args.iterations)
+        conn.close()
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report['results'], baseline, args.threshold)
+        for regression in report['regressions']:
+            print(
+                f"REGRESSION {regression['operation']} @ {regression['size']} rows: "
+                f"p95 {regression['baseline_p95_ms']} -> {regression['p95_ms']} ms",
+                file=sys.stderr
+            )
+        status = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
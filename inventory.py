@@ -1,604 +1,2930 @@
+import argparse
+import bisect
+import codecs
+import csv
+import functools
+import gzip
+import json
 import os
+import queue
+import re
+from collections import OrderedDict
 import sqlite3
-import tkinter as tk
-from tkinter import ttk
-from tkinter import messagebox
-import tkinter.font as tkfont  # Import tkinter.font for custom fonts
+import sys
+import threading
+import time
+import traceback
+import uuid
 import platform  # Import platform to detect the OS
 
-class InventoryApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Inventory Control System")
-        self.root.attributes('-fullscreen', True)  # Set the window to full-screen
+PROCESS_STARTED = time.perf_counter()  # Reference point for the startup-time measurement
+
+SCHEMA_VERSION = 11  # Stored in PRAGMA user_version once every schema object below exists
+LIST_PAGE_SIZE = 200  # Rows fetched per page in the List Items view
+LIST_MAX_ROWS = 1000  # Rows kept in the List Items view before the far end is trimmed
+LIST_COLUMNS = '''
+    part_number, part_name, description, origin_partnumber,
+    mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
+'''
+LIST_COLUMN_NAMES = tuple(LIST_COLUMNS.replace(',', ' ').split())
+LIST_FILTER_CLAUSES = {
+    'cost_min': 'cost >= ?',
+    'cost_max': 'cost <= ?',
+    'quantity_min': 'quantity >= ?',
+    'quantity_max': 'quantity <= ?',
+}  # Range filters for the List Items view; 'location' is handled as a prefix match
+LIST_LOW_STOCK_CLAUSE = 'part_number IN (SELECT part_number FROM low_stock)'  # The 'below_minimum' filter
+LIST_FILTER_SORT_MAX_ROWS = 2000  # Filters matching fewer rows are read through their index and sorted, not found by a table walk
+LIST_NOT_NULL_COLUMNS = ('part_number', 'part_name', 'quantity', 'min_on_hand')  # Declared NOT NULL, so never paged as a NULL stretch
+SEARCH_RESULT_LIMIT = 500  # Maximum rows shown for a search
+SEARCH_DEBOUNCE_MS = 250  # Idle time after the last keystroke before a live search runs
+FTS_MIN_TOKEN_LENGTH = 3  # The trigram tokenizer cannot match shorter terms
+SEARCH_LIKE_COLUMNS = ('part_name', 'description', 'origin_partnumber', 'mcmaster_carr_partnumber', 'location')  # Searched by substring
+DB_BUSY_TIMEOUT_MS = 5000  # How long a writer waits for another station's lock before failing
+DB_CACHE_SIZE_KB = 16384  # Page cache per connection
+BURST_FLUSH_SCANS = 50  # Burst mode writes the queue once this many scans are waiting
+BURST_FLUSH_MS = 1000  # ...or once the oldest queued scan has waited this long
+DB_POLL_MS = 20  # How often the Tk thread collects results from the database worker
+BUSY_INDICATOR_DELAY_MS = 150  # Work that finishes faster than this never shows the busy indicator
+REFRESH_POLL_MS = 1000  # How often a station checks whether another connection changed the inventory
+REFRESH_COALESCE_MS = 250  # Changes noted within this window reach the Treeviews as one batched update
+REFRESH_MAX_PARTS = 500  # Above this many changed parts a view is reloaded instead of patched row by row
+CHANGE_LOG_KEEP = 100000  # Newest inventory_changes rows kept for refresh polling
+PART_CACHE_SIZE = 20000  # Part records kept in memory for scan validation
+BARCODE_MAP_MAX_PARTS = 200000  # Above this many parts vendor barcodes are resolved through the indexes only
+# Upper bounds (ms) of the latency histogram buckets; anything slower lands in the last bucket
+LATENCY_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+SQL_PROGRESS_STEPS = 1000  # VM instructions between progress-handler calls when profiling SQL
+SQL_PROFILE_MAX_STATEMENTS = 500  # Distinct statement shapes kept by the SQL profiler
+SQL_PROFILE_SAMPLE_EVERY = 10  # The SQL profiler, once enabled, traces one database task in this many
+CSV_COLUMNS = (
+    'part_number', 'part_name', 'description', 'origin_partnumber',
+    'mcmaster_carr_partnumber', 'cost', 'quantity', 'min_on_hand', 'location'
+)
+IMPORT_FIELDS = CSV_COLUMNS[1:]  # part_number is assigned by the database, never imported
+IMPORT_REQUIRED_COLUMNS = ('part_name', 'quantity', 'min_on_hand')
+IMPORT_CHUNK_ROWS = 5000  # Rows validated and written per import transaction
+IMPORT_MAX_ERRORS = 100  # Rejected-row messages kept for the import summary
+EXPORT_BATCH_ROWS = 5000  # Rows fetched per batch while exporting
+SQL_MAX_VARIABLES = 500  # Bound parameters per IN (...) lookup, well under SQLite's limit
+SQL_UNIX_NOW = "((julianday('now') - 2440587.5) * 86400.0)"  # SQLite's clock as Unix seconds, used for every ledger time
+LEDGER_SNAPSHOT_INTERVAL_S = 24 * 60 * 60  # Take a stock snapshot when the newest one is older than this
+LEDGER_RETENTION_DAYS = 400  # Movements older than this are folded into a snapshot and deleted
+LEDGER_THIN_AFTER_DAYS = 30  # Snapshots older than this are thinned out
+LEDGER_THIN_INTERVAL_S = 7 * 24 * 60 * 60  # Thinned snapshots are kept at least this far apart
+LEDGER_MAINTENANCE_MS = 60 * 60 * 1000  # How often the app checks whether a snapshot is due
+LEDGER_FIRST_DELAY_MS = 2 * 60 * 1000  # Wait after startup before the first ledger maintenance
+LEDGER_USAGE_KINDS = ('scan_out', 'pick_list')  # Movement kinds counted as stock used; other removals are corrections
+ANALYTICS_WINDOW_DAYS = 365  # Days of scan-out history used to suggest minimums
+ANALYTICS_FETCH_ROWS = 200000  # Per-part usage rows converted to arrays per batch
+REORDER_LEAD_TIME_DAYS = 7  # Days a reorder takes to arrive; the minimum must cover this
+REORDER_SERVICE_Z = 1.65  # Safety factor on demand variability (1.65 covers about 95% of lead times)
+REVIEW_MAX_ROWS = 2000  # Largest suggested changes shown in the review window
+BACKUP_INTERVAL_MS = 6 * 60 * 60 * 1000  # How often a station backs up the database
+BACKUP_FIRST_DELAY_MS = 5 * 60 * 1000  # Wait after startup before the first backup check
+BACKUP_PAGES_PER_STEP = 256  # Pages copied per backup step
+BACKUP_STEP_SLEEP_S = 0.005  # Pause between backup steps so the disk stays free for scans
+BACKUP_KEEP = 14  # Newest backups kept; older ones are deleted after each successful backup
+SYNC_INTERVAL_MS = 60 * 1000  # How often a station exchanges changes with the central sync folder
+SYNC_BATCH_MOVEMENTS = 5000  # Movements per change-log batch file
+SYNC_ACKS_DIR = 'acks'  # Sync subfolder where each station publishes the peer movements it has applied
+SYNC_ARCHIVE_DIR = 'archive'  # Sync subfolder for batches every station has applied
+LOCATION_VALUE_TOLERANCE = 0.01  # Value drift from floating-point deltas the summary consistency check accepts
+LOCATION_SUMMARY_REBUILD = '''
+    SELECT IFNULL(location, ''), COUNT(*), TOTAL(IFNULL(cost, 0) * quantity),
+           SUM(quantity < min_on_hand), SUM(quantity <= 0)
+    FROM inventory
+    GROUP BY IFNULL(location, '')
+'''  # location_summary recomputed from scratch, for seeding it and for the consistency check
+SERVICE_HOST = '127.0.0.1'  # Address the headless service listens on unless told otherwise
+SERVICE_PORT = 8765  # Port the headless service listens on unless told otherwise
+SERVICE_READERS = 4  # Read connections in the service's pool, each on its own thread
+SERVICE_BATCH_MAX = 500  # Queued writes the service commits together in one transaction
+SERVICE_MAX_BODY_BYTES = 1024 * 1024  # Larger request bodies are refused
+SERVICE_TIMEOUT_S = 10  # How long a client waits for the service to answer
+LOW_STOCK_COLUMN_NAMES = (
+    'part_number', 'part_name', 'quantity', 'min_on_hand', 'origin_partnumber',
+    'mcmaster_carr_partnumber', 'cost', 'location',
+)  # Column order of the rows returned by fetch_low_stock
+LOW_STOCK_PAGE_SIZE = 200  # Short parts fetched per page in the Check Inventory Levels view
+LOW_STOCK_EXPORT_ROWS = 5000  # Short parts fetched per page by the low-stock command
+# Every statement the scan, list, search and edit paths run, by name. Names in braces are filled in with
+# str.format by the function that runs the statement. query_plans.py checks each plan against a large catalog.
+SQL_STATEMENTS = {
+    'part_row': f'SELECT {LIST_COLUMNS} FROM inventory WHERE part_number = ?',
+    'part_exists': 'SELECT 1 FROM inventory WHERE part_number = ?',
+    'part_quantity': 'SELECT quantity FROM inventory WHERE part_number = ?',
+    'part_by_vendor_number': 'SELECT part_number FROM inventory WHERE {column} = ? LIMIT 2',
+    'parts_by_vendor_number_in': '''
+        SELECT {column}, part_number FROM inventory WHERE {column} IN ({placeholders}) AND part_number <= ?
+    ''',
+    'newest_part_number': 'SELECT COALESCE(MAX(part_number), 0) FROM inventory',
+    'part_rows_in': f'SELECT {LIST_COLUMNS} FROM inventory WHERE part_number IN ({{placeholders}})',
+    'part_quantities_in': 'SELECT part_number, quantity FROM inventory WHERE part_number IN ({placeholders})',
+    'part_names_in': 'SELECT part_number, part_name FROM inventory WHERE part_number IN ({placeholders})',
+    'barcode_version': 'SELECT version FROM barcode_version WHERE id = 1',
+    'part_count': 'SELECT COUNT(*) FROM inventory',
+    'barcode_codes': 'SELECT part_number, origin_partnumber, mcmaster_carr_partnumber FROM inventory',
+    'scan_out': 'UPDATE inventory SET quantity = quantity - ? WHERE part_number = ? AND quantity >= ?',
+    'scan_in': 'UPDATE inventory SET quantity = quantity + ? WHERE part_number = ?',
+    'set_movement_source': 'UPDATE stock_movement_source SET kind = ?, origin_station = ? WHERE id = 1',
+    'search_fts': f'''
+        SELECT {LIST_COLUMNS}
+        FROM (
+            SELECT rowid, rank FROM inventory_fts
+            WHERE inventory_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        ) AS hits
+        JOIN inventory ON inventory.part_number = hits.rowid
+        ORDER BY hits.rank
+    ''',
+    'search_fts_filtered': f'''
+        SELECT {LIST_COLUMNS}
+        FROM (SELECT rowid, rank FROM inventory_fts WHERE inventory_fts MATCH ?) AS hits
+        JOIN inventory ON inventory.part_number = hits.rowid
+        WHERE {{conditions}}
+        ORDER BY hits.rank LIMIT ?
+    ''',
+    'search_like': f'''
+        SELECT {LIST_COLUMNS}
+        FROM inventory
+        WHERE part_name LIKE ?
+            OR description LIKE ?
+            OR origin_partnumber LIKE ?
+            OR mcmaster_carr_partnumber LIKE ?
+            OR location LIKE ?
+        LIMIT ?
+    ''',
+    'list_page': f'SELECT {LIST_COLUMNS} FROM inventory {{where}} ORDER BY {{order}} LIMIT ?',
+    'list_filter_probe': 'SELECT COUNT(*) FROM (SELECT 1 FROM inventory WHERE {where} LIMIT ?)',
+    'low_stock': f'SELECT {", ".join(LOW_STOCK_COLUMN_NAMES)} FROM inventory {{where}} ORDER BY {{order}} LIMIT ?',
+    'low_stock_part_numbers': 'SELECT part_number FROM low_stock',
+    'add_part': '''
+        INSERT INTO inventory (
+            part_name, description, origin_partnumber,
+            mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'update_part': '''
+        UPDATE inventory
+        SET part_name = ?, description = ?, origin_partnumber = ?, mcmaster_carr_partnumber = ?,
+            cost = ?, quantity = ?, min_on_hand = ?, location = ?
+        WHERE part_number = ?
+    ''',
+    'update_part_details': '''
+        UPDATE inventory
+        SET part_name = ?, description = ?, origin_partnumber = ?, mcmaster_carr_partnumber = ?,
+            cost = ?, min_on_hand = ?, location = ?
+        WHERE part_number = ?
+    ''',
+    'delete_part': 'DELETE FROM inventory WHERE part_number = ?',
+    'location_summary': '''
+        SELECT location, item_count, total_value, low_stock_count, out_of_stock_count
+        FROM location_summary
+        ORDER BY location
+    ''',
+    # Separate subqueries so each end is one b-tree seek; MIN and MAX in one SELECT scan the whole log
+    'change_log_bounds': '''
+        SELECT (SELECT MIN(change_id) FROM inventory_changes), (SELECT MAX(change_id) FROM inventory_changes)
+    ''',
+    'change_log_parts': '''
+        SELECT DISTINCT part_number FROM inventory_changes WHERE change_id > ? AND change_id <= ? LIMIT ?
+    ''',
+}
+
+
+class InventoryError(Exception):
+    """Base class for inventory operations that are refused."""
+
+
+class PartNotFoundError(InventoryError):
+    """Raised when a part number is not in the inventory."""
+
+    def __init__(self, part_number):
+        super().__init__(f"Item with part number '{part_number}' not found in inventory.")
+        self.part_number = part_number
+
+
+class AmbiguousBarcodeError(InventoryError):
+    """Raised when a scanned vendor part number belongs to more than one part."""
+
+    def __init__(self, code, part_numbers):
+        listed = ', '.join(str(part_number) for part_number in part_numbers)
+        super().__init__(f"'{code}' matches more than one part ({listed}). Scan the part number label instead.")
+        self.code = code
+        self.part_numbers = part_numbers
+
+
+class InsufficientStockError(InventoryError):
+    """Raised when a scan-out asks for more than is on hand."""
+
+    def __init__(self, part_number, available):
+        super().__init__(f"Insufficient stock. Available quantity: {available}")
+        self.part_number = part_number
+        self.available = available
+
+
+def get_db_path():
+    """Return the database path, saving the database in a standard location."""
+    # For Windows, save the database in AppData; otherwise, use the home directory
+    if platform.system() == 'Windows':
+        app_data_path = os.getenv('APPDATA')  # Get AppData path on Windows
+    else:
+        app_data_path = os.path.expanduser('~')  # Use the home directory on macOS/Linux
+
+    # Create the 'InventoryControl' directory inside AppData (or home directory on Linux/macOS)
+    db_dir = os.path.join(app_data_path, 'InventoryControl')
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+
+    # Create the full path to the database file
+    return os.path.join(db_dir, 'inventory.db')
+
+
+def get_backup_dir():
+    """Return the directory backups are written to, next to the database."""
+    backup_dir = os.path.join(os.path.dirname(get_db_path()), 'backups')
+    os.makedirs(backup_dir, exist_ok=True)
+    return backup_dir
+
+
+def get_settings_path():
+    """Return the path of the settings file, kept next to the database."""
+    return os.path.join(os.path.dirname(get_db_path()), 'settings.json')
+
+
+def load_settings(path=None):
+    """Return the saved settings, or an empty dict when there are none or the file is unreadable."""
+    try:
+        with open(path or get_settings_path()) as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def save_settings(settings, path=None):
+    """Write the settings file, replacing it in one step so it is never left half-written."""
+    path = path or get_settings_path()
+    with open(path + '.tmp', 'w') as f:
+        json.dump(settings, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def connect_database(db_path):
+    """Open a connection tuned for several stations writing to the same database file.
+
+    WAL lets readers keep going while a scan is being written, and the busy
+    timeout makes a second writer wait for the lock instead of failing at once.
+    """
+    conn = sqlite3.connect(db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')  # Durable across app crashes; WAL keeps the file consistent
+    conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size = -{DB_CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
 
-        icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icon.ico')
-        if os.path.exists(icon_path):
-            self.root.iconbitmap(icon_path)  # Set the window icon
-        else:
-            print(f"Icon not found at {icon_path}. Make sure the icon file is available.")
-
-        # Bind the Escape key to exit full-screen mode
-        self.root.bind("<Escape>", self.exit_fullscreen)
-
-        self.conn = self.create_connection()
-        self.create_table()
-        self.reset_autoincrement_sequence()  # Reset the AUTOINCREMENT sequence if necessary
-        self.create_widgets()
-
-    def exit_fullscreen(self, event=None):
-        """Exit full-screen mode."""
-        self.root.attributes('-fullscreen', False)
-
-    def close_application(self):
-        """Close the application."""
-        self.conn.close()
-        self.root.quit()
-
-    def create_connection(self):
-        """Create a database connection, saving the database in a standard location."""
-        # For Windows, save the database in AppData; otherwise, use the home directory
-        if platform.system() == 'Windows':
-            app_data_path = os.getenv('APPDATA')  # Get AppData path on Windows
-        else:
-            app_data_path = os.path.expanduser('~')  # Use the home directory on macOS/Linux
 
-        # Create the 'InventoryControl' directory inside AppData (or home directory on Linux/macOS)
-        db_dir = os.path.join(app_data_path, 'InventoryControl')
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
+class PartRecord:
+    """A cached inventory row; __slots__ keeps each record to a few hundred bytes."""
 
-        # Create the full path to the database file
-        db_path = os.path.join(db_dir, 'inventory.db')
+    __slots__ = (
+        'part_number', 'part_name', 'description', 'origin_partnumber',
+        'mcmaster_carr_partnumber', 'cost', 'quantity', 'min_on_hand', 'location'
+    )
 
-        # Connect to the database using the full path
-        conn = sqlite3.connect(db_path)
-        return conn
+    def __init__(self, row):
+        (self.part_number, self.part_name, self.description, self.origin_partnumber,
+         self.mcmaster_carr_partnumber, self.cost, self.quantity, self.min_on_hand, self.location) = row
+
+    def as_row(self):
+        """Return the record as a row in List Items column order."""
+        return (
+            self.part_number, self.part_name, self.description, self.origin_partnumber,
+            self.mcmaster_carr_partnumber, self.cost, self.quantity, self.min_on_hand, self.location
+        )
 
-    def create_table(self):
-        """Create the inventory table with the correct schema."""
-        cursor = self.conn.cursor()
+
+class PartCache:
+    """Write-through LRU cache of part records keyed by part number.
+
+    The cache is only valid for the connection it is used with. Writes made
+    through that connection update the cache directly; writes made by any other
+    connection or process change PRAGMA data_version, which empties the cache
+    on the next lookup. A cache must only be used from one thread.
+    """
+
+    def __init__(self, maxsize=PART_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.records = OrderedDict()
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def validate(self, conn):
+        """Drop every record if another connection has committed since the last check.
+
+        Returns True when the cache was still valid.
+        """
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self.data_version:
+            return True
+        if self.records:
+            self.records.clear()
+            self.invalidations += 1
+        self.data_version = data_version
+        return False
+
+    def get(self, conn, part_number):
+        """Return the PartRecord for a part, reading it on a miss, or None if it does not exist."""
+        self.validate(conn)
+        record = self.records.get(part_number)
+        if record is not None:
+            self.records.move_to_end(part_number)
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        cursor = conn.cursor()
+        cursor.execute(SQL_STATEMENTS['part_row'], (part_number,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        record = PartRecord(row)
+        self.records[part_number] = record
+        if len(self.records) > self.maxsize:
+            self.records.popitem(last=False)
+            self.evictions += 1
+        return record
+
+    def discard(self, part_number):
+        """Forget a part after a write that the cache cannot apply itself."""
+        self.records.pop(part_number, None)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.records),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+class PickListShortageError(InventoryError):
+    """Raised when any line of a pick list cannot be filled; nothing is removed."""
+
+    def __init__(self, shortfalls):
+        lines = []
+        for part_number, requested, available in shortfalls:
+            if available is None:
+                lines.append(f"Part {part_number}: not found in inventory")
+            else:
+                lines.append(f"Part {part_number}: need {requested}, only {available} on hand")
+        super().__init__("Pick list rejected, nothing was removed:\n" + "\n".join(lines))
+        self.shortfalls = shortfalls
+
+
+class BarcodeMap:
+    """In-memory map from vendor part numbers to part numbers, for resolving vendor labels.
+
+    The barcode_version row, bumped by triggers whenever a part is added,
+    deleted or has a vendor number edited by any connection, tells when the
+    map must be rebuilt; scans never bump it. Catalogs larger than max_parts
+    are not mapped and resolve through the indexes instead. A map must only
+    be used from one thread.
+    """
+
+    def __init__(self, max_parts=BARCODE_MAP_MAX_PARTS):
+        self.max_parts = max_parts
+        self.version = None
+        self.enabled = False
+        self.origin = {}
+        self.mcmaster = {}
+        self.rebuilds = 0
+
+    def validate(self, conn):
+        """Rebuild the map if any vendor number changed; return whether the map can be used."""
+        cursor = conn.cursor()
+        cursor.execute(SQL_STATEMENTS['barcode_version'])
+        version = cursor.fetchone()[0]
+        if version == self.version:
+            return self.enabled
+
+        self.version = version
+        self.origin = {}
+        self.mcmaster = {}
+        cursor.execute(SQL_STATEMENTS['part_count'])
+        self.enabled = cursor.fetchone()[0] <= self.max_parts
+        if not self.enabled:
+            return False
+
+        cursor.execute(SQL_STATEMENTS['barcode_codes'])
+        for part_number, origin_partnumber, mcmaster_carr_partnumber in cursor:
+            for mapping, code in ((self.origin, origin_partnumber), (self.mcmaster, mcmaster_carr_partnumber)):
+                if code:
+                    # A code shared by several parts maps to the list of them
+                    existing = mapping.get(code)
+                    if existing is None:
+                        mapping[code] = part_number
+                    elif isinstance(existing, list):
+                        existing.append(part_number)
+                    else:
+                        mapping[code] = [existing, part_number]
+        self.rebuilds += 1
+        return True
+
+    def stats(self):
+        """Return the map size and how often it was rebuilt."""
+        return {
+            'enabled': self.enabled,
+            'origin_codes': len(self.origin),
+            'mcmaster_codes': len(self.mcmaster),
+            'rebuilds': self.rebuilds,
+        }
+
+
+def part_exists(conn, part_number, cache=None):
+    """Return whether a part number is in the inventory."""
+    if cache is not None:
+        return cache.get(conn, part_number) is not None
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['part_exists'], (part_number,))
+    return cursor.fetchone() is not None
+
+
+def resolve_part_number(conn, code, cache=None, barcodes=None):
+    """Turn a scanned code into a part number.
+
+    Our own part number is tried first, then the origin and McMaster-Carr part
+    numbers, each an index lookup (or a dict lookup with a valid BarcodeMap).
+    Raises PartNotFoundError when nothing matches and AmbiguousBarcodeError
+    when a vendor number belongs to more than one part.
+    """
+    code = code.strip()
+    if code.isdigit() and part_exists(conn, int(code), cache):
+        return int(code)
+
+    if barcodes is not None and barcodes.validate(conn):
+        for mapping in (barcodes.origin, barcodes.mcmaster):
+            match = mapping.get(code)
+            if isinstance(match, list):
+                raise AmbiguousBarcodeError(code, match)
+            if match is not None:
+                return match
+    else:
+        cursor = conn.cursor()
+        for column in ('origin_partnumber', 'mcmaster_carr_partnumber'):
+            # LIMIT 2 is enough to tell a unique match from an ambiguous one
+            cursor.execute(SQL_STATEMENTS['part_by_vendor_number'].format(column=column), (code,))
+            matches = [row[0] for row in cursor.fetchall()]
+            if len(matches) > 1:
+                raise AmbiguousBarcodeError(code, matches)
+            if matches:
+                return matches[0]
+    raise PartNotFoundError(code)
+
+
+def scan_out_barcode(conn, code, quantity, cache=None, barcodes=None):
+    """Resolve a scanned code and remove stock; return (part_number, remaining quantity)."""
+    part_number = resolve_part_number(conn, code, cache, barcodes)
+    return part_number, scan_out_part(conn, part_number, quantity, cache)
+
+
+def scan_in_barcode(conn, code, quantity, cache=None, barcodes=None):
+    """Resolve a scanned code and add stock; return (part_number, new quantity)."""
+    part_number = resolve_part_number(conn, code, cache, barcodes)
+    return part_number, scan_in_part(conn, part_number, quantity, cache)
+
+
+def fetch_pick_line(conn, code, cache=None, barcodes=None):
+    """Resolve a scanned code for a pick list; return the part's row in List Items column order."""
+    part_number = resolve_part_number(conn, code, cache, barcodes)
+    return fetch_part(conn, part_number, cache)
+
+
+def check_barcode(conn, code, cache=None, barcodes=None):
+    """Resolve a scanned code without changing stock; return (part_number, quantity on hand)."""
+    part_number = resolve_part_number(conn, code, cache, barcodes)
+    return part_number, get_part_quantity(conn, part_number, cache)
+
+
+def scan_out_part(conn, part_number, quantity, cache=None):
+    """Remove stock in a single conditional UPDATE and return the remaining quantity.
+
+    The stock check and the decrement happen in one statement, so two stations
+    scanning the same part cannot both pass the check and drive it negative.
+    With a cache, unknown parts and obvious shortfalls are refused without
+    touching the database, and the remaining quantity is written through.
+    """
+    record = None
+    if cache is not None:
+        record = cache.get(conn, part_number)
+        if record is None:
+            raise PartNotFoundError(part_number)
+        if record.quantity < quantity:
+            raise InsufficientStockError(part_number, record.quantity)
+
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['set_movement_source'], ('scan_out', None))
+    cursor.execute(SQL_STATEMENTS['scan_out'], (quantity, part_number, quantity))
+    updated = cursor.rowcount == 1
+    cursor.execute(SQL_STATEMENTS['set_movement_source'], (None, None))
+    if updated and record is not None:
+        conn.commit()
+        # Unchanged data_version means no other writer got in between, so the cached value is exact
+        if cache.validate(conn):
+            record.quantity -= quantity
+            return record.quantity
+        record = cache.get(conn, part_number)
+        return record.quantity
+
+    cursor.execute(SQL_STATEMENTS['part_quantity'], (part_number,))
+    result = cursor.fetchone()
+    conn.commit()
+
+    if updated:
+        return result[0]
+    if result is None:
+        raise PartNotFoundError(part_number)
+    raise InsufficientStockError(part_number, result[0])
+
+
+def merge_pick_lines(lines):
+    """Combine (part_number, quantity) lines for the same part, keeping first-scanned order."""
+    merged = {}
+    for part_number, quantity in lines:
+        merged[part_number] = merged.get(part_number, 0) + quantity
+    return merged
+
+
+def check_out_pick_list(conn, lines, cache=None):
+    """Remove every line of a pick list in one transaction, or nothing at all.
+
+    Duplicate lines are merged and stock for the whole list is read with one
+    query under the write lock, so no other station can change it in between.
+    If any part is missing or short, PickListShortageError lists every
+    shortfall. Otherwise all decrements are applied with one executemany.
+    Returns the updated rows of the picked parts in List Items column order.
+    """
+    merged = merge_pick_lines(lines)
+    part_numbers = list(merged)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        take_pick_lines(cursor, merged)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if cache is not None:
+        for part_number in part_numbers:
+            cache.discard(part_number)
+    return fetch_parts(cursor, part_numbers)
+
+
+def take_pick_lines(cursor, merged):
+    """Check and remove merged pick-list lines inside the caller's write transaction.
+
+    Raises PickListShortageError, before anything is written, if any part is
+    missing or short.
+    """
+    part_numbers = list(merged)
+    available = {}
+    for start in range(0, len(part_numbers), SQL_MAX_VARIABLES):
+        batch = part_numbers[start:start + SQL_MAX_VARIABLES]
+        cursor.execute(
+            SQL_STATEMENTS['part_quantities_in'].format(placeholders=', '.join('?' * len(batch))), batch
+        )
+        available.update(cursor.fetchall())
+
+    shortfalls = [
+        (part_number, quantity, available.get(part_number))
+        for part_number, quantity in merged.items()
+        if available.get(part_number, -1) < quantity
+    ]
+    if shortfalls:
+        raise PickListShortageError(shortfalls)
+
+    cursor.execute(SQL_STATEMENTS['set_movement_source'], ('pick_list', None))
+    cursor.executemany(
+        SQL_STATEMENTS['scan_out'],
+        [(quantity, part_number, quantity) for part_number, quantity in merged.items()]
+    )
+    cursor.execute(SQL_STATEMENTS['set_movement_source'], (None, None))
+
+
+def fetch_parts(cursor, part_numbers):
+    """Return the rows of the given parts in List Items column order."""
+    rows = []
+    for start in range(0, len(part_numbers), SQL_MAX_VARIABLES):
+        batch = part_numbers[start:start + SQL_MAX_VARIABLES]
+        cursor.execute(SQL_STATEMENTS['part_rows_in'].format(placeholders=', '.join('?' * len(batch))), batch)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def get_part_quantity(conn, part_number, cache=None):
+    """Return the quantity on hand for a part, or None if it does not exist."""
+    if cache is not None:
+        record = cache.get(conn, part_number)
+        return None if record is None else record.quantity
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['part_quantity'], (part_number,))
+    result = cursor.fetchone()
+    return None if result is None else result[0]
+
+
+def scan_in_batch(conn, scans, cache=None):
+    """Apply a list of (part_number, quantity) scan-ins in one transaction.
+
+    Returns the number of scans that matched a part.
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        SQL_STATEMENTS['scan_in'],
+        [(quantity, part_number) for part_number, quantity in scans]
+    )
+    applied = cursor.rowcount
+    conn.commit()
+    if cache is not None:
+        for part_number, _ in scans:
+            cache.discard(part_number)
+    return applied
+
+
+def scan_in_part(conn, part_number, quantity, cache=None):
+    """Add stock in a single UPDATE and return the new quantity."""
+    record = None
+    if cache is not None:
+        record = cache.get(conn, part_number)
+        if record is None:
+            raise PartNotFoundError(part_number)
+
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['scan_in'], (quantity, part_number))
+    if cursor.rowcount != 1:
+        conn.rollback()
+        raise PartNotFoundError(part_number)
+    if record is not None:
+        conn.commit()
+        if cache.validate(conn):
+            record.quantity += quantity
+            return record.quantity
+        return cache.get(conn, part_number).quantity
+
+    cursor.execute(SQL_STATEMENTS['part_quantity'], (part_number,))
+    new_quantity = cursor.fetchone()[0]
+    conn.commit()
+    return new_quantity
+
+
+def create_schema(conn):
+    """Create the inventory table and its supporting objects; return whether FTS5 search is available.
+
+    When PRAGMA user_version shows the database is already at SCHEMA_VERSION the
+    setup is skipped, so a station that reboots only pays for two tiny reads.
+    """
+    cursor = conn.cursor()
+    if cursor.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'inventory_fts'")
+        return cursor.fetchone() is not None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory (
+            part_number INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_name TEXT NOT NULL,
+            description TEXT,
+            origin_partnumber TEXT,
+            mcmaster_carr_partnumber TEXT,
+            cost REAL,
+            quantity INTEGER NOT NULL,
+            min_on_hand INTEGER NOT NULL,
+            location TEXT
+        )
+    ''')
+    # One index per sortable column; each also ends in the part number, which is what keyset paging needs.
+    # The vendor part number indexes also serve imports and vendor-label scans.
+    for column in LIST_COLUMN_NAMES[1:]:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_inventory_{column} ON inventory ({column})')
+    conn.commit()
+    fts_enabled = create_search_index(conn)
+    create_low_stock_table(conn)
+    create_location_summary(conn)
+    create_change_log(conn)
+    create_stock_ledger(conn)
+    create_usage_rollup(conn)
+    create_barcode_version(conn)
+    create_sync_tables(conn)
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    conn.commit()
+    return fts_enabled
+
+
+def create_barcode_version(conn):
+    """Create the barcode_version counter and the triggers that bump it when vendor numbers change.
+
+    Quantity updates do not touch it, so a BarcodeMap survives any number of scans.
+    """
+    cursor = conn.cursor()
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS barcode_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO barcode_version (id, version) VALUES (1, 0);
+
+        CREATE TRIGGER IF NOT EXISTS barcode_version_insert AFTER INSERT ON inventory BEGIN
+            UPDATE barcode_version SET version = version + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS barcode_version_update
+        AFTER UPDATE OF origin_partnumber, mcmaster_carr_partnumber ON inventory
+        WHEN old.origin_partnumber IS NOT new.origin_partnumber
+            OR old.mcmaster_carr_partnumber IS NOT new.mcmaster_carr_partnumber BEGIN
+            UPDATE barcode_version SET version = version + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS barcode_version_delete AFTER DELETE ON inventory BEGIN
+            UPDATE barcode_version SET version = version + 1 WHERE id = 1;
+        END;
+    ''')
+    conn.commit()
+
+
+def create_search_index(conn):
+    """Create the FTS5 trigram index over the text columns and the triggers that keep it in sync.
+
+    Returns False when this SQLite build has no FTS5 support.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'inventory_fts'")
+    exists = cursor.fetchone() is not None
+    try:
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                part_number INTEGER PRIMARY KEY AUTOINCREMENT,
-                part_name TEXT NOT NULL,
-                description TEXT,
-                origin_partnumber TEXT,
-                mcmaster_carr_partnumber TEXT,
-                cost REAL,
-                quantity INTEGER NOT NULL,
-                min_on_hand INTEGER NOT NULL,
-                location TEXT
+            CREATE VIRTUAL TABLE IF NOT EXISTS inventory_fts USING fts5(
+                part_name, description, origin_partnumber, mcmaster_carr_partnumber, location,
+                content='inventory', content_rowid='part_number', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_insert AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_fts (rowid, part_name, description, origin_partnumber, mcmaster_carr_partnumber, location)
+            VALUES (new.part_number, new.part_name, new.description, new.origin_partnumber, new.mcmaster_carr_partnumber, new.location);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_delete AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, part_name, description, origin_partnumber, mcmaster_carr_partnumber, location)
+            VALUES ('delete', old.part_number, old.part_name, old.description, old.origin_partnumber, old.mcmaster_carr_partnumber, old.location);
+        END;
+
+        -- Only text edits touch the index; quantity changes from scans skip it entirely
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_update
+        AFTER UPDATE OF part_name, description, origin_partnumber, mcmaster_carr_partnumber, location ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, part_name, description, origin_partnumber, mcmaster_carr_partnumber, location)
+            VALUES ('delete', old.part_number, old.part_name, old.description, old.origin_partnumber, old.mcmaster_carr_partnumber, old.location);
+            INSERT INTO inventory_fts (rowid, part_name, description, origin_partnumber, mcmaster_carr_partnumber, location)
+            VALUES (new.part_number, new.part_name, new.description, new.origin_partnumber, new.mcmaster_carr_partnumber, new.location);
+        END;
+    ''')
+    if not exists:
+        # Index the rows that were already in the table before the index existed
+        cursor.execute("INSERT INTO inventory_fts (inventory_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+def create_low_stock_table(conn):
+    """Create the low_stock table and the triggers that keep it in step with inventory.
+
+    The update trigger only fires when a part actually crosses its minimum, so
+    ordinary scans that stay on the same side of min_on_hand cost nothing extra.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'low_stock'")
+    exists = cursor.fetchone() is not None
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS low_stock (
+            part_number INTEGER PRIMARY KEY
+        );
+
+        CREATE TRIGGER IF NOT EXISTS low_stock_insert AFTER INSERT ON inventory
+        WHEN new.quantity < new.min_on_hand BEGIN
+            INSERT OR IGNORE INTO low_stock (part_number) VALUES (new.part_number);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS low_stock_update AFTER UPDATE OF quantity, min_on_hand ON inventory
+        WHEN (old.quantity < old.min_on_hand) != (new.quantity < new.min_on_hand) BEGIN
+            DELETE FROM low_stock WHERE part_number = old.part_number;
+            INSERT INTO low_stock (part_number) SELECT new.part_number WHERE new.quantity < new.min_on_hand;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS low_stock_delete AFTER DELETE ON inventory
+        WHEN old.quantity < old.min_on_hand BEGIN
+            DELETE FROM low_stock WHERE part_number = old.part_number;
+        END;
+    ''')
+    if not exists:
+        # Seed the table from the rows that were already short before it existed
+        cursor.execute('INSERT INTO low_stock (part_number) SELECT part_number FROM inventory WHERE quantity < min_on_hand')
+    conn.commit()
+
+
+def create_location_summary(conn):
+    """Create the location_summary table and the triggers that keep it in step with inventory.
+
+    Each location (parts with none are grouped under '') keeps its item count,
+    stock value (cost * quantity), and low-stock and out-of-stock counts, so
+    the dashboard reads one row per location instead of every part. A scan
+    that leaves a part in place costs one extra primary-key UPDATE.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'location_summary'")
+    exists = cursor.fetchone() is not None
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS location_summary (
+            location TEXT PRIMARY KEY,
+            item_count INTEGER NOT NULL,
+            total_value REAL NOT NULL,
+            low_stock_count INTEGER NOT NULL,
+            out_of_stock_count INTEGER NOT NULL
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS location_summary_insert AFTER INSERT ON inventory BEGIN
+            INSERT INTO location_summary (location, item_count, total_value, low_stock_count, out_of_stock_count)
+            VALUES (
+                IFNULL(new.location, ''), 1, IFNULL(new.cost, 0) * new.quantity,
+                new.quantity < new.min_on_hand, new.quantity <= 0
             )
+            ON CONFLICT (location) DO UPDATE SET
+                item_count = item_count + 1,
+                total_value = total_value + excluded.total_value,
+                low_stock_count = low_stock_count + excluded.low_stock_count,
+                out_of_stock_count = out_of_stock_count + excluded.out_of_stock_count;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS location_summary_update
+        AFTER UPDATE OF cost, quantity, min_on_hand, location ON inventory
+        WHEN IFNULL(old.location, '') = IFNULL(new.location, '') BEGIN
+            UPDATE location_summary SET
+                total_value = total_value + (IFNULL(new.cost, 0) * new.quantity - IFNULL(old.cost, 0) * old.quantity),
+                low_stock_count = low_stock_count + (new.quantity < new.min_on_hand) - (old.quantity < old.min_on_hand),
+                out_of_stock_count = out_of_stock_count + (new.quantity <= 0) - (old.quantity <= 0)
+            WHERE location = IFNULL(new.location, '');
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS location_summary_move
+        AFTER UPDATE OF location ON inventory
+        WHEN IFNULL(old.location, '') != IFNULL(new.location, '') BEGIN
+            UPDATE location_summary SET
+                item_count = item_count - 1,
+                total_value = total_value - IFNULL(old.cost, 0) * old.quantity,
+                low_stock_count = low_stock_count - (old.quantity < old.min_on_hand),
+                out_of_stock_count = out_of_stock_count - (old.quantity <= 0)
+            WHERE location = IFNULL(old.location, '');
+            DELETE FROM location_summary WHERE location = IFNULL(old.location, '') AND item_count = 0;
+            INSERT INTO location_summary (location, item_count, total_value, low_stock_count, out_of_stock_count)
+            VALUES (
+                IFNULL(new.location, ''), 1, IFNULL(new.cost, 0) * new.quantity,
+                new.quantity < new.min_on_hand, new.quantity <= 0
+            )
+            ON CONFLICT (location) DO UPDATE SET
+                item_count = item_count + 1,
+                total_value = total_value + excluded.total_value,
+                low_stock_count = low_stock_count + excluded.low_stock_count,
+                out_of_stock_count = out_of_stock_count + excluded.out_of_stock_count;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS location_summary_delete AFTER DELETE ON inventory BEGIN
+            UPDATE location_summary SET
+                item_count = item_count - 1,
+                total_value = total_value - IFNULL(old.cost, 0) * old.quantity,
+                low_stock_count = low_stock_count - (old.quantity < old.min_on_hand),
+                out_of_stock_count = out_of_stock_count - (old.quantity <= 0)
+            WHERE location = IFNULL(old.location, '');
+            DELETE FROM location_summary WHERE location = IFNULL(old.location, '') AND item_count = 0;
+        END;
+    ''')
+    if not exists:
+        # Seed the table from the parts that were already there before it existed
+        cursor.execute(f'INSERT INTO location_summary {LOCATION_SUMMARY_REBUILD}')
+    conn.commit()
+
+
+def fetch_location_summary(conn):
+    """Return (location, item_count, total_value, low_stock_count, out_of_stock_count) rows by location."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['location_summary'])
+    return cursor.fetchall()
+
+
+def check_location_summary(conn, repair=False, tolerance=LOCATION_VALUE_TOLERANCE):
+    """Rebuild the location summary from inventory and diff it against the trigger-maintained copy.
+
+    Both sides are read in one transaction, so scans running meanwhile cannot
+    show up as false mismatches. Returns (location, maintained, rebuilt) for
+    every location whose counts differ or whose value is off by more than
+    tolerance; either side is None when the location is missing from it. With
+    repair, a summary that differs is replaced by the rebuilt one.
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE' if repair else 'BEGIN')
+    try:
+        cursor.execute('''
+            SELECT location, item_count, total_value, low_stock_count, out_of_stock_count FROM location_summary
         ''')
-        self.conn.commit()
-
-    def reset_autoincrement_sequence(self):
-        """Reset the AUTOINCREMENT sequence in case of table or numbering issues."""
-        cursor = self.conn.cursor()
-        # Check if there are any items in the inventory, if not reset the sequence
-        cursor.execute("SELECT MAX(part_number) FROM inventory")
-        max_part_number = cursor.fetchone()[0]
-        if max_part_number is None:
-            # Reset the AUTOINCREMENT sequence
-            cursor.execute("DELETE FROM sqlite_sequence WHERE name='inventory'")
-            self.conn.commit()
-
-    def create_widgets(self):
-        """Create the main GUI components."""
-        # Create a frame at the top for the close button
-        top_bar = tk.Frame(self.root)
-        top_bar.pack(side=tk.TOP, fill=tk.X)
-
-        # Add a close button to exit the application
-        close_button = tk.Button(top_bar, text="X", command=self.close_application, fg="red", font=("Arial", 12, "bold"))
-        close_button.pack(side=tk.RIGHT, padx=5, pady=5)
-
-        # Create a custom font for the tabs
-        tab_font = tkfont.Font(family='Helvetica', size=16, weight='bold')
-
-        # Create a style for the Notebook tabs
-        style = ttk.Style()
-        style.configure('Custom.TNotebook.Tab', padding=[10, 5], font=tab_font, borderwidth=2, relief='raised')
-        style.map('Custom.TNotebook.Tab',
-                  background=[('selected', 'lightblue'), ('!selected', 'lightgrey')],
-                  foreground=[('selected', 'black'), ('!selected', 'black')])
-
-        # Create the Notebook with the custom style
-        notebook = ttk.Notebook(self.root, style='Custom.TNotebook')
-        notebook.pack(fill='both', expand=True)
-
-        # Create frames for each tab
-        self.list_frame = tk.Frame(notebook)
-        self.check_frame = tk.Frame(notebook)
-        self.scan_out_frame = tk.Frame(notebook)
-        self.scan_in_frame = tk.Frame(notebook)
-
-        # Add frames to notebook with tab labels
-        notebook.add(self.list_frame, text='List Items')
-        notebook.add(self.check_frame, text='Check Inventory Levels')
-        notebook.add(self.scan_out_frame, text='Scan Out Parts')
-        notebook.add(self.scan_in_frame, text='Scan In Parts')
-
-        # Initialize the contents of each frame
-        self.init_list_frame()
-        self.init_check_frame()
-        self.init_scan_out_frame()
-        self.init_scan_in_frame()
-
-    def init_list_frame(self):
-        """Initialize the List Items tab."""
-        top_frame = tk.Frame(self.list_frame)
-        top_frame.pack(pady=5)
-
-        controls_frame = tk.Frame(top_frame)
-        controls_frame.pack(anchor='center')
-
-        refresh_button = tk.Button(controls_frame, text="Refresh List", command=self.populate_list_tree)
-        refresh_button.pack(side=tk.LEFT, padx=5)
-
-        search_label = tk.Label(controls_frame, text="Search:")
-        search_label.pack(side=tk.LEFT, padx=5)
-        self.search_entry = tk.Entry(controls_frame)
-        self.search_entry.pack(side=tk.LEFT, padx=5)
-
-        search_button = tk.Button(controls_frame, text="Search", command=self.search_items)
-        search_button.pack(side=tk.LEFT, padx=5)
-        clear_button = tk.Button(controls_frame, text="Clear", command=self.clear_search)
-        clear_button.pack(side=tk.LEFT, padx=5)
-
-        action_frame = tk.Frame(self.list_frame)
-        action_frame.pack(pady=5)
-
-        add_button = tk.Button(action_frame, text="Add New Item", command=self.add_new_item)
-        add_button.pack(side=tk.LEFT, padx=5)
-        update_button = tk.Button(action_frame, text="Update Selected Item", command=self.update_selected_item)
-        update_button.pack(side=tk.LEFT, padx=5)
-        remove_button = tk.Button(action_frame, text="Remove Selected Item", command=self.remove_selected_item)
-        remove_button.pack(side=tk.LEFT, padx=5)
-
-        columns = (
-            'part_number', 'part_name', 'description', 'origin_partnumber',
-            'mcmaster_carr_partnumber', 'cost', 'quantity', 'min_on_hand', 'location'
+        maintained = {row[0]: row[1:] for row in cursor.fetchall()}
+        cursor.execute(LOCATION_SUMMARY_REBUILD)
+        rebuilt = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        mismatches = []
+        for location in sorted(maintained.keys() | rebuilt.keys()):
+            kept, fresh = maintained.get(location), rebuilt.get(location)
+            if (kept is None or fresh is None or kept[0] != fresh[0] or kept[2:] != fresh[2:]
+                    or abs(kept[1] - fresh[1]) > tolerance):
+                mismatches.append((location, kept, fresh))
+
+        if repair and mismatches:
+            cursor.execute('DELETE FROM location_summary')
+            cursor.execute(f'INSERT INTO location_summary {LOCATION_SUMMARY_REBUILD}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return mismatches
+
+
+def create_change_log(conn):
+    """Create the inventory_changes log and the triggers that append every changed part number to it.
+
+    Stations poll it to refresh their views with parts changed by other
+    connections. AUTOINCREMENT keeps ids rising even after the log is pruned.
+    """
+    conn.cursor().executescript('''
+        CREATE TABLE IF NOT EXISTS inventory_changes (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_number INTEGER NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_insert AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_changes (part_number) VALUES (new.part_number);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_update AFTER UPDATE ON inventory BEGIN
+            INSERT INTO inventory_changes (part_number) VALUES (new.part_number);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_delete AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_changes (part_number) VALUES (old.part_number);
+        END;
+    ''')
+    conn.commit()
+
+
+def poll_inventory_changes(conn, since_id, data_version=None, limit=REFRESH_MAX_PARTS):
+    """Return (data_version, newest change id, changed part numbers) for a view refresh poll.
+
+    PRAGMA data_version only moves when another connection commits, so while
+    it matches the value from the last poll the log is not read at all. Otherwise
+    the distinct parts changed after since_id are returned, or None when more
+    than limit changed or the log was pruned past since_id; the views should
+    then be reloaded. With since_id None the poll starts from the newest change.
+    """
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA data_version')
+    current = cursor.fetchone()[0]
+    if since_id is not None and current == data_version:
+        return current, since_id, []
+
+    cursor.execute(SQL_STATEMENTS['change_log_bounds'])
+    oldest, newest = cursor.fetchone()
+    if since_id is None or newest is None or newest <= since_id:
+        return current, newest if newest is not None else since_id or 0, []
+    if oldest > since_id + 1:
+        return current, newest, None
+    cursor.execute(SQL_STATEMENTS['change_log_parts'], (since_id, newest, limit + 1))
+    part_numbers = [row[0] for row in cursor.fetchall()]
+    return current, newest, part_numbers if len(part_numbers) <= limit else None
+
+
+def prune_inventory_changes(conn, keep=CHANGE_LOG_KEEP):
+    """Delete all but the newest keep rows of the change log; return how many were deleted."""
+    cursor = conn.cursor()
+    cursor.execute(
+        'DELETE FROM inventory_changes WHERE change_id <= (SELECT MAX(change_id) FROM inventory_changes) - ?',
+        (keep,)
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def fetch_parts_by_number(conn, part_numbers):
+    """Return the rows of the given parts in List Items column order; removed parts are simply missing."""
+    return fetch_parts(conn.cursor(), list(part_numbers))
+
+
+def create_stock_ledger(conn):
+    """Create the append-only stock_movements ledger, its triggers and the snapshot tables.
+
+    Every change to a part's quantity, whether from a scan, a manual update,
+    an import or a delete, appends its delta from a trigger inside the same
+    transaction. Times are Unix seconds. A new ledger starts with a base
+    snapshot of the current stock, since nothing earlier was recorded.
+
+    origin_station is NULL for quantity changes made on this station,
+    'catalog' for the stock of parts added or deleted here, and the sending
+    station's id for changes applied by sync.
+
+    kind is 'scan_out' or 'pick_list' for stock taken for use (see
+    LEDGER_USAGE_KINDS) and NULL for scan-ins, manual updates, imports and
+    catalog changes. Sync carries it over from the sending station.
+
+    The update trigger takes kind and origin_station from the one row of
+    stock_movement_source. Code that changes stock for a reason the trigger
+    cannot see sets that row just before its UPDATE and clears it again in
+    the same transaction, so no other writer ever sees it set.
+
+    A base snapshot holds every part with stock. Later snapshots only hold the
+    parts that moved since the snapshot before them, so a part's quantity at
+    a snapshot is its item in the newest snapshot up to and including it.
+    """
+    cursor = conn.cursor()
+    cursor.executescript(f'''
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            movement_id INTEGER PRIMARY KEY AUTOINCREMENT,  -- Never reused, even after compaction empties the table
+            part_number INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            quantity_after INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            origin_station TEXT,
+            kind TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_stock_movements_part_time ON stock_movements (part_number, created_at);
+
+        CREATE TABLE IF NOT EXISTS stock_movement_source (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            kind TEXT,
+            origin_station TEXT
+        );
+        INSERT OR IGNORE INTO stock_movement_source (id, kind, origin_station) VALUES (1, NULL, NULL);
+
+        CREATE TABLE IF NOT EXISTS stock_snapshots (
+            snapshot_id INTEGER PRIMARY KEY,
+            taken_at REAL NOT NULL,
+            last_movement_id INTEGER NOT NULL,  -- Every movement up to this id is included
+            base INTEGER NOT NULL DEFAULT 0  -- Set on the oldest snapshot once earlier history is gone
+        );
+        CREATE INDEX IF NOT EXISTS idx_stock_snapshots_taken_at ON stock_snapshots (taken_at);
+
+        CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+            snapshot_id INTEGER NOT NULL,
+            part_number INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, part_number)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_stock_snapshot_items_part ON stock_snapshot_items (part_number, snapshot_id);
+
+        CREATE TRIGGER IF NOT EXISTS stock_movements_insert AFTER INSERT ON inventory
+        WHEN new.quantity != 0 BEGIN
+            INSERT INTO stock_movements (part_number, delta, quantity_after, created_at, origin_station)
+            VALUES (new.part_number, new.quantity, new.quantity, {SQL_UNIX_NOW}, 'catalog');
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS stock_movements_update AFTER UPDATE OF quantity ON inventory
+        WHEN new.quantity != old.quantity BEGIN
+            INSERT INTO stock_movements (part_number, delta, quantity_after, created_at, origin_station, kind)
+            VALUES (
+                new.part_number, new.quantity - old.quantity, new.quantity, {SQL_UNIX_NOW},
+                (SELECT origin_station FROM stock_movement_source WHERE id = 1),
+                (SELECT kind FROM stock_movement_source WHERE id = 1)
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS stock_movements_delete AFTER DELETE ON inventory
+        WHEN old.quantity != 0 BEGIN
+            INSERT INTO stock_movements (part_number, delta, quantity_after, created_at, origin_station)
+            VALUES (old.part_number, -old.quantity, 0, {SQL_UNIX_NOW}, 'catalog');
+        END;
+    ''')
+    conn.commit()
+    cursor.execute('SELECT 1 FROM stock_snapshots LIMIT 1')
+    if cursor.fetchone() is None:
+        take_stock_snapshot(conn, base=True)
+
+
+def take_stock_snapshot(conn, base=False, min_age_s=None):
+    """Record the quantities that changed since the last snapshot; return its id, or None if one was recent enough.
+
+    A base snapshot, and the first one, record every part with stock instead.
+    The write lock is taken first, so the quantities and the last movement id
+    match exactly even while other stations are scanning. With min_age_s, no
+    snapshot is taken if the newest one is younger than that.
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        # Snapshot and movement times come from the same clock so they order correctly
+        cursor.execute(f'SELECT {SQL_UNIX_NOW}')
+        now = cursor.fetchone()[0]
+        cursor.execute('SELECT taken_at, last_movement_id FROM stock_snapshots ORDER BY snapshot_id DESC LIMIT 1')
+        newest = cursor.fetchone()
+        if min_age_s is not None and newest is not None and now - newest[0] < min_age_s:
+            conn.rollback()
+            return None
+        cursor.execute('SELECT COALESCE(MAX(movement_id), 0) FROM stock_movements')
+        last_movement_id = cursor.fetchone()[0]
+        cursor.execute(
+            'INSERT INTO stock_snapshots (taken_at, last_movement_id, base) VALUES (?, ?, ?)',
+            (now, last_movement_id, int(base))
         )
-        self.list_tree = ttk.Treeview(self.list_frame, columns=columns, show='headings', selectmode='browse')
-        self.list_tree.pack(fill='both', expand=True)
-
-        for col in columns:
-            self.list_tree.heading(col, text=col.replace('_', ' ').title())
-            self.list_tree.column(col, width=150)
-
-        self.list_tree.tag_configure('below_min', background='yellow')
-        self.list_tree.tag_configure('out_of_stock', background='red')
-
-        self.populate_list_tree()
-
-    def init_check_frame(self):
-        """Initialize the Check Inventory Levels tab."""
-        top_frame = tk.Frame(self.check_frame)
-        top_frame.pack(pady=5)
-
-        controls_frame = tk.Frame(top_frame)
-        controls_frame.pack(anchor='center')
-
-        refresh_button = tk.Button(controls_frame, text="Refresh List", command=self.populate_check_tree)
-        refresh_button.pack(pady=5)
-
-        columns = (
-            'part_number', 'part_name', 'quantity', 'min_on_hand', 'origin_partnumber',
-            'mcmaster_carr_partnumber', 'cost', 'location'
+        snapshot_id = cursor.lastrowid
+        if base or newest is None:
+            cursor.execute('''
+                INSERT INTO stock_snapshot_items (snapshot_id, part_number, quantity)
+                SELECT ?, part_number, quantity FROM inventory WHERE quantity != 0
+            ''', (snapshot_id,))
+        else:
+            # Deleted parts get a zero so an older item for them no longer applies; the unary plus keeps
+            # the scan on the rowid range instead of the whole part_number index
+            cursor.execute('''
+                INSERT INTO stock_snapshot_items (snapshot_id, part_number, quantity)
+                SELECT ?, m.part_number, COALESCE(i.quantity, 0)
+                FROM (SELECT DISTINCT +part_number AS part_number FROM stock_movements WHERE movement_id > ?) AS m
+                LEFT JOIN inventory AS i ON i.part_number = m.part_number
+            ''', (snapshot_id, newest[1]))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return snapshot_id
+
+
+def compact_stock_ledger(conn, before):
+    """Fold movements older than the newest snapshot taken before `before` into that snapshot.
+
+    That snapshot becomes the base of the ledger: the items of older snapshots
+    are folded into it, then they and the movements it already covers are
+    deleted. Returns the number of movements removed. Quantities before the
+    base can no longer be answered.
+    """
+    roll_up_stock_usage(conn)  # Daily usage must have seen every movement before it is deleted
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute(
+            'SELECT snapshot_id, last_movement_id FROM stock_snapshots WHERE taken_at <= ? '
+            'ORDER BY taken_at DESC LIMIT 1',
+            (before,)
         )
-        self.check_tree = ttk.Treeview(self.check_frame, columns=columns, show='headings', selectmode='browse')
-        self.check_tree.pack(fill='both', expand=True)
-
-        for col in columns:
-            self.check_tree.heading(col, text=col.replace('_', ' ').title())
-            self.check_tree.column(col, width=150)
-
-        self.check_tree.tag_configure('out_of_stock', background='red')
-
-        self.populate_check_tree()
-
-    def init_scan_out_frame(self):
-        """Initialize the Scan Out Parts tab."""
-        instruction_label = tk.Label(self.scan_out_frame, text="Scan the part number to check out parts:")
-        instruction_label.pack(pady=10)
-
-        self.scan_entry = tk.Entry(self.scan_out_frame, font=('Arial', 24))
-        self.scan_entry.pack(pady=5)
-        self.scan_entry.focus_set()
-
-        quantity_frame = tk.Frame(self.scan_out_frame)
-        quantity_frame.pack(pady=5)
-
-        quantity_label = tk.Label(quantity_frame, text="Quantity to Remove:")
-        quantity_label.pack(side=tk.LEFT)
-
-        self.scan_quantity_entry = tk.Entry(quantity_frame, width=5)
-        self.scan_quantity_entry.pack(side=tk.LEFT, padx=5)
-        self.scan_quantity_entry.insert(0, "1")
-
-        self.scan_entry.bind('<Return>', self.process_scan)
-
-        self.scan_message = tk.Label(self.scan_out_frame, text="", font=('Arial', 14))
-        self.scan_message.pack(pady=10)
-
-    def process_scan(self, event=None):
-        """Process the scanned part number for scanning out."""
-        part_number_str = self.scan_entry.get().strip()
-        quantity_str = self.scan_quantity_entry.get().strip()
-
-        self.scan_entry.delete(0, tk.END)
-        self.scan_entry.focus_set()
-
+        row = cursor.fetchone()
+        cursor.execute('SELECT MIN(snapshot_id) FROM stock_snapshots')
+        if row is None or row[0] == cursor.fetchone()[0]:
+            conn.rollback()  # Nothing older than this snapshot is left to fold in
+            return 0
+        snapshot_id, last_movement_id = row
+        cursor.execute('DELETE FROM stock_movements WHERE movement_id <= ?', (last_movement_id,))
+        removed = cursor.rowcount
+        # The newest older item of each part is its quantity at the new base; its own items take precedence
+        cursor.execute('''
+            INSERT OR IGNORE INTO stock_snapshot_items (snapshot_id, part_number, quantity)
+            SELECT ?, part_number, quantity FROM (
+                SELECT part_number, quantity, MAX(snapshot_id) FROM stock_snapshot_items
+                WHERE snapshot_id < ? GROUP BY part_number
+            )
+        ''', (snapshot_id, snapshot_id))
+        cursor.execute('DELETE FROM stock_snapshot_items WHERE snapshot_id = ? AND quantity = 0', (snapshot_id,))
+        cursor.execute('DELETE FROM stock_snapshot_items WHERE snapshot_id < ?', (snapshot_id,))
+        cursor.execute('DELETE FROM stock_snapshots WHERE snapshot_id < ?', (snapshot_id,))
+        cursor.execute('UPDATE stock_snapshots SET base = 1 WHERE snapshot_id = ?', (snapshot_id,))
+        cursor.execute('DELETE FROM stock_usage_daily WHERE day < ?', (int(before // 86400),))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return removed
+
+
+def thin_stock_snapshots(conn, before, interval_s=LEDGER_THIN_INTERVAL_S):
+    """Keep one snapshot per interval_s among those taken before `before`; return how many were removed.
+
+    A removed snapshot's items are merged into the next snapshot, which then
+    covers the changes since the one before it. The base and the newest
+    snapshot are always kept.
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT MAX(snapshot_id) FROM stock_snapshots')
+        newest = cursor.fetchone()[0]
+        cursor.execute('SELECT snapshot_id, taken_at FROM stock_snapshots ORDER BY snapshot_id')
+        snapshots = cursor.fetchall()
+        removed = 0
+        kept_at = None
+        for index, (snapshot_id, taken_at) in enumerate(snapshots):
+            if taken_at >= before or snapshot_id == newest:
+                break
+            if kept_at is None or taken_at - kept_at >= interval_s:
+                kept_at = taken_at
+                continue
+            following = snapshots[index + 1][0]
+            cursor.execute('''
+                INSERT OR IGNORE INTO stock_snapshot_items (snapshot_id, part_number, quantity)
+                SELECT ?, part_number, quantity FROM stock_snapshot_items WHERE snapshot_id = ?
+            ''', (following, snapshot_id))
+            cursor.execute('DELETE FROM stock_snapshot_items WHERE snapshot_id = ?', (snapshot_id,))
+            cursor.execute('DELETE FROM stock_snapshots WHERE snapshot_id = ?', (snapshot_id,))
+            removed += 1
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return removed
+
+
+def maintain_stock_ledger(conn, now=None):
+    """Roll up daily usage, take the periodic snapshot if one is due, compact past the retention window,
+    thin out old snapshots and trim the refresh change log."""
+    now = time.time() if now is None else now
+    roll_up_stock_usage(conn)
+    snapshot_id = take_stock_snapshot(conn, min_age_s=LEDGER_SNAPSHOT_INTERVAL_S)
+    removed = compact_stock_ledger(conn, now - LEDGER_RETENTION_DAYS * 24 * 60 * 60)
+    thinned = thin_stock_snapshots(conn, now - LEDGER_THIN_AFTER_DAYS * 24 * 60 * 60)
+    pruned = prune_inventory_changes(conn)
+    return {
+        'snapshot_id': snapshot_id, 'movements_compacted': removed, 'snapshots_thinned': thinned,
+        'changes_pruned': pruned,
+    }
+
+
+def create_sync_tables(conn):
+    """Create the bookkeeping for exchanging quantity deltas with other stations.
+
+    Only ledger movements with a NULL origin_station are exported: quantity
+    changes made here. Catalog changes (adding, editing or deleting parts) are
+    not replicated, so every station is expected to start from a copy of the
+    same catalog; movements recorded before sync existed are never exported.
+    """
+    cursor = conn.cursor()
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO sync_state (key, value)
+        SELECT 'exported_through', COALESCE(MAX(movement_id), 0) FROM stock_movements;
+
+        -- Newest movement id of each peer station that has been applied here
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            station_id TEXT PRIMARY KEY,
+            applied_through INTEGER NOT NULL,
+            applied_at REAL NOT NULL
+        );
+    ''')
+    conn.commit()
+
+
+def get_station_id(settings):
+    """Return this station's sync id from settings, creating one on first use."""
+    if not settings.get('station_id'):
+        settings['station_id'] = uuid.uuid4().hex
+    return settings['station_id']
+
+
+def export_changes(conn, station_id, sync_dir, batch_size=SYNC_BATCH_MOVEMENTS):
+    """Write this station's new stock movements to sync_dir as gzipped JSONL batches.
+
+    Each batch is named after the station and the movement ids it covers,
+    after the last export and up to its last movement. Every row carries its
+    movement id, so if a crash loses the record of an export, the overlapping
+    batch written next time is harmless: importers skip the ids they have
+    already applied. Only movements since the last export are read. Returns
+    (batches, movements).
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM sync_state WHERE key = 'exported_through'")
+    exported_through = cursor.fetchone()[0]
+    batches = 0
+    movements = 0
+    while True:
+        cursor.execute('''
+            SELECT movement_id, part_number, delta, created_at, kind FROM stock_movements
+            WHERE movement_id > ? AND origin_station IS NULL
+            ORDER BY movement_id LIMIT ?
+        ''', (exported_through, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_movement_id = rows[-1][0]
+        path = os.path.join(sync_dir, f'{station_id}-{exported_through:012d}-{last_movement_id:012d}.jsonl.gz')
+        with gzip.open(path + '.part', 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'station': station_id, 'after': exported_through, 'through': last_movement_id, 'count': len(rows)
+            }) + '\n')
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        os.replace(path + '.part', path)
+
+        exported_through = last_movement_id
+        cursor.execute("UPDATE sync_state SET value = ? WHERE key = 'exported_through'", (exported_through,))
+        conn.commit()
+        batches += 1
+        movements += len(rows)
+    return batches, movements
+
+
+def read_change_batch(path):
+    """Return (header, [(movement_id, part_number, delta, created_at, kind), ...]) from a change-log batch file."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        rows = [tuple(json.loads(line)) for line in f]
+    return header, rows
+
+
+def list_change_batches(folder):
+    """Return [(station, after, through, path), ...] for the batch files in folder.
+
+    Batches are named {station}-{after:012d}-{through:012d}.jsonl.gz, where
+    after is the watermark the batch starts from; other files are ignored.
+    """
+    batches = []
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return batches
+    for name in names:
+        if not name.endswith('.jsonl.gz'):
+            continue
+        parts = name[:-len('.jsonl.gz')].split('-')
+        if len(parts) != 3 or not all(part.isdigit() for part in parts[1:]):
+            continue
+        batches.append((parts[0], int(parts[1]), int(parts[2]), os.path.join(folder, name)))
+    return batches
+
+
+def archive_applied_changes(station_id, sync_dir):
+    """Move this station's batches that every other station has applied into sync_dir's archive folder.
+
+    Stations publish what they have applied in the acks folder after each
+    import. Archived batches stay available for a station that falls behind
+    or joins later, but no longer slow down every station's folder listing.
+    Returns the number of batches archived.
+    """
+    acks_dir = os.path.join(sync_dir, SYNC_ACKS_DIR)
+    try:
+        names = os.listdir(acks_dir)
+    except FileNotFoundError:
+        return 0
+    acks = []
+    for name in names:
+        if not name.endswith('.json') or name[:-len('.json')] == station_id:
+            continue
         try:
-            quantity = int(quantity_str)
-            if quantity <= 0:
-                raise ValueError
-        except ValueError:
-            self.scan_message.config(text="Invalid quantity. Please enter a positive integer.", fg='red')
-            return
-
-        if not part_number_str:
-            self.scan_message.config(text="No part number detected. Please try again.", fg='red')
-            return
-
+            with open(os.path.join(acks_dir, name), encoding='utf-8') as f:
+                acks.append(json.load(f).get(station_id, 0))
+        except (OSError, ValueError):
+            return 0  # A half-written or unreadable ack could hide a station that still needs them
+    if not acks:
+        return 0
+    applied_everywhere = min(acks)
+    archive_dir = os.path.join(sync_dir, SYNC_ARCHIVE_DIR)
+    archived = 0
+    for peer, _, through, path in list_change_batches(sync_dir):
+        if peer == station_id and through <= applied_everywhere:
+            os.makedirs(archive_dir, exist_ok=True)
+            os.replace(path, os.path.join(archive_dir, os.path.basename(path)))
+            archived += 1
+    return archived
+
+
+def import_changes(conn, station_id, sync_dir):
+    """Apply every other station's batches in sync_dir that have not been applied here yet.
+
+    Deltas only ever add to or subtract from quantity, so batches from any
+    number of stations merge in any order without conflicts. Each batch is
+    applied in one transaction together with the peer's new watermark, and
+    rows at or below the watermark are skipped, so no movement is applied
+    twice even when batches overlap. The archive folder is only read on the
+    first import, or when a peer's live batches start past what was applied
+    here. Movements for parts this station does not have are skipped.
+    Afterwards this station's watermarks are published to the acks folder.
+    Returns (batches, movements, skipped).
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT station_id, applied_through FROM sync_peers')
+    applied = dict(cursor.fetchall())
+
+    pending = [batch for batch in list_change_batches(sync_dir) if batch[0] != station_id]
+    first_after = {}
+    for peer, after, _, _ in pending:
+        first_after[peer] = min(first_after.get(peer, after), after)
+    if not applied or any(after > applied.get(peer, 0) for peer, after in first_after.items()):
+        pending += [
+            batch for batch in list_change_batches(os.path.join(sync_dir, SYNC_ARCHIVE_DIR)) if batch[0] != station_id
+        ]
+    # A peer's batches must be applied in order so its watermark only moves forward
+    pending = sorted(
+        (peer, through, path) for peer, _, through, path in pending if through > applied.get(peer, 0)
+    )
+
+    batches = movements = skipped = 0
+    for peer, through, path in pending:
+        header, rows = read_change_batch(path)
+        merged = {}
+        new_rows = 0
+        for movement_id, part_number, delta, _, kind in rows:
+            if movement_id <= applied.get(peer, 0):
+                continue
+            # Kept apart by kind so the peer's scan-outs still count as use here
+            deltas = merged.setdefault(kind, {})
+            deltas[part_number] = deltas.get(part_number, 0) + delta
+            new_rows += 1
+
+        cursor.execute('BEGIN IMMEDIATE')
         try:
-            part_number = int(part_number_str)
-        except ValueError:
-            self.scan_message.config(text="Invalid part number. Must be an integer.", fg='red')
+            for kind, deltas in merged.items():
+                cursor.execute(SQL_STATEMENTS['set_movement_source'], (kind, peer))
+                cursor.executemany(
+                    'UPDATE inventory SET quantity = quantity + ? WHERE part_number = ?',
+                    [(delta, part_number) for part_number, delta in deltas.items() if delta]
+                )
+                skipped += sum(1 for delta in deltas.values() if delta) - cursor.rowcount
+            cursor.execute(SQL_STATEMENTS['set_movement_source'], (None, None))
+            cursor.execute('''
+                INSERT INTO sync_peers (station_id, applied_through, applied_at) VALUES (?, ?, ?)
+                ON CONFLICT (station_id) DO UPDATE SET applied_through = excluded.applied_through, applied_at = excluded.applied_at
+            ''', (peer, header['through'], time.time()))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied[peer] = header['through']
+        batches += 1
+        movements += new_rows
+
+    acks_dir = os.path.join(sync_dir, SYNC_ACKS_DIR)
+    os.makedirs(acks_dir, exist_ok=True)
+    path = os.path.join(acks_dir, f'{station_id}.json')
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(applied, f)
+    os.replace(path + '.part', path)
+    return batches, movements, skipped
+
+
+def sync_with_central(conn, station_id, sync_dir):
+    """Send this station's changes to the central sync folder and apply everyone else's; return stats."""
+    started = time.perf_counter()
+    sent_batches, sent = export_changes(conn, station_id, sync_dir)
+    received_batches, received, skipped = import_changes(conn, station_id, sync_dir)
+    archived = archive_applied_changes(station_id, sync_dir)
+    return {
+        'sent_batches': sent_batches,
+        'sent_movements': sent,
+        'archived_batches': archived,
+        'received_batches': received_batches,
+        'received_movements': received,
+        'skipped_movements': skipped,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def create_usage_rollup(conn):
+    """Create stock_usage_daily, the per-part, per-day totals of stock removed, for the analytics.
+
+    It is filled from the ledger by roll_up_stock_usage() during maintenance
+    rather than by a trigger, so scans pay nothing for it. Days are UTC days
+    since the Unix epoch.
+    """
+    cursor = conn.cursor()
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS stock_usage_daily (
+            part_number INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            used INTEGER NOT NULL,
+            PRIMARY KEY (part_number, day)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS stock_usage_rollup (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_movement_id INTEGER NOT NULL  -- Every movement up to this id is counted
+        );
+        INSERT OR IGNORE INTO stock_usage_rollup (id, last_movement_id) VALUES (1, 0);
+    ''')
+    conn.commit()
+
+
+def roll_up_stock_usage(conn):
+    """Add the stock used since the last roll-up to stock_usage_daily; return the movements read.
+
+    Only movements of the LEDGER_USAGE_KINDS count, so correcting a count,
+    importing quantities or deleting a part is not mistaken for use.
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT last_movement_id FROM stock_usage_rollup WHERE id = 1')
+        last_movement_id = cursor.fetchone()[0]
+        cursor.execute('SELECT COALESCE(MAX(movement_id), 0), COUNT(*) FROM stock_movements WHERE movement_id > ?', (last_movement_id,))
+        newest, count = cursor.fetchone()
+        if count:
+            cursor.execute(f'''
+                INSERT INTO stock_usage_daily (part_number, day, used)
+                SELECT part_number, CAST(created_at / 86400 AS INTEGER), -SUM(delta) FROM stock_movements
+                WHERE movement_id > ? AND movement_id <= ? AND delta < 0
+                    AND kind IN ({', '.join('?' * len(LEDGER_USAGE_KINDS))})
+                GROUP BY 1, 2
+                ON CONFLICT (part_number, day) DO UPDATE SET used = used + excluded.used
+            ''', (last_movement_id, newest, *LEDGER_USAGE_KINDS))
+            cursor.execute('UPDATE stock_usage_rollup SET last_movement_id = ? WHERE id = 1', (newest,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return count
+
+
+def nearest_snapshot(cursor, when):
+    """Return (snapshot_id, taken_at, last_movement_id) for the newest snapshot at or before when.
+
+    Raises InventoryError if when falls before the compacted start of the ledger.
+    """
+    cursor.execute(
+        'SELECT snapshot_id, taken_at, last_movement_id FROM stock_snapshots WHERE taken_at <= ? '
+        'ORDER BY taken_at DESC LIMIT 1',
+        (when,)
+    )
+    row = cursor.fetchone()
+    if row is not None:
+        return row
+    cursor.execute('SELECT MIN(taken_at) FROM stock_snapshots WHERE base = 1')
+    base_taken_at = cursor.fetchone()[0]
+    if base_taken_at is not None:
+        raise InventoryError(
+            f"Stock history starts at {time.strftime('%Y-%m-%d %H:%M', time.localtime(base_taken_at))}."
+        )
+    return None, None, 0
+
+
+def quantity_at(conn, part_number, when):
+    """Return a part's quantity on hand at Unix time `when`, replaying only from the nearest snapshot."""
+    cursor = conn.cursor()
+    snapshot_id, taken_at, last_movement_id = nearest_snapshot(cursor, when)
+    quantity = 0
+    if snapshot_id is not None:
+        cursor.execute(
+            'SELECT quantity FROM stock_snapshot_items WHERE part_number = ? AND snapshot_id <= ? '
+            'ORDER BY snapshot_id DESC LIMIT 1',
+            (part_number, snapshot_id)
+        )
+        row = cursor.fetchone()
+        quantity = row[0] if row else 0
+    cursor.execute('''
+        SELECT TOTAL(delta) FROM stock_movements
+        WHERE part_number = ? AND created_at >= ? AND created_at <= ? AND movement_id > ?
+    ''', (part_number, taken_at or 0, when, last_movement_id))
+    return quantity + int(cursor.fetchone()[0])
+
+
+def inventory_at(conn, when):
+    """Return {part_number: quantity} for every part with stock at Unix time `when`."""
+    cursor = conn.cursor()
+    snapshot_id, _, last_movement_id = nearest_snapshot(cursor, when)
+    quantities = {}
+    if snapshot_id is not None:
+        cursor.execute('''
+            SELECT part_number, quantity, MAX(snapshot_id) FROM stock_snapshot_items
+            WHERE snapshot_id <= ? GROUP BY part_number
+        ''', (snapshot_id,))
+        quantities.update((part_number, quantity) for part_number, quantity, _ in cursor.fetchall())
+    cursor.execute('''
+        SELECT part_number, SUM(delta) FROM stock_movements
+        WHERE movement_id > ? AND created_at <= ?
+        GROUP BY part_number
+    ''', (last_movement_id, when))
+    for part_number, delta in cursor.fetchall():
+        quantities[part_number] = quantities.get(part_number, 0) + delta
+    return {part_number: quantity for part_number, quantity in quantities.items() if quantity != 0}
+
+
+def ledger_stats(conn, window_days=7):
+    """Report the ledger's size, write amplification and growth rate.
+
+    Write amplification counts the ledger rows (movements plus snapshot items)
+    written per quantity change, each of which also updates an index entry.
+    Growth covers both, measured from the snapshot nearest to window_days ago
+    by movement id rather than by scanning timestamps. Byte sizes come from
+    the dbstat table when this SQLite build has it.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*), MIN(created_at), MAX(movement_id) FROM stock_movements')
+    movements, oldest_movement, newest_movement = cursor.fetchone()
+    cursor.execute('SELECT COUNT(*), MIN(taken_at) FROM stock_snapshots')
+    snapshots, oldest_snapshot = cursor.fetchone()
+    cursor.execute('SELECT COUNT(*) FROM stock_snapshot_items')
+    snapshot_items = cursor.fetchone()[0]
+    now = time.time()
+    cursor.execute(
+        'SELECT snapshot_id, taken_at, last_movement_id FROM stock_snapshots WHERE taken_at <= ? '
+        'ORDER BY taken_at DESC LIMIT 1',
+        (now - window_days * 24 * 60 * 60,)
+    )
+    start = cursor.fetchone()
+    if start is None:
+        cursor.execute('SELECT snapshot_id, taken_at, last_movement_id FROM stock_snapshots ORDER BY snapshot_id LIMIT 1')
+        start = cursor.fetchone()
+    movements_per_day = items_per_day = 0.0
+    if start is not None and now > start[1]:
+        days = (now - start[1]) / (24 * 60 * 60)
+        cursor.execute('SELECT COUNT(*) FROM stock_snapshot_items WHERE snapshot_id > ?', (start[0],))
+        items_per_day = cursor.fetchone()[0] / days
+        movements_per_day = max((newest_movement or 0) - start[2], 0) / days
+
+    stats = {
+        'movements': movements,
+        'snapshots': snapshots,
+        'snapshot_items': snapshot_items,
+        'history_starts_at': oldest_snapshot if oldest_snapshot is not None else oldest_movement,
+        'write_amplification': round((movements + snapshot_items) / movements, 3) if movements else None,
+        'movements_per_day': round(movements_per_day, 1),
+        'snapshot_items_per_day': round(items_per_day, 1),
+        'ledger_bytes': None,
+        'bytes_per_day': None,
+    }
+    try:
+        cursor.execute('''
+            SELECT SUM(pgsize) FROM dbstat
+            WHERE name IN ('stock_movements', 'idx_stock_movements_part_time', 'stock_snapshots',
+                           'idx_stock_snapshots_taken_at', 'stock_snapshot_items', 'idx_stock_snapshot_items_part')
+        ''')
+        stats['ledger_bytes'] = cursor.fetchone()[0]
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name IN ('stock_movements', 'idx_stock_movements_part_time')")
+        movement_bytes = cursor.fetchone()[0]
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name IN ('stock_snapshot_items', 'idx_stock_snapshot_items_part')")
+        item_bytes = cursor.fetchone()[0]
+        bytes_per_day = 0
+        if movements and movement_bytes:
+            bytes_per_day += movement_bytes / movements * movements_per_day
+        if snapshot_items and item_bytes:
+            bytes_per_day += item_bytes / snapshot_items * items_per_day
+        stats['bytes_per_day'] = round(bytes_per_day)
+    except sqlite3.OperationalError:
+        pass  # dbstat is an optional compile-time feature
+    return stats
+
+
+def import_numpy():
+    """Return the numpy module, or None when it is not installed.
+
+    NumPy is optional and only the consumption analytics need it, so it is
+    imported on first use rather than slowing down every start.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def suggest_min_on_hand(conn, window_days=ANALYTICS_WINDOW_DAYS, lead_time_days=REORDER_LEAD_TIME_DAYS,
+                        service_z=REORDER_SERVICE_Z, now=None):
+    """Suggest a min_on_hand for every part from its scan-out history in one columnar pass.
+
+    SQLite streams per-part sums of daily use and of its square out of
+    stock_usage_daily in key order; NumPy turns them into each part's mean and
+    standard deviation of daily use (days without use count as zero) and a
+    suggestion of lead-time demand plus safety stock, with no per-part Python
+    loop. Parts with no removals in the window are left alone.
+
+    Returns a list of (part_number, current_min, daily_mean, daily_std,
+    suggested_min) for the parts whose minimum would change, largest change first.
+    """
+    np = import_numpy()
+    if np is None:
+        raise InventoryError("Consumption analytics need NumPy. Install it with 'pip install numpy'.")
+    now = time.time() if now is None else now
+    roll_up_stock_usage(conn)
+    cursor = conn.cursor()
+
+    # Only count days the ledger was actually recording
+    first_day = int((now - window_days * 24 * 60 * 60) // 86400)
+    cursor.execute('SELECT MIN(taken_at) FROM stock_snapshots')
+    ledger_start = cursor.fetchone()[0]
+    if ledger_start is not None:
+        first_day = max(first_day, int(ledger_start // 86400))
+    days = max(int(now // 86400) - first_day + 1, 1)
+
+    cursor.execute('SELECT part_number, min_on_hand FROM inventory ORDER BY part_number')
+    parts = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    part_numbers, current = parts[:, 0], parts[:, 1]
+
+    cursor.execute('''
+        SELECT part_number, SUM(used), SUM(used * used) FROM stock_usage_daily
+        WHERE day >= ?
+        GROUP BY part_number
+    ''', (first_day,))
+    blocks = []
+    while True:
+        rows = cursor.fetchmany(ANALYTICS_FETCH_ROWS)
+        if not rows:
+            break
+        blocks.append(np.array(rows, dtype=np.float64))
+    usage = np.concatenate(blocks) if blocks else np.zeros((0, 3))
+
+    # Line usage up with inventory rows; usage of deleted parts has nowhere to go
+    index = np.searchsorted(part_numbers, usage[:, 0].astype(np.int64))
+    known = index < len(part_numbers)
+    known[known] = part_numbers[index[known]] == usage[known, 0]
+    index, totals, squares = index[known], usage[known, 1], usage[known, 2]
+
+    mean = totals / days
+    std = np.sqrt(np.maximum(squares / days - mean * mean, 0.0))
+    demand = mean * lead_time_days + service_z * std * np.sqrt(lead_time_days)
+    suggested = np.ceil(np.round(demand, 6)).astype(np.int64)  # Rounding first keeps 7.0000001 from becoming 8
+
+    changed = np.flatnonzero(suggested != current[index])
+    changed = changed[np.argsort(-np.abs(suggested[changed] - current[index[changed]]), kind='stable')]
+    return [
+        (int(part_numbers[index[i]]), int(current[index[i]]), round(float(mean[i]), 3), round(float(std[i]), 3),
+         int(suggested[i]))
+        for i in changed
+    ]
+
+
+def apply_min_on_hand(conn, changes, cache=None):
+    """Set min_on_hand for many parts with one executemany; changes are (part_number, min_on_hand) pairs."""
+    cursor = conn.cursor()
+    cursor.executemany(
+        'UPDATE inventory SET min_on_hand = ? WHERE part_number = ?',
+        [(min_on_hand, part_number) for part_number, min_on_hand in changes]
+    )
+    applied = cursor.rowcount
+    conn.commit()
+    if cache is not None:
+        for part_number, _ in changes:
+            cache.discard(part_number)
+    return applied
+
+
+def fetch_part_names(conn, part_numbers):
+    """Return {part_number: part_name} for the given parts."""
+    cursor = conn.cursor()
+    names = {}
+    part_numbers = list(part_numbers)
+    for start in range(0, len(part_numbers), SQL_MAX_VARIABLES):
+        batch = part_numbers[start:start + SQL_MAX_VARIABLES]
+        cursor.execute(SQL_STATEMENTS['part_names_in'].format(placeholders=', '.join('?' * len(batch))), batch)
+        names.update(cursor.fetchall())
+    return names
+
+
+def low_stock_sort_key(row, sort_column='part_number'):
+    """Return the keyset paging key of a low-stock row: its part number, or (sort value, part number)."""
+    if sort_column == 'part_number':
+        return row[0]
+    return (row[LOW_STOCK_COLUMN_NAMES.index(sort_column)], row[0])
+
+
+def fetch_low_stock(conn, sort_column='part_number', descending=False, after_key=None, limit=LOW_STOCK_PAGE_SIZE):
+    """Return up to limit parts below their minimum in sort order, starting after after_key (a low_stock_sort_key)."""
+    if sort_column not in LOW_STOCK_COLUMN_NAMES:
+        raise ValueError(f"Cannot sort by {sort_column}")
+    return fetch_sorted_rows(conn, after_key, limit, sort_column, descending, {'below_minimum': True}, 'low_stock')
+
+
+def iter_low_stock(conn, sort_column='part_number', descending=False, page_rows=LOW_STOCK_EXPORT_ROWS):
+    """Yield pages of the parts below their minimum in sort order, walking them by keyset."""
+    key = None
+    while True:
+        rows = fetch_low_stock(conn, sort_column, descending, key, page_rows)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_rows:
             return
+        key = low_stock_sort_key(rows[-1], sort_column)
+
+
+def fetch_low_stock_part_numbers(conn):
+    """Return the set of part numbers currently below their minimum."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['low_stock_part_numbers'])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def fetch_low_stock_crossings(conn, low_parts, part_numbers=None):
+    """Return [(part_number, row), ...] for parts whose low-stock state no longer matches low_parts.
+
+    Only part_numbers are checked when given; otherwise the whole low_stock
+    table is compared. row is in List Items column order, or None for a part
+    that was removed.
+    """
+    if part_numbers is None:
+        current = fetch_low_stock_part_numbers(conn)
+        candidates = sorted(current ^ set(low_parts))
+    else:
+        candidates = sorted(part_numbers)
+    rows = {row[0]: row for row in fetch_parts(conn.cursor(), candidates)}
+    crossings = []
+    for part_number in candidates:
+        row = rows.get(part_number)
+        is_low = row is not None and int(row[6]) < int(row[7])
+        if is_low != (part_number in low_parts):
+            crossings.append((part_number, row))
+    return crossings
+
+
+def search_inventory(conn, search_term, use_fts=True, limit=SEARCH_RESULT_LIMIT):
+    """Return inventory rows matching the search term, best matches first."""
+    cursor = conn.cursor()
+    items = []
+
+    # A bare number is most likely one of our own part numbers, so show that match first
+    if search_term.isdigit():
+        cursor.execute(SQL_STATEMENTS['part_row'], (int(search_term),))
+        items.extend(cursor.fetchall())
+
+    tokens = [token for token in search_term.split() if len(token) >= FTS_MIN_TOKEN_LENGTH]
+    short_tokens = [token for token in search_term.split() if len(token) < FTS_MIN_TOKEN_LENGTH]
+    if use_fts and tokens:
+        # Each token is quoted as a phrase so it matches as a substring; tokens are ANDed together
+        match_query = ' '.join('"' + token.replace('"', '""') + '"' for token in tokens)
+        if short_tokens:
+            # Tokens too short for the trigram index still have to match, so "M6 bolt" finds no M8 bolts
+            condition = '(' + ' OR '.join(f'{column} LIKE ?' for column in SEARCH_LIKE_COLUMNS) + ')'
+            sql = SQL_STATEMENTS['search_fts_filtered'].format(conditions=' AND '.join([condition] * len(short_tokens)))
+            params = [match_query]
+            for token in short_tokens:
+                params.extend('%' + token + '%' for _ in SEARCH_LIKE_COLUMNS)
+            cursor.execute(sql, params + [limit])
+        else:
+            cursor.execute(SQL_STATEMENTS['search_fts'], (match_query, limit))
+    else:
+        # Terms too short for the trigram index fall back to a bounded substring scan
+        cursor.execute(SQL_STATEMENTS['search_like'], tuple('%' + search_term + '%' for _ in range(5)) + (limit,))
+
+    seen = {item[0] for item in items}
+    items.extend(item for item in cursor.fetchall() if item[0] not in seen)
+    return items
+
+
+def reset_autoincrement_sequence(conn):
+    """Reset the AUTOINCREMENT sequence in case of table or numbering issues."""
+    cursor = conn.cursor()
+    # Check if there are any items in the inventory, if not reset the sequence
+    cursor.execute("SELECT MAX(part_number) FROM inventory")
+    max_part_number = cursor.fetchone()[0]
+    if max_part_number is None:
+        # Reset the AUTOINCREMENT sequence
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name='inventory'")
+        conn.commit()
+
+
+def fetch_part(conn, part_number, cache=None):
+    """Return a part's row in List Items column order, or None if it does not exist."""
+    if cache is not None:
+        record = cache.get(conn, part_number)
+        return None if record is None else record.as_row()
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['part_row'], (part_number,))
+    return cursor.fetchone()
+
+
+def list_sort_key(row, sort_column='part_number'):
+    """Return the keyset paging key of a list row: its part number, or (sort value, part number)."""
+    if sort_column == 'part_number':
+        return row[0]
+    return (row[LIST_COLUMN_NAMES.index(sort_column)], row[0])
+
+
+def list_filter_clauses(filters):
+    """Turn a List Items filter dict into SQL conditions and their parameters."""
+    clauses = []
+    params = []
+    for name, value in (filters or {}).items():
+        if value is None or value == '':
+            continue
+        if name == 'location':
+            # A range rather than LIKE so the location index can be used
+            clauses.append('location >= ? AND location < ?')
+            params.extend((value, value + '\U0010ffff'))
+        elif name == 'below_minimum':
+            if value:
+                clauses.append(LIST_LOW_STOCK_CLAUSE)
+        elif name in LIST_FILTER_CLAUSES:
+            clauses.append(LIST_FILTER_CLAUSES[name])
+            params.append(value)
+        else:
+            raise ValueError(f"Unknown filter: {name}")
+    return clauses, params
+
+
+def fetch_sorted_rows(conn, start_key, limit, sort_column, descending, filters, statement='list_page'):
+    """Return up to limit filtered rows in sort order, starting after start_key (a list_sort_key).
+
+    SQLite puts NULLs first in ascending order and last in descending order.
+    The NULL and non-NULL stretches are read with separate queries so each is
+    a plain range over the column's index, whichever one the page starts in.
+    statement names the SQL_STATEMENTS entry that picks the columns returned.
+    """
+    if sort_column not in LIST_COLUMN_NAMES:
+        raise ValueError(f"Cannot sort by {sort_column}")
+    clauses, params = list_filter_clauses(filters)
+    op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+    cursor = conn.cursor()
+    rows = []
+
+    def read(conditions, condition_params, order):
+        where = ' AND '.join(clauses + conditions)
+        cursor.execute(
+            SQL_STATEMENTS[statement].format(where='WHERE ' + where if where else '', order=order),
+            params + condition_params + [limit - len(rows)]
+        )
+        rows.extend(cursor.fetchall())
 
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT quantity FROM inventory WHERE part_number = ?', (part_number,))
-        result = cursor.fetchone()
-
-        if result:
-            current_quantity = result[0]
-            if current_quantity >= quantity:
-                cursor.execute('UPDATE inventory SET quantity = quantity - ? WHERE part_number = ?', (quantity, part_number))
-                self.conn.commit()
-                new_quantity = current_quantity - quantity
-                self.scan_message.config(
-                    text=f"Removed {quantity} units of item with part number '{part_number}'. Remaining quantity: {new_quantity}", fg='green'
-                )
-                self.populate_list_tree()
-                self.populate_check_tree()
+    # SQL for the sort column and the part number tiebreak
+    column, key = sort_column, 'part_number'
+    if clauses:
+        cursor.execute(
+            SQL_STATEMENTS['list_filter_probe'].format(where=' AND '.join(clauses)), params + [LIST_FILTER_SORT_MAX_ROWS]
+        )
+        if cursor.fetchone()[0] < LIST_FILTER_SORT_MAX_ROWS:
+            # Walking the sort column's index would pass over every row the filter rejects to fill a page;
+            # the unary plus makes SQLite read the few matches through the filter's index and sort them
+            column, key = '+' + sort_column, '+part_number'
+        elif LIST_LOW_STOCK_CLAUSE in clauses:
+            # With many parts short, reading all of low_stock for every page costs more than walking the
+            # sort column's index and looking each part up in low_stock
+            clauses[clauses.index(LIST_LOW_STOCK_CLAUSE)] = '+' + LIST_LOW_STOCK_CLAUSE
+
+    if sort_column == 'part_number':
+        if start_key is None:
+            read([], [], f'{key} {direction}')
+        else:
+            read([f'{key} {op} ?'], [start_key], f'{key} {direction}')
+        return rows
+
+    segments = ['values', 'nulls'] if descending else ['nulls', 'values']
+    if sort_column in LIST_NOT_NULL_COLUMNS:
+        segments.remove('nulls')
+    if start_key is not None:
+        # Skip any stretch the page has already passed
+        segments = segments[segments.index('nulls' if start_key[0] is None else 'values'):]
+    for i, segment in enumerate(segments):
+        keyed = start_key is not None and i == 0
+        if segment == 'nulls':
+            if keyed:
+                read([f'{column} IS NULL', f'{key} {op} ?'], [start_key[1]], f'{key} {direction}')
             else:
-                self.scan_message.config(text=f"Insufficient stock. Available quantity: {current_quantity}", fg='red')
+                read([f'{column} IS NULL'], [], f'{key} {direction}')
+        elif keyed:
+            # The rest of the key's own value, then everything past it. A row-value comparison would seek on
+            # the column alone and step through every duplicate of the key, which is slow for common values.
+            read([f'{column} = ?', f'{key} {op} ?'], list(start_key), f'{key} {direction}')
+            if len(rows) < limit:
+                read([f'{column} {op} ?'], [start_key[0]], f'{column} {direction}, {key} {direction}')
         else:
-            self.scan_message.config(text=f"Item with part number '{part_number}' not found in inventory.", fg='red')
+            read([f'{column} IS NOT NULL'], [], f'{column} {direction}, {key} {direction}')
+        if len(rows) >= limit:
+            break
+    return rows
 
-    def init_scan_in_frame(self):
-        """Initialize the Scan In Parts tab."""
-        instruction_label = tk.Label(self.scan_in_frame, text="Scan the part number to add parts to inventory:")
-        instruction_label.pack(pady=10)
 
-        self.scan_in_entry = tk.Entry(self.scan_in_frame, font=('Arial', 24))
-        self.scan_in_entry.pack(pady=5)
-        self.scan_in_entry.focus_set()
+def fetch_list_page(conn, after_key=None, limit=LIST_PAGE_SIZE, sort_column='part_number', descending=False, filters=None):
+    """Return up to limit rows in sort order, starting after after_key (a list_sort_key)."""
+    return fetch_sorted_rows(conn, after_key, limit, sort_column, descending, filters)
 
-        quantity_frame = tk.Frame(self.scan_in_frame)
-        quantity_frame.pack(pady=5)
 
-        quantity_label = tk.Label(quantity_frame, text="Quantity to Add:")
-        quantity_label.pack(side=tk.LEFT)
+def fetch_list_page_before(conn, before_key, limit=LIST_PAGE_SIZE, sort_column='part_number', descending=False, filters=None):
+    """Return up to limit rows that precede before_key in sort order, nearest first."""
+    return fetch_sorted_rows(conn, before_key, limit, sort_column, not descending, filters)
 
-        self.scan_in_quantity_entry = tk.Entry(quantity_frame, width=5)
-        self.scan_in_quantity_entry.pack(side=tk.LEFT, padx=5)
-        self.scan_in_quantity_entry.insert(0, "1")
 
-        self.scan_in_entry.bind('<Return>', self.process_scan_in)
+def add_part(conn, fields):
+    """Insert a part from (part_name, description, origin_partnumber, mcmaster_carr_partnumber,
+    cost, quantity, min_on_hand, location) and return its new part number."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['add_part'], fields)
+    conn.commit()
+    return cursor.lastrowid
 
-        self.scan_in_message = tk.Label(self.scan_in_frame, text="", font=('Arial', 14))
-        self.scan_in_message.pack(pady=10)
 
-    def process_scan_in(self, event=None):
-        """Process the scanned part number for scanning in."""
-        part_number_str = self.scan_in_entry.get().strip()
-        quantity_str = self.scan_in_quantity_entry.get().strip()
+def update_part(conn, part_number, fields, cache=None):
+    """Overwrite every editable field of a part; fields are in the same order as add_part."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['update_part'], tuple(fields) + (part_number,))
+    conn.commit()
+    if cache is not None:
+        cache.discard(int(part_number))
 
-        self.scan_in_entry.delete(0, tk.END)
-        self.scan_in_entry.focus_set()
 
-        try:
-            quantity = int(quantity_str)
-            if quantity <= 0:
-                raise ValueError
-        except ValueError:
-            self.scan_in_message.config(text="Invalid quantity. Please enter a positive integer.", fg='red')
-            return
+def delete_part(conn, part_number, cache=None):
+    """Remove a part from the inventory."""
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['delete_part'], (part_number,))
+    conn.commit()
+    if cache is not None:
+        cache.discard(int(part_number))
 
-        if not part_number_str:
-            self.scan_in_message.config(text="No part number detected. Please try again.", fg='red')
-            return
-
-        try:
-            part_number = int(part_number_str)
-        except ValueError:
-            self.scan_in_message.config(text="Invalid part number. Must be an integer.", fg='red')
-            return
 
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT quantity FROM inventory WHERE part_number = ?', (part_number,))
-        result = cursor.fetchone()
+def validate_item_fields(part_name, description, origin_partnumber, mcmaster_carr_partnumber,
+                         cost, quantity, min_on_hand, location):
+    """Check raw text fields with the Add/Update Item rules and return them ready to store.
 
-        if result:
-            cursor.execute('UPDATE inventory SET quantity = quantity + ? WHERE part_number = ?', (quantity, part_number))
-            self.conn.commit()
-            new_quantity = result[0] + quantity
-            self.scan_in_message.config(
-                text=f"Added {quantity} units of item with part number '{part_number}'. New quantity: {new_quantity}", fg='green'
-            )
-            self.populate_list_tree()
-            self.populate_check_tree()
+    Raises ValueError with a message suitable for showing to the user.
+    """
+    part_name, description, origin_partnumber, mcmaster_carr_partnumber, cost, quantity, min_on_hand, location = (
+        (value or '').strip() for value in (
+            part_name, description, origin_partnumber, mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
+        )
+    )
+
+    if not (part_name and quantity and min_on_hand):
+        raise ValueError("Please fill in all required fields (Part Name, Quantity, Min on Hand).")
+
+    try:
+        cost = float(cost) if cost else 0.0
+        quantity = int(quantity)
+        min_on_hand = int(min_on_hand)
+    except ValueError:
+        raise ValueError("Quantity and Min on Hand must be integers and Cost must be a number.")
+
+    return (
+        part_name, description, origin_partnumber,
+        mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
+    )
+
+
+def iter_csv_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield (bytes_read, [(line_number, row), ...]) from a CSV file a chunk at a time.
+
+    The file is read line by line, so memory use depends on the chunk size,
+    not the file size. Raises ValueError if a required column is missing.
+    """
+    with open(path, 'rb') as f:
+        bytes_read = 0
+
+        def counted_lines():
+            nonlocal bytes_read
+            for line in f:
+                bytes_read += len(line)
+                yield line
+
+        reader = csv.DictReader(codecs.iterdecode(counted_lines(), 'utf-8-sig'))
+        missing = [column for column in IMPORT_REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"The CSV file is missing required column(s): {', '.join(missing)}")
+
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= chunk_rows:
+                yield bytes_read, chunk
+                chunk = []
+        if chunk:
+            yield bytes_read, chunk
+
+
+def lookup_part_numbers(cursor, column, values, newest_part):
+    """Map each value of a vendor part number column to the part numbers up to newest_part that have it, lowest first."""
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), SQL_MAX_VARIABLES):
+        batch = values[start:start + SQL_MAX_VARIABLES]
+        cursor.execute(
+            SQL_STATEMENTS['parts_by_vendor_number_in'].format(column=column, placeholders=', '.join('?' * len(batch))),
+            batch + [newest_part]
+        )
+        for value, part_number in cursor.fetchall():
+            found.setdefault(value, []).append(part_number)
+    for part_numbers in found.values():
+        part_numbers.sort()
+    return found
+
+
+def split_upserts(cursor, rows, state):
+    """Split validated (line_number, fields) rows into new parts and updates of parts that share a vendor part number.
+
+    Rows match on origin_partnumber first, then mcmaster_carr_partnumber. Each
+    row updates the lowest-numbered part with its number that no earlier row
+    of the file updated, so distinct parts sharing a vendor number each keep
+    their own row; a row left without one is added as a new part. Parts added
+    by this import are never matched. state carries the claimed parts and the
+    first line of each vendor number across chunks. Returns (inserts, updates,
+    warnings), with a warning for every row that repeats a vendor number.
+    """
+    by_origin = lookup_part_numbers(
+        cursor, 'origin_partnumber', {fields[2] for _, fields in rows if fields[2]}, state['newest_part']
+    )
+    by_mcmaster = lookup_part_numbers(
+        cursor, 'mcmaster_carr_partnumber', {fields[3] for _, fields in rows if fields[3]}, state['newest_part']
+    )
+
+    inserts = []
+    updates = []
+    warnings = []
+    for line_number, fields in rows:
+        for label, key in (('Origin', fields[2]), ('McMaster-Carr', fields[3])):
+            if not key:
+                continue
+            first_line = state['seen'].setdefault((label, key), line_number)
+            if first_line != line_number:
+                warnings.append(f"Line {line_number}: {label} part number {key} is also on line {first_line}")
+        part_number = None
+        for key, matches in ((fields[2], by_origin), (fields[3], by_mcmaster)):
+            candidates = [number for number in matches.get(key, ()) if number not in state['claimed']] if key else []
+            if candidates:
+                part_number = candidates[0]
+                break
+            if key and key in matches:
+                break  # Every part with this number was already updated by an earlier row
+        if part_number is None:
+            inserts.append(fields)
         else:
-            self.scan_in_message.config(text=f"Item with part number '{part_number}' not found in inventory.", fg='red')
-
-    def add_new_item(self):
-        """Open a window to add a new item."""
-        add_win = tk.Toplevel(self.root)
-        add_win.title("Add New Item")
-
-        labels = [
-            'Part Name', 'Description', 'Origin Part Number',
-            'McMaster-Carr Part Number', 'Cost', 'Quantity', 'Min on Hand', 'Location'
-        ]
-        entries = {}
-
-        for idx, label_text in enumerate(labels):
-            label = tk.Label(add_win, text=label_text)
-            label.grid(row=idx, column=0, padx=5, pady=5, sticky='e')
-            entry = tk.Entry(add_win)
-            entry.grid(row=idx, column=1, padx=5, pady=5)
-            entries[label_text] = entry
-
-        def save_item():
-            part_name = entries['Part Name'].get().strip()
-            description = entries['Description'].get().strip()
-            origin_partnumber = entries['Origin Part Number'].get().strip()
-            mcmaster_carr_partnumber = entries['McMaster-Carr Part Number'].get().strip()
-            cost = entries['Cost'].get().strip()
-            quantity = entries['Quantity'].get().strip()
-            min_on_hand = entries['Min on Hand'].get().strip()
-            location = entries['Location'].get().strip()
-
-            if not (part_name and quantity and min_on_hand):
-                messagebox.showerror("Error", "Please fill in all required fields (Part Name, Quantity, Min on Hand).")
-                return
-
+            state['claimed'].add(part_number)
+            updates.append(fields + (part_number,))
+    return inserts, updates, warnings
+
+
+def import_csv(conn, path, upsert=True, progress=None, cancel_event=None, chunk_rows=IMPORT_CHUNK_ROWS,
+               update_quantity=False):
+    """Stream a CSV file into the inventory table in batched transactions.
+
+    Every row is checked with validate_item_fields(); bad rows are counted and
+    skipped. With upsert, rows whose origin or McMaster-Carr part number already
+    exists update that part instead of adding a new one (see split_upserts).
+    Updates leave the part's quantity on hand alone unless update_quantity is
+    set, since stock may have moved since the file was made. Rows repeating
+    a vendor part number are counted in 'duplicates' and listed in
+    'warnings'. progress(bytes_read, total_bytes, summary) is called after
+    each committed chunk, and setting cancel_event stops the import between
+    chunks, keeping what was written.
+    """
+    summary = {
+        'inserted': 0, 'updated': 0, 'rejected': 0, 'duplicates': 0, 'errors': [], 'warnings': [], 'cancelled': False
+    }
+    total_bytes = os.path.getsize(path)
+    cursor = conn.cursor()
+    cursor.execute(SQL_STATEMENTS['newest_part_number'])
+    state = {'newest_part': cursor.fetchone()[0], 'claimed': set(), 'seen': {}}
+
+    for bytes_read, chunk in iter_csv_chunks(path, chunk_rows):
+        if cancel_event is not None and cancel_event.is_set():
+            summary['cancelled'] = True
+            break
+
+        rows = []
+        for line_number, row in chunk:
             try:
-                cost = float(cost) if cost else 0.0
-                quantity = int(quantity)
-                min_on_hand = int(min_on_hand)
-            except ValueError:
-                messagebox.showerror("Error", "Quantity and Min on Hand must be integers and Cost must be a number.")
-                return
-
-            cursor = self.conn.cursor()
-            try:
-                cursor.execute('''
-                    INSERT INTO inventory (
-                        part_name, description, origin_partnumber,
-                        mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    part_name, description, origin_partnumber,
-                    mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
-                ))
-                self.conn.commit()
-                messagebox.showinfo("Success", "Item added successfully.")
-                add_win.destroy()
-                self.populate_list_tree()
-                self.populate_check_tree()
-            except sqlite3.IntegrityError:
-                messagebox.showerror("Error", "Failed to add item due to database integrity error.")
-
-        save_button = tk.Button(add_win, text="Save Item", command=save_item)
-        save_button.grid(row=len(labels), column=0, columnspan=2, pady=10)
-
-    def search_items(self):
-        """Search for items based on the search entry."""
-        search_term = self.search_entry.get().strip()
-        if not search_term:
-            messagebox.showwarning("Warning", "Please enter a search term.")
-            return
-
-        for row in self.list_tree.get_children():
-            self.list_tree.delete(row)
-
-        cursor = self.conn.cursor()
-        sql_query = '''
-            SELECT part_number, part_name, description, origin_partnumber,
-                   mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
-            FROM inventory
-            WHERE CAST(part_number AS TEXT) LIKE ?
-                OR part_name LIKE ?
-                OR description LIKE ?
-                OR origin_partnumber LIKE ?
-                OR mcmaster_carr_partnumber LIKE ?
-                OR CAST(cost AS TEXT) LIKE ?
-                OR CAST(quantity AS TEXT) LIKE ?
-                OR CAST(min_on_hand AS TEXT) LIKE ?
-                OR location LIKE ?
-        '''
-        search_params = tuple('%' + search_term + '%' for _ in range(9))
-        cursor.execute(sql_query, search_params)
-        items = cursor.fetchall()
-        if items:
-            for item in items:
-                quantity = int(item[6])     
-                min_on_hand = int(item[7])  
-
-                if quantity == 0:
-                    tags = ('out_of_stock',)
-                elif quantity < min_on_hand:
-                    tags = ('below_min',)
-                else:
-                    tags = ()
-
-                self.list_tree.insert('', tk.END, values=item, tags=tags)
+                rows.append((line_number, validate_item_fields(*(row.get(column) for column in IMPORT_FIELDS))))
+            except ValueError as e:
+                summary['rejected'] += 1
+                if len(summary['errors']) < IMPORT_MAX_ERRORS:
+                    summary['errors'].append(f"Line {line_number}: {e}")
+
+        if upsert:
+            inserts, updates, warnings = split_upserts(cursor, rows, state)
+            summary['duplicates'] += len(warnings)
+            summary['warnings'].extend(warnings[:IMPORT_MAX_ERRORS - len(summary['warnings'])])
         else:
-            messagebox.showinfo("Info", "No items found matching the search criteria.")
-
-    def clear_search(self):
-        """Clear the search entry and refresh the list."""
-        self.search_entry.delete(0, tk.END)
-        self.populate_list_tree()
-
-    def populate_list_tree(self):
-        """Populate the Treeview with inventory items."""
-        for row in self.list_tree.get_children():
-            self.list_tree.delete(row)
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT part_number, part_name, description, origin_partnumber,
-                   mcmaster_carr_partnumber, cost, quantity, min_on_hand, location
-            FROM inventory
-        ''')
-        items = cursor.fetchall()
-        for item in items:
-            quantity = int(item[6])     
-            min_on_hand = int(item[7])  
-
-            if quantity == 0:
-                tags = ('out_of_stock',)
-            elif quantity < min_on_hand:
-                tags = ('below_min',)
-            else:
-                tags = ()
-
-            self.list_tree.insert('', tk.END, values=item, tags=tags)
-
-    def update_selected_item(self):
-        """Update the selected item from the list."""
-        selected_item = self.list_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select an item to update.")
+            inserts, updates = [fields for _, fields in rows], []
+        cursor.executemany(SQL_STATEMENTS['add_part'], inserts)
+        if update_quantity:
+            cursor.executemany(SQL_STATEMENTS['update_part'], updates)
+        else:
+            cursor.executemany(SQL_STATEMENTS['update_part_details'], [fields[:5] + fields[6:] for fields in updates])
+        conn.commit()
+        summary['inserted'] += len(inserts)
+        summary['updated'] += len(updates)
+
+        if progress is not None:
+            progress(bytes_read, total_bytes, summary)
+    return summary
+
+
+def export_csv(conn, path, progress=None, cancel_event=None):
+    """Stream the inventory table to a CSV file in part number order.
+
+    Rows are fetched and written EXPORT_BATCH_ROWS at a time, so memory stays
+    flat at any table size. The file is written under a temporary name and
+    only renamed into place once complete. progress(rows_written, total_rows)
+    is called after each batch; setting cancel_event abandons the export.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM inventory')
+    total_rows = cursor.fetchone()[0]
+
+    partial_path = path + '.part'
+    written = 0
+    cancelled = False
+    with open(partial_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        cursor.execute(f'SELECT {", ".join(CSV_COLUMNS)} FROM inventory ORDER BY part_number')
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            rows = cursor.fetchmany(EXPORT_BATCH_ROWS)
+            if not rows:
+                break
+            writer.writerows(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written, total_rows)
+    cursor.close()
+
+    if cancelled:
+        os.remove(partial_path)
+    else:
+        os.replace(partial_path, path)
+    return {'exported': written, 'cancelled': cancelled}
+
+
+def list_backups(backup_dir):
+    """Return the completed backup files in backup_dir, newest first."""
+    names = [name for name in os.listdir(backup_dir) if name.startswith('inventory-') and name.endswith('.db')]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def backup_database(conn, backup_dir, pages=BACKUP_PAGES_PER_STEP, step_sleep=BACKUP_STEP_SLEEP_S,
+                    keep=BACKUP_KEEP, min_age_s=None):
+    """Copy the database into backup_dir with the online backup API; return timing and size stats.
+
+    The copy reads through a connection of its own to conn's database file,
+    so a transaction open on conn is neither disturbed nor copied. A read
+    transaction is held on it for the whole copy, so every step reads the
+    same snapshot and other stations' writes neither restart the backup nor
+    wait for it (WAL readers never block writers). The copy is written under
+    a temporary name, checked with PRAGMA integrity_check, and only then
+    renamed into place; afterwards all but the newest keep backups are
+    deleted. Returns None without copying if min_age_s is given and the
+    newest backup is younger, or if a backup with the same millisecond
+    timestamp already exists.
+    """
+    existing = list_backups(backup_dir)
+    if min_age_s is not None and existing and time.time() - os.path.getmtime(existing[0]) < min_age_s:
+        return None
+
+    now = time.time()
+    name = time.strftime('inventory-%Y%m%d-%H%M%S', time.localtime(now)) + f'-{int(now * 1000) % 1000:03d}.db'
+    path = os.path.join(backup_dir, name)
+    partial_path = path + '.part'
+    if os.path.exists(path) or os.path.exists(partial_path):
+        return None
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        time.sleep(step_sleep)
+
+    started = time.perf_counter()
+    source = sqlite3.connect(conn.execute('PRAGMA database_list').fetchone()[2])
+    target = sqlite3.connect(partial_path)
+    try:
+        source.execute('BEGIN')
+        source.execute('SELECT 1 FROM sqlite_master LIMIT 1')  # Pin the snapshot before the first step
+        source.backup(target, pages=pages, progress=progress)
+        copied_s = time.perf_counter() - started
+        integrity = target.execute('PRAGMA integrity_check').fetchone()[0]
+    finally:
+        source.close()
+        target.close()
+    if integrity != 'ok':
+        os.remove(partial_path)
+        raise InventoryError(f"Backup failed its integrity check: {integrity}")
+    os.replace(partial_path, path)
+
+    for old_path in list_backups(backup_dir)[keep:]:
+        os.remove(old_path)
+
+    size = os.path.getsize(path)
+    elapsed = time.perf_counter() - started
+    return {
+        'path': path,
+        'bytes': size,
+        'steps': steps,
+        'copy_s': round(copied_s, 3),
+        'total_s': round(elapsed, 3),
+        'mb_per_s': round(size / 1048576 / copied_s, 1) if copied_s else None,
+    }
+
+
+def stock_tags(quantity, min_on_hand):
+    """Return the Treeview tags for a row based on its stock level."""
+    if quantity == 0:
+        return ('out_of_stock',)
+    if quantity < min_on_hand:
+        return ('below_min',)
+    return ()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; recording is a bisect and two additions."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 4),
+            'buckets': dict(zip([str(bound) for bound in LATENCY_BUCKETS_MS] + ['inf'], self.buckets)),
+        }
+
+
+class Metrics:
+    """Per-operation latency histograms and counters, safe to update from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.started_at = time.time()
+
+    def record(self, name, ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(ms)
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Return every histogram summary and counter as plain data."""
+        with self.lock:
+            return {
+                'uptime_s': round(time.time() - self.started_at, 1),
+                'operations': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started_at = time.time()
+
+
+def instrumented(name):
+    """Decorator that records how long an InventoryApp handler takes under the given name."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.metrics.record(name, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorate
+
+
+class SqlProfiler:
+    """Time the statements run on one connection using SQLite's trace and progress hooks.
+
+    Profiling is off until enabled, and then only one unit of work in
+    sample_every is traced: begin() installs or removes the hooks before
+    each one, so unsampled work pays nothing. The trace callback fires as
+    each statement starts, so a statement's time is measured up to the start
+    of the next one or to finish(), which the caller invokes when its unit of
+    work is done. Statements run by triggers and virtual tables are folded
+    into the statement that caused them. The progress handler counts virtual
+    machine steps, which makes full scans stand out even when they are fast.
+    Timings are kept per exact statement text; literal values are only
+    stripped, so statements group by shape, when they are folded together
+    for a report or once SQL_PROFILE_MAX_STATEMENTS texts have piled up.
+    """
+
+    LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    SPACE_PATTERN = re.compile(r'\s+')
+
+    def __init__(self, enabled=False, sample_every=SQL_PROFILE_SAMPLE_EVERY):
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self.lock = threading.Lock()
+        self.statements = {}  # Statement shape -> stats
+        self.raw_statements = {}  # Exact statement text -> stats, not yet folded into statements
+        self.current = None
+        self.current_started = 0.0
+        self.current_steps = 0
+        self.units = 0
+        self.hooked = None
+
+    def begin(self, conn):
+        """Hook conn if this unit of work is sampled, and unhook it otherwise."""
+        self.units += 1
+        sampled = self.enabled and self.units % max(self.sample_every, 1) == 0
+        if sampled and self.hooked is not conn:
+            conn.set_trace_callback(self.on_statement)
+            conn.set_progress_handler(self.on_progress, SQL_PROGRESS_STEPS)
+            self.hooked = conn
+        elif not sampled and self.hooked is not None:
+            self.hooked.set_trace_callback(None)
+            self.hooked.set_progress_handler(None, 0)
+            self.hooked = None
+
+    def on_statement(self, statement):
+        if statement.startswith('--') or statement == self.current:
+            # Trigger bodies and FTS5 internals run inside the current statement; count them there.
+            # Each trigger program that starts is reported again as the text of the statement that fired it
             return
-
-        item_values = self.list_tree.item(selected_item, 'values')
-        part_number = item_values[0]
-
-        self.open_update_window(part_number)
-
-    def open_update_window(self, part_number):
-        """Open a window to update the selected item."""
-        update_win = tk.Toplevel(self.root)
-        update_win.title(f"Update Item - Part Number {part_number}")
-
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT part_name, description, origin_partnumber, mcmaster_carr_partnumber,
-                   cost, quantity, min_on_hand, location
-            FROM inventory WHERE part_number = ?
-        ''', (part_number,))
-        item = cursor.fetchone()
-        if not item:
-            messagebox.showerror("Error", "Item not found.")
-            update_win.destroy()
+        now = time.perf_counter()
+        self.finish(now)
+        self.current = statement
+        self.current_started = now
+        self.current_steps = 0
+
+    def on_progress(self):
+        self.current_steps += SQL_PROGRESS_STEPS
+        return 0
+
+    def finish(self, now=None):
+        """Close the timing of the statement that is currently running, if any."""
+        if self.current is None:
             return
-
-        labels = [
-            'Part Name', 'Description', 'Origin Part Number', 'McMaster-Carr Part Number',
-            'Cost', 'Quantity', 'Min on Hand', 'Location'
-        ]
-        entries = {}
-
-        for idx, label_text in enumerate(labels):
-            label = tk.Label(update_win, text=label_text)
-            label.grid(row=idx, column=0, padx=5, pady=5, sticky='e')
-            entry = tk.Entry(update_win)
-            entry.grid(row=idx, column=1, padx=5, pady=5)
-            entry.insert(0, item[idx])
-            entries[label_text] = entry
-
-        def save_updates():
-            part_name = entries['Part Name'].get().strip()
-            description = entries['Description'].get().strip()
-            origin_partnumber = entries['Origin Part Number'].get().strip()
-            mcmaster_carr_partnumber = entries['McMaster-Carr Part Number'].get().strip()
-            cost = entries['Cost'].get().strip()
-            quantity = entries['Quantity'].get().strip()
-            min_on_hand = entries['Min on Hand'].get().strip()
-            location = entries['Location'].get().strip()
-
-            if not (part_name and quantity and min_on_hand):
-                messagebox.showerror("Error", "Please fill in all required fields (Part Name, Quantity, Min on Hand).")
-                return
-
+        ms = ((now or time.perf_counter()) - self.current_started) * 1000
+        with self.lock:
+            stats = self.raw_statements.get(self.current)
+            if stats is None:
+                if len(self.raw_statements) >= SQL_PROFILE_MAX_STATEMENTS:
+                    self.fold()
+                stats = self.raw_statements[self.current] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'vm_steps': 0}
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['vm_steps'] += self.current_steps
+            if ms > stats['max_ms']:
+                stats['max_ms'] = ms
+        self.current = None
+
+    def fold(self):
+        """Merge the per-text timings into per-shape ones. Call with the lock held."""
+        for text, raw in self.raw_statements.items():
+            shape = self.SPACE_PATTERN.sub(' ', self.LITERAL_PATTERN.sub('?', text)).strip()[:300]
+            stats = self.statements.get(shape)
+            if stats is None:
+                if len(self.statements) >= SQL_PROFILE_MAX_STATEMENTS:
+                    continue
+                stats = self.statements[shape] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'vm_steps': 0}
+            stats['count'] += raw['count']
+            stats['total_ms'] += raw['total_ms']
+            stats['vm_steps'] += raw['vm_steps']
+            stats['max_ms'] = max(stats['max_ms'], raw['max_ms'])
+        self.raw_statements.clear()
+
+    def snapshot(self):
+        """Return per-statement timing of the sampled work, slowest total first."""
+        with self.lock:
+            self.fold()
+            rows = [
+                {
+                    'sql': sql,
+                    'count': stats['count'],
+                    'total_ms': round(stats['total_ms'], 3),
+                    'mean_ms': round(stats['total_ms'] / stats['count'], 4),
+                    'max_ms': round(stats['max_ms'], 3),
+                    'vm_steps': stats['vm_steps'],
+                }
+                for sql, stats in self.statements.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.statements.clear()
+            self.raw_statements.clear()
+
+
+class DatabaseWorker(threading.Thread):
+    """Run database calls on a background thread that owns its own connection.
+
+    Tasks run one at a time in the order they were submitted, so scans are
+    applied in the order they were made. Each task is func(conn, *args); its
+    result (or exception) is handed back to the Tk thread, which drains the
+    result queue with process_results() from a root.after poll. connect opens
+    the thread's connection; a ServiceClient can stand in for a SQLite one.
+    """
+
+    def __init__(self, db_path, metrics=None, profiler=None, connect=None):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.connect = connect or connect_database
+        self.metrics = metrics
+        self.profiler = profiler
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.submitted_at = []  # Submission times of unfinished tasks, oldest first (Tk thread only)
+
+    def run(self):
+        conn = self.connect(self.db_path)
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                self.tasks.task_done()
+                break
+            func, args, callback, errback, queued_at = task
+            if self.profiler is not None:
+                self.profiler.begin(conn)
+            started = time.perf_counter()
             try:
-                cost = float(cost) if cost else 0.0
-                quantity = int(quantity)
-                min_on_hand = int(min_on_hand)
-            except ValueError:
-                messagebox.showerror("Error", "Quantity and Min on Hand must be integers and Cost must be a number.")
+                result = func(conn, *args)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                self.results.put((errback, e, True))
+            else:
+                self.results.put((callback, result, False))
+            finished = time.perf_counter()
+            if self.profiler is not None:
+                self.profiler.finish(finished)
+            if self.metrics is not None:
+                self.metrics.record('db.queue_wait', (started - queued_at) * 1000)
+                self.metrics.record('db.' + func.__name__, (finished - started) * 1000)
+            self.tasks.task_done()
+        conn.close()
+
+    def submit(self, func, *args, callback=None, errback=None):
+        """Queue func(conn, *args); callback(result) or errback(exception) runs on the Tk thread."""
+        queued_at = time.perf_counter()
+        self.submitted_at.append(queued_at)
+        self.tasks.put((func, args, callback, errback, queued_at))
+
+    def process_results(self):
+        """Deliver finished results to their callbacks. Call this from the Tk thread only."""
+        while True:
+            try:
+                handler, value, failed = self.results.get_nowait()
+            except queue.Empty:
                 return
-
-            cursor = self.conn.cursor()
+            self.submitted_at.pop(0)
+            if handler is not None:
+                handler(value)
+            elif failed:
+                traceback.print_exception(type(value), value, value.__traceback__)
+
+    def busy_for_ms(self):
+        """Return how long the oldest unfinished task has been waiting, in milliseconds."""
+        if not self.submitted_at:
+            return 0
+        return (time.perf_counter() - self.submitted_at[0]) * 1000
+
+    def drain(self):
+        """Wait for every queued task to finish and deliver its result. Call this from the Tk thread only."""
+        self.tasks.join()
+        self.process_results()
+
+    def stop(self):
+        """Finish every queued task, then close the connection and end the thread."""
+        self.tasks.put(None)
+        self.join()
+
+
+def write_scan(cursor, code, quantity, direction):
+    """Resolve a code and add (direction 1) or remove (direction -1) stock in the caller's transaction.
+
+    Returns {'part_number': ..., 'quantity': ...} with the new quantity, or
+    raises like scan_in_part and scan_out_part.
+    """
+    part_number = resolve_part_number(cursor.connection, code)
+    if direction < 0:
+        cursor.execute(SQL_STATEMENTS['set_movement_source'], ('scan_out', None))
+        cursor.execute(SQL_STATEMENTS['scan_out'], (quantity, part_number, quantity))
+        updated = cursor.rowcount == 1
+        cursor.execute(SQL_STATEMENTS['set_movement_source'], (None, None))
+    else:
+        cursor.execute(SQL_STATEMENTS['scan_in'], (quantity, part_number))
+        updated = cursor.rowcount == 1
+    cursor.execute(SQL_STATEMENTS['part_quantity'], (part_number,))
+    result = cursor.fetchone()
+    if result is None:
+        raise PartNotFoundError(part_number)
+    if not updated:
+        raise InsufficientStockError(part_number, result[0])
+    return {'part_number': part_number, 'quantity': result[0]}
+
+
+def write_pick_list(cursor, lines):
+    """Resolve a list of (code, quantity) lines and remove them all in the caller's transaction.
+
+    Returns the updated rows of the picked parts in List Items column order.
+    """
+    merged = merge_pick_lines((resolve_part_number(cursor.connection, code), quantity) for code, quantity in lines)
+    take_pick_lines(cursor, merged)
+    return fetch_parts(cursor, list(merged))
+
+
+def apply_service_writes(conn, writes):
+    """Apply a batch of queued service writes as one group commit.
+
+    writes holds (func, args) pairs, each run as func(cursor, *args) inside
+    its own savepoint, so a refused scan or pick list, or one that hit an
+    SQLite error such as a constraint, is undone on its own while the rest of
+    the batch still commits. Only an error that ends the whole transaction
+    fails the batch. Returns one (result, error) pair per write, in order.
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    results = []
+    try:
+        for func, args in writes:
+            cursor.execute('SAVEPOINT service_write')
             try:
-                cursor.execute('''
-                    UPDATE inventory
-                    SET part_name = ?, description = ?, origin_partnumber = ?, mcmaster_carr_partnumber = ?,
-                        cost = ?, quantity = ?, min_on_hand = ?, location = ?
-                    WHERE part_number = ?
-                ''', (
-                    part_name, description, origin_partnumber, mcmaster_carr_partnumber,
-                    cost, quantity, min_on_hand, location, part_number
-                ))
-                self.conn.commit()
-                messagebox.showinfo("Success", "Item updated successfully.")
-                update_win.destroy()
-                self.populate_list_tree()
-                self.populate_check_tree()
-            except sqlite3.IntegrityError:
-                messagebox.showerror("Error", "Failed to update item due to database integrity error.")
-
-        save_button = tk.Button(update_win, text="Save Updates", command=save_updates)
-        save_button.grid(row=len(labels), column=0, columnspan=2, pady=10)
-
-    def remove_selected_item(self):
-        """Remove the selected item from the list."""
-        selected_item = self.list_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select an item to remove.")
+                results.append((func(cursor, *args), None))
+            except (InventoryError, sqlite3.Error) as e:
+                cursor.execute('ROLLBACK TO service_write')  # Raises if the error already ended the transaction
+                results.append((None, e))
+            cursor.execute('RELEASE service_write')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return results
+
+
+def row_dict(row):
+    """Return a List Items row as a dict keyed by column name, for a JSON reply."""
+    return dict(zip(LIST_COLUMN_NAMES, row))
+
+
+LOCAL_SCAN_OPS = {
+    'scan_out': scan_out_barcode,
+    'scan_in': scan_in_barcode,
+    'pick_line': fetch_pick_line,
+    'check': check_barcode,
+    'scan_in_batch': scan_in_batch,
+    'pick_list': check_out_pick_list,
+}  # Scan functions run on the station's own database worker
+
+
+def iter_inventory(conn, sort_column='part_number', descending=False, filters=None, page_rows=EXPORT_BATCH_ROWS):
+    """Yield pages of inventory rows in List Items column order, walking the whole table by keyset.
+
+    Memory stays at one page however large the catalog is, and each page is
+    a range read on the sort column's index.
+    """
+    key = None
+    while True:
+        rows = fetch_list_page(conn, key, page_rows, sort_column, descending, filters)
+        if not rows:
             return
-
-        item_values = self.list_tree.item(selected_item, 'values')
-        part_number = item_values[0]
-
-        confirm = messagebox.askyesno("Confirm", f"Are you sure you want to remove item with Part Number '{part_number}'?")
-        if confirm:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM inventory WHERE part_number = ?', (part_number,))
-            self.conn.commit()
-            messagebox.showinfo("Success", "Item removed successfully.")
-            self.populate_list_tree()
-            self.populate_check_tree()
-
-    def populate_check_tree(self):
-        """Populate the Treeview with items below minimum on-hand levels."""
-        for row in self.check_tree.get_children():
-            self.check_tree.delete(row)
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT part_number, part_name, quantity, min_on_hand, origin_partnumber,
-                   mcmaster_carr_partnumber, cost, location
-            FROM inventory WHERE quantity < min_on_hand
-        ''')
-        items = cursor.fetchall()
-        if items:
-            for item in items:
-                quantity = int(item[2])
-                if quantity == 0:
-                    tags = ('out_of_stock',)
-                else:
-                    tags = ()
-                self.check_tree.insert('', tk.END, values=item, tags=tags)
+        yield rows
+        if len(rows) < page_rows:
+            return
+        key = list_sort_key(rows[-1], sort_column)
+
+
+def spool_low_stock_email(rows, spool_dir, to_address, from_address):
+    """Write a low-stock report into spool_dir as an email message file, for a local mailer to send.
+
+    The message lists the short parts in its body and attaches them as CSV.
+    It is written under a temporary name and renamed into place, so a mailer
+    watching the spool never picks up half a message. Returns the file's path.
+    """
+    import email.message
+    import email.utils
+    import io
+
+    attachment = io.StringIO()
+    writer = csv.writer(attachment)
+    writer.writerow(LOW_STOCK_COLUMN_NAMES)
+    writer.writerows(rows)
+
+    message = email.message.EmailMessage()
+    message['Subject'] = f"Low stock: {len(rows)} part(s) below minimum"
+    message['From'] = from_address
+    message['To'] = to_address
+    message['Date'] = email.utils.formatdate(localtime=True)
+    message['Message-ID'] = email.utils.make_msgid()
+    message.set_content('\n'.join(
+        [f"{len(rows)} part(s) are below their minimum on-hand level:", ""]
+        + [f"  {row[0]:>8}  {row[1]}  (on hand {row[2]}, minimum {row[3]}, {row[7] or 'no location'})" for row in rows]
+    ) + '\n')
+    message.add_attachment(attachment.getvalue().encode('utf-8'), maintype='text', subtype='csv', filename='low_stock.csv')
+
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f"low-stock-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.eml")
+    with open(path + '.tmp', 'wb') as f:
+        f.write(message.as_bytes())
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def write_rows(out, columns, pages, output_format):
+    """Stream pages of rows to out as CSV (with a header) or as JSON lines; return the row count."""
+    written = 0
+    writer = None
+    if output_format == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(columns)
+    for rows in pages:
+        if writer is not None:
+            writer.writerows(rows)
         else:
-            messagebox.showinfo("Info", "All items meet minimum on-hand levels.")
+            out.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+        out.flush()
+        written += len(rows)
+    return written
+
+
+def open_cli_database(path):
+    """Open the database named on the command line, refusing to create one that does not exist yet."""
+    if path is not None and not os.path.exists(path):
+        raise InventoryError(f"Database not found: {path}")
+    conn = connect_database(path or get_db_path())
+    create_schema(conn)
+    return conn
+
+
+def run_cli_command(args):
+    """Run one scripted subcommand; return the exit status."""
+    db_path = args.db or get_db_path()
+    if args.command == 'serve':
+        from inventory_service import run_service  # asyncio is only imported by the service
+        run_service(db_path, args.host, args.port, args.readers)
+        return 0
+
+    conn = open_cli_database(args.db)
+    try:
+        if args.command == 'report':
+            filters = {
+                name: value for name, value in (
+                    ('location', args.location), ('cost_min', args.cost_min), ('cost_max', args.cost_max),
+                    ('quantity_min', args.quantity_min), ('quantity_max', args.quantity_max),
+                ) if value is not None
+            }
+            write_rows(sys.stdout, LIST_COLUMN_NAMES, iter_inventory(conn, args.sort, args.descending, filters), args.format)
+        elif args.command == 'low-stock':
+            pages = iter_low_stock(conn, args.sort, args.descending)
+            if args.spool:
+                rows = [row for page in pages for row in page]
+                if rows or args.always:
+                    print(spool_low_stock_email(rows, args.spool, args.to, args.sender))
+            else:
+                write_rows(sys.stdout, LOW_STOCK_COLUMN_NAMES, pages, args.format)
+        elif args.command == 'locations':
+            columns = ('location', 'item_count', 'total_value', 'low_stock_count', 'out_of_stock_count')
+            write_rows(sys.stdout, columns, [fetch_location_summary(conn)], args.format)
+        elif args.command == 'check-locations':
+            mismatches = check_location_summary(conn, repair=args.repair)
+            for location, kept, fresh in mismatches:
+                print(json.dumps({'location': location, 'maintained': kept, 'rebuilt': fresh}))
+            print(json.dumps({'mismatches': len(mismatches), 'repaired': bool(args.repair and mismatches)}))
+            return 1 if mismatches and not args.repair else 0
+        elif args.command == 'search':
+            fts_enabled = create_schema(conn)  # The schema is current by now, so this only checks for the FTS table
+            write_rows(sys.stdout, LIST_COLUMN_NAMES, [search_inventory(conn, args.term, fts_enabled, args.limit)], args.format)
+        elif args.command == 'import':
+            def progress(bytes_read, total_bytes, summary):
+                print(f"Imported {bytes_read * 100 // max(total_bytes, 1)}%", file=sys.stderr)
+            summary = import_csv(conn, args.path, upsert=not args.insert_only,
+                                 progress=progress if sys.stderr.isatty() else None,
+                                 update_quantity=args.update_quantity)
+            print(json.dumps(summary))
+            return 1 if summary['rejected'] else 0
+        elif args.command == 'export':
+            print(json.dumps(export_csv(conn, args.path)))
+        elif args.command == 'backup':
+            backup_dir = args.dir or os.path.join(os.path.dirname(db_path), 'backups')
+            os.makedirs(backup_dir, exist_ok=True)
+            print(json.dumps(backup_database(conn, backup_dir, keep=args.keep)))
+        elif args.command == 'sync':
+            settings_path = os.path.join(os.path.dirname(db_path), 'settings.json')
+            settings = load_settings(settings_path)
+            sync_dir = args.dir or settings.get('sync_dir')
+            if not sync_dir:
+                raise InventoryError("No sync folder; pass --dir or choose one on the station's Diagnostics tab.")
+            if not settings.get('station_id'):
+                get_station_id(settings)
+                save_settings(settings, settings_path)
+            print(json.dumps(sync_with_central(conn, settings['station_id'], sync_dir)))
+    finally:
+        conn.close()
+    return 0
+
+
+def build_parser():
+    """Return the command-line parser; with no subcommand the Tk station starts."""
+    parser = argparse.ArgumentParser(
+        prog='inventory.py', description="Inventory control system. Run without a subcommand to start the station."
+    )
+    parser.add_argument('--service', metavar='URL', help="station only: send scans through an inventory service serving this station's database")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument('--db', help="database file (the station's database by default)")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--format', choices=('csv', 'jsonl'), default='csv', help="output format (default csv)")
+    sort = argparse.ArgumentParser(add_help=False)
+    sort.add_argument('--sort', choices=LIST_COLUMN_NAMES, default='part_number', help="column to sort by")
+    sort.add_argument('--descending', action='store_true', help="sort in descending order")
+
+    serve = commands.add_parser('serve', parents=[database], help="run the headless HTTP service")
+    serve.add_argument('--host', default=SERVICE_HOST, help="address to listen on")
+    serve.add_argument('--port', type=int, default=SERVICE_PORT, help="port to listen on")
+    serve.add_argument('--readers', type=int, default=SERVICE_READERS, help="read connections in the pool")
+
+    report = commands.add_parser('report', parents=[database, output, sort], help="stream every part")
+    report.add_argument('--location', help="only locations starting with this")
+    report.add_argument('--cost-min', type=float, help="only parts costing at least this")
+    report.add_argument('--cost-max', type=float, help="only parts costing at most this")
+    report.add_argument('--quantity-min', type=int, help="only parts with at least this many on hand")
+    report.add_argument('--quantity-max', type=int, help="only parts with at most this many on hand")
+
+    low_stock = commands.add_parser('low-stock', parents=[database, output], help="list parts below their minimum")
+    low_stock.add_argument('--sort', choices=LOW_STOCK_COLUMN_NAMES, default='part_number', help="column to sort by")
+    low_stock.add_argument('--descending', action='store_true', help="sort in descending order")
+    low_stock.add_argument('--spool', metavar='DIR', help="write the report as an email message into this spool folder")
+    low_stock.add_argument('--to', default='inventory', help="recipient of the spooled email")
+    low_stock.add_argument('--from', dest='sender', default='inventory', help="sender of the spooled email")
+    low_stock.add_argument('--always', action='store_true', help="spool an email even when nothing is short")
+
+    commands.add_parser('locations', parents=[database, output], help="per-location stock value and counts")
+    check = commands.add_parser('check-locations', parents=[database],
+                                help="rebuild the location summary and diff it against the maintained copy")
+    check.add_argument('--repair', action='store_true', help="replace the summary with the rebuilt one if they differ")
+
+    search = commands.add_parser('search', parents=[database, output], help="search parts")
+    search.add_argument('term')
+    search.add_argument('--limit', type=int, default=SEARCH_RESULT_LIMIT, help="most rows to return")
+
+    import_parser = commands.add_parser('import', parents=[database],
+                                        help="import parts from a CSV file (exit status 1 if any row was rejected)")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--insert-only', action='store_true', help="always add rows instead of updating matches")
+    import_parser.add_argument('--update-quantity', action='store_true',
+                               help="also replace the quantity on hand of updated parts")
+    export = commands.add_parser('export', parents=[database], help="export every part to a CSV file")
+    export.add_argument('path')
+
+    backup = commands.add_parser('backup', parents=[database], help="back up the database now")
+    backup.add_argument('--dir', help="backup folder (next to the database by default)")
+    backup.add_argument('--keep', type=int, default=BACKUP_KEEP, help="newest backups to keep")
+    sync = commands.add_parser('sync', parents=[database], help="exchange changes with the central sync folder")
+    sync.add_argument('--dir', help="sync folder (the station's saved one by default)")
+    return parser
+
+
+def main(argv=None):
+    """Run a subcommand, or start the Tk station when none is given."""
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        from inventory_gui import run_gui  # tkinter is only imported by the station
+        run_gui(args.service)
+        return 0
+
+    try:
+        return run_cli_command(args)
+    except BrokenPipeError:
+        # The reader (head, grep -m) stopped early; do not complain when stdout is flushed at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (InventoryError, OSError, ValueError, sqlite3.Error) as e:
+        print(f"inventory.py {args.command}: {e}", file=sys.stderr)
+        return 1
+
 
 if __name__ == '__main__':
-    root = tk.Tk()
-    app = InventoryApp(root)
-    root.mainloop()
+    # Share this module with inventory_gui and inventory_service instead of importing it a second time
+    sys.modules.setdefault('inventory', sys.modules[__name__])
+    sys.exit(main())
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('icon.ico', '.')],
-    hiddenimports=[],
+    hiddenimports=['inventory_gui', 'inventory_service'],  # Imported lazily by inventory.main()
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
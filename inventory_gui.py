@@ -0,0 +1,1894 @@
+"""Full-screen Tk station for the inventory control system.
+
+Every database operation the station performs lives in the GUI-free inventory
+module; this one adds the widgets. It is imported only when the station is
+started, so scripted and cron use of inventory.py never loads tkinter.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+from tkinter import filedialog
+import tkinter.font as tkfont  # Import tkinter.font for custom fonts
+
+from inventory import (
+    ANALYTICS_WINDOW_DAYS, BACKUP_FIRST_DELAY_MS, BACKUP_INTERVAL_MS, BARCODE_MAP_MAX_PARTS, BURST_FLUSH_MS,
+    BURST_FLUSH_SCANS, BUSY_INDICATOR_DELAY_MS, DB_POLL_MS, LEDGER_FIRST_DELAY_MS, LEDGER_MAINTENANCE_MS,
+    LIST_COLUMN_NAMES, LIST_FILTER_CLAUSES, LIST_MAX_ROWS, LIST_PAGE_SIZE, LOCAL_SCAN_OPS, LOW_STOCK_PAGE_SIZE,
+    PART_CACHE_SIZE, PROCESS_STARTED, REFRESH_COALESCE_MS, REFRESH_MAX_PARTS, REFRESH_POLL_MS, REORDER_LEAD_TIME_DAYS,
+    REVIEW_MAX_ROWS, SEARCH_DEBOUNCE_MS, SYNC_INTERVAL_MS,
+    BarcodeMap, DatabaseWorker, InventoryError, Metrics, PartCache, PickListShortageError, SqlProfiler,
+    add_part, apply_min_on_hand, backup_database, check_location_summary, connect_database, create_schema,
+    delete_part, export_csv, fetch_list_page, fetch_list_page_before, fetch_location_summary, fetch_low_stock,
+    fetch_low_stock_crossings, fetch_low_stock_part_numbers, fetch_part, fetch_part_names, fetch_parts_by_number, get_backup_dir,
+    get_db_path, get_station_id, import_csv, import_numpy, instrumented, ledger_stats, list_sort_key,
+    load_settings, low_stock_sort_key, maintain_stock_ledger, merge_pick_lines, poll_inventory_changes,
+    reset_autoincrement_sequence,
+    save_settings, search_inventory, stock_tags, suggest_min_on_hand, sync_with_central, update_part,
+    validate_item_fields,
+)
+
+
+class InventoryApp:
+    def __init__(self, root, service_url=None):
+        init_started = time.perf_counter()
+        self.root = root
+        self.root.title("Inventory Control System")
+        self.root.attributes('-fullscreen', True)  # Set the window to full-screen
+
+        icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icon.ico')
+        if os.path.exists(icon_path):
+            self.root.iconbitmap(icon_path)  # Set the window icon
+        else:
+            print(f"Icon not found at {icon_path}. Make sure the icon file is available.")
+
+        # Bind the Escape key to exit full-screen mode
+        self.root.bind("<Escape>", self.exit_fullscreen)
+        # Closing from the window manager goes through the same path so queued scans are saved
+        self.root.protocol("WM_DELETE_WINDOW", self.close_application)
+
+        # Parts currently below minimum, and callbacks told when a part crosses in or out
+        self.low_stock_parts = set()
+        self.low_stock_listeners = []
+
+        # Scan-ins waiting for the next group commit while burst mode is on
+        self.burst_queue = []
+        self.burst_after_id = None
+
+        # Bumped whenever the List Items view is reset so stale page or search results are ignored
+        self.list_generation = 0
+        # Likewise for the Check Inventory Levels view, which loads its short parts a page at a time
+        self.check_generation = 0
+        self.check_last_key = None
+        self.check_has_more = False
+        self.check_page_pending = False
+        # Paging key of each loaded Check row, so a part that becomes short can be placed in sort order
+        self.check_keys = {}
+
+        # Callbacks posted by background jobs, run on the Tk thread by poll_db_results
+        self.ui_calls = queue.Queue()
+
+        # Sort order and filters chosen on the List Items and Check tabs, restored from the last session
+        self.settings = load_settings()
+        self.list_sort = self.saved_sort('list_sort')
+        self.check_sort = self.saved_sort('check_sort')
+        saved_filters = self.settings.get('list_filters')
+        self.list_filters = {
+            name: value for name, value in (saved_filters if isinstance(saved_filters, dict) else {}).items()
+            if name == 'location' or name in LIST_FILTER_CLAUSES
+        }
+        # Paging key of each loaded List Items row, so the view can be trimmed and paged from either end
+        self.list_keys = {}
+
+        # Tabs are built the first time they are shown; until then their trees do not exist
+        self.list_tree = None
+        self.check_tree = None
+        self.initialized_tabs = set()
+
+        # Parts changed since each built view was last brought up to date, or None when it needs a reload.
+        # Changes are collected for REFRESH_COALESCE_MS and only the visible tab is updated; hidden ones catch up when shown
+        self.pending_changes = {}
+        # Parts to check for low-stock crossings (None for all), whatever tab is showing
+        self.pending_low_stock = set()
+        self.dashboard_stale = False
+        self.refresh_after_id = None
+        # Position in the inventory_changes log and the data_version seen by the last poll
+        self.change_cursor = None
+        self.data_version = None
+        self.change_poll_pending = False
+
+        conn = self.create_connection()
+        self.fts_enabled = create_schema(conn)
+        reset_autoincrement_sequence(conn)  # Reset the AUTOINCREMENT sequence if necessary
+        conn.close()
+
+        # Every query after setup runs on the worker so the Tk main loop never waits on SQLite
+        self.metrics = Metrics()
+        self.sql_profiler = SqlProfiler()
+        self.db_worker = DatabaseWorker(get_db_path(), self.metrics, self.sql_profiler)
+        self.db_worker.start()
+        # Only ever touched from the worker thread, which owns the connection it is valid for
+        self.part_cache = PartCache(PART_CACHE_SIZE)
+        self.barcode_map = BarcodeMap(BARCODE_MAP_MAX_PARTS)
+
+        # With a service URL, scans go through the inventory service's single writer instead of straight to SQLite.
+        # Everything else still uses this station's database, so the service must be serving that same file
+        self.service_url = service_url or self.settings.get('service_url')
+        if self.service_url:
+            # Only client stations need the service module
+            from inventory_service import REMOTE_SCAN_OPS, ServiceClient, check_service_database
+            client = ServiceClient(self.service_url)
+            try:
+                check_service_database(client, get_db_path())
+            except InventoryError as error:
+                messagebox.showerror("Error", f"{error}\n\nScans will be written to this station's database directly.")
+                self.service_url = None
+            finally:
+                client.close()
+        if self.service_url:
+            self.scan_worker = DatabaseWorker(self.service_url, self.metrics, connect=ServiceClient)
+            self.scan_worker.start()
+            self.scan_ops = REMOTE_SCAN_OPS
+        else:
+            self.scan_worker = self.db_worker
+            self.scan_ops = LOCAL_SCAN_OPS
+
+        self.create_widgets()
+        self.poll_db_results()
+        self.poll_changes()
+
+        # Load which parts are already short so low-stock events only fire on real crossings
+        self.db_worker.submit(fetch_low_stock_part_numbers, callback=self.set_initial_low_stock)
+        self.last_ledger_stats = None
+        self.root.after(LEDGER_FIRST_DELAY_MS, self.schedule_ledger_maintenance)
+        self.last_backup = None
+        self.root.after(BACKUP_FIRST_DELAY_MS, self.schedule_backup)
+
+        # Stations keep their own database and swap quantity deltas through a shared sync folder
+        if not self.settings.get('station_id'):
+            get_station_id(self.settings)
+            self.save_view_settings()
+        self.last_sync = None
+        self.sync_running = False
+        self.schedule_sync()
+
+        self.metrics.record('startup.init', (time.perf_counter() - init_started) * 1000)
+        self.root.after_idle(self.on_startup_complete)
+
+    def on_startup_complete(self):
+        """Record how long the station took to become ready to scan."""
+        self.metrics.record('startup.ready_to_scan', (time.perf_counter() - PROCESS_STARTED) * 1000)
+
+    def saved_sort(self, name):
+        """Return a saved (column, descending) sort, falling back to part number order."""
+        saved = self.settings.get(name)
+        if isinstance(saved, dict) and saved.get('column') in LIST_COLUMN_NAMES:
+            return saved['column'], bool(saved.get('descending'))
+        return 'part_number', False
+
+    def save_view_settings(self):
+        """Remember the current sort orders and filters for the next session."""
+        self.settings['list_sort'] = {'column': self.list_sort[0], 'descending': self.list_sort[1]}
+        self.settings['check_sort'] = {'column': self.check_sort[0], 'descending': self.check_sort[1]}
+        self.settings['list_filters'] = self.list_filters
+        try:
+            save_settings(self.settings)
+        except OSError as e:
+            print(f"Could not save settings: {e}")
+
+    def set_initial_low_stock(self, part_numbers):
+        """Seed the low-stock set; the worker runs this before any crossing check queued after it."""
+        self.low_stock_parts = part_numbers
+
+    def schedule_ledger_maintenance(self):
+        """Take the periodic stock snapshot when due, then check again later.
+
+        Maintenance holds the write lock while it snapshots and compacts, so it
+        runs on its own connection instead of queueing scans behind it.
+        """
+        self.run_background_job(maintain_stock_ledger, on_error=lambda error: print(f"Ledger maintenance failed: {error}"))
+        self.root.after(LEDGER_MAINTENANCE_MS, self.schedule_ledger_maintenance)
+
+    def schedule_backup(self):
+        """Back up the database if the newest backup is older than the interval, then check again later."""
+        self.start_backup(min_age_s=BACKUP_INTERVAL_MS / 1000)
+        self.root.after(BACKUP_INTERVAL_MS, self.schedule_backup)
+
+    def start_backup(self, min_age_s=None, on_done=None):
+        """Run an online backup on its own thread and connection and record how it went."""
+        def done(result):
+            if result is not None:
+                self.last_backup = result
+                self.metrics.record('backup.duration', result['total_s'] * 1000)
+                self.metrics.increment('backup.completed')
+                self.metrics.increment('backup.bytes', result['bytes'])
+            if on_done is not None:
+                on_done(result)
+
+        def failed(error):
+            self.metrics.increment('backup.failed')
+            print(f"Backup failed: {error}")
+            if on_done is not None:
+                messagebox.showerror("Error", f"Backup failed: {error}")
+
+        self.run_background_job(backup_database, get_backup_dir(), min_age_s=min_age_s, on_done=done, on_error=failed)
+
+    def backup_now(self):
+        """Back up the database immediately from the Diagnostics tab."""
+        def done(result):
+            messagebox.showinfo(
+                "Backup",
+                f"Backed up {result['bytes'] / 1048576:.1f} MB in {result['total_s']} s "
+                f"({result['mb_per_s']} MB/s) to {result['path']}."
+            )
+            self.refresh_diagnostics()
+
+        self.start_backup(on_done=done)
+
+    def schedule_sync(self):
+        """Sync with the central folder if one is set, then check again later."""
+        if self.settings.get('sync_dir'):
+            self.start_sync()
+        self.root.after(SYNC_INTERVAL_MS, self.schedule_sync)
+
+    def start_sync(self, on_done=None):
+        """Exchange change logs with the central folder on a background thread; scans stay local."""
+        sync_dir = self.settings.get('sync_dir')
+        if self.sync_running or not sync_dir:
+            return
+        self.sync_running = True
+
+        def done(result):
+            self.sync_running = False
+            self.last_sync = dict(result, finished_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+            self.metrics.record('sync.duration', result['duration_ms'])
+            self.metrics.increment('sync.sent_movements', result['sent_movements'])
+            self.metrics.increment('sync.received_movements', result['received_movements'])
+            if result['received_movements']:
+                self.reload_views()
+            if on_done is not None:
+                on_done(result)
+
+        def failed(error):
+            # An unreachable share is expected now and then; changes wait locally for the next round
+            self.sync_running = False
+            self.metrics.increment('sync.failed')
+            self.last_sync = {'error': str(error), 'finished_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+            if on_done is not None:
+                messagebox.showerror("Error", f"Sync failed: {error}")
+
+        self.run_background_job(
+            sync_with_central, get_station_id(self.settings), sync_dir, on_done=done, on_error=failed
+        )
+
+    def choose_sync_folder(self):
+        """Pick the central folder that stations exchange change logs through."""
+        sync_dir = filedialog.askdirectory(title="Choose Sync Folder", initialdir=self.settings.get('sync_dir'))
+        if not sync_dir:
+            return
+        self.settings['sync_dir'] = sync_dir
+        self.save_view_settings()
+        self.sync_now()
+
+    def sync_now(self):
+        """Sync immediately from the Diagnostics tab."""
+        if not self.settings.get('sync_dir'):
+            messagebox.showwarning("Warning", "Choose a sync folder first.")
+            return
+
+        def done(result):
+            messagebox.showinfo(
+                "Sync",
+                f"Sent {result['sent_movements']} change(s) and applied {result['received_movements']} "
+                f"from other stations in {result['duration_ms']} ms."
+            )
+            self.refresh_diagnostics()
+
+        self.start_sync(on_done=done)
+
+    def exit_fullscreen(self, event=None):
+        """Exit full-screen mode."""
+        self.root.attributes('-fullscreen', False)
+
+    def close_application(self):
+        """Save any queued scans and close, unless the user keeps the window open after a failed save."""
+        self.flush_burst_queue()
+        # Run the final flush's callback now; once the workers stop, a failure would go unreported
+        self.scan_worker.drain()
+        if self.burst_queue and not messagebox.askyesno(
+            "Unsaved Scans",
+            f"{len(self.burst_queue)} burst-mode scan(s) could not be saved.\n\n"
+            "Close anyway and lose them? Choose No to keep the window open; saving will be retried.",
+            icon='warning'
+        ):
+            return
+        if self.scan_worker is not self.db_worker:
+            self.scan_worker.stop()  # Waits for queued scans to reach the service
+        self.db_worker.stop()  # Waits for queued scans to be written
+        self.root.quit()
+
+    def poll_db_results(self):
+        """Hand finished database work to its callbacks and keep the busy indicator current."""
+        try:
+            self.db_worker.process_results()
+            if self.scan_worker is not self.db_worker:
+                self.scan_worker.process_results()
+            while True:
+                try:
+                    callback, args = self.ui_calls.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+        finally:
+            if max(self.db_worker.busy_for_ms(), self.scan_worker.busy_for_ms()) >= BUSY_INDICATOR_DELAY_MS:
+                self.busy_label.config(text="Working...")
+            else:
+                self.busy_label.config(text="")
+            self.root.after(DB_POLL_MS, self.poll_db_results)
+
+    def post_to_ui(self, callback, *args):
+        """Schedule callback(*args) on the Tk thread; safe to call from any thread."""
+        self.ui_calls.put((callback, args))
+
+    def run_background_job(self, func, *args, on_done=None, on_error=None, **kwargs):
+        """Run a long job such as an import on its own thread and connection.
+
+        Long jobs do not go through the database worker so scans queued behind
+        them are never held up; WAL lets both connections work side by side.
+        """
+        def run():
+            conn = connect_database(get_db_path())
+            try:
+                result = func(conn, *args, **kwargs)
+            except Exception as e:
+                if on_error is not None:
+                    self.post_to_ui(on_error, e)
+            else:
+                if on_done is not None:
+                    self.post_to_ui(on_done, result)
+            finally:
+                conn.close()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def reload_views(self):
+        """Reload the Treeviews after a bulk change touched too many parts to update one by one."""
+        self.note_changes(None)
+
+    def poll_changes(self):
+        """Check on the worker whether another connection changed the inventory, then check again later."""
+        if not self.change_poll_pending:
+            self.change_poll_pending = True
+            self.db_worker.submit(
+                poll_inventory_changes, self.change_cursor, self.data_version,
+                callback=self.on_changes_polled, errback=self.on_change_poll_failed
+            )
+        self.root.after(REFRESH_POLL_MS, self.poll_changes)
+
+    def on_changes_polled(self, result):
+        """Queue the parts another station, import or sync changed since the last poll."""
+        self.change_poll_pending = False
+        self.data_version, self.change_cursor, part_numbers = result
+        if part_numbers is None:
+            self.note_changes(None)
+        elif part_numbers:
+            self.note_changes(part_numbers)
+
+    def on_change_poll_failed(self, error):
+        self.change_poll_pending = False
+        print(f"Change poll failed: {error}")
+
+    def note_changes(self, part_numbers):
+        """Queue changed parts (None for everything) for the next coalesced refresh and low-stock check."""
+        if part_numbers is None or self.pending_low_stock is None:
+            self.pending_low_stock = None
+        else:
+            self.pending_low_stock.update(part_numbers)
+            if len(self.pending_low_stock) > REFRESH_MAX_PARTS:
+                self.pending_low_stock = None
+        for view, tree in (('list', self.list_tree), ('check', self.check_tree)):
+            if tree is None:
+                continue  # Not opened yet; it loads fresh rows when it is
+            pending = self.pending_changes.get(view, set())
+            if part_numbers is None or pending is None:
+                self.pending_changes[view] = None
+            else:
+                pending.update(part_numbers)
+                self.pending_changes[view] = pending if len(pending) <= REFRESH_MAX_PARTS else None
+        self.dashboard_stale = True
+        if self.refresh_after_id is None:
+            self.refresh_after_id = self.root.after(REFRESH_COALESCE_MS, self.apply_pending_changes)
+
+    def apply_pending_changes(self):
+        """Check the noted parts for low-stock crossings and bring the visible tab up to date."""
+        self.refresh_after_id = None
+        self.check_low_stock_crossings()
+        tab = self.notebook.select()
+        if tab == str(self.list_frame):
+            self.flush_view('list')
+        elif tab == str(self.check_frame):
+            self.flush_view('check')
+        elif tab == str(self.dashboard_frame) and self.dashboard_stale:
+            self.refresh_dashboard()
+
+    def check_low_stock_crossings(self):
+        """Raise low-stock events for the noted parts, whether or not the Check tab is built or showing."""
+        part_numbers = self.pending_low_stock
+        self.pending_low_stock = set()
+        if part_numbers is not None and not part_numbers:
+            return
+        self.db_worker.submit(
+            fetch_low_stock_crossings, frozenset(self.low_stock_parts), part_numbers,
+            callback=self.apply_low_stock_crossings, errback=lambda error: print(f"Low-stock check failed: {error}")
+        )
+
+    def apply_low_stock_crossings(self, crossings):
+        """Update the low-stock set from the crossings found on the worker, notifying subscribers."""
+        for part_number, item in crossings:
+            if item is None:
+                self.low_stock_parts.discard(part_number)  # Removed parts leave quietly
+            else:
+                self.set_low_stock_state(part_number, int(item[6]) < int(item[7]), item)
+
+    def flush_view(self, view):
+        """Apply a view's pending changes with one read of the changed parts, or reload it if too many changed."""
+        if view not in self.pending_changes:
+            return
+        part_numbers = self.pending_changes.pop(view)
+        if part_numbers is None:
+            if view == 'list':
+                self.populate_list_tree()
+            else:
+                self.populate_check_tree()
+            return
+        part_numbers = sorted(part_numbers)
+        self.db_worker.submit(
+            fetch_parts_by_number, part_numbers,
+            callback=lambda rows: self.apply_changed_rows(view, part_numbers, rows)
+        )
+
+    def open_progress_window(self, title, cancel_event):
+        """Open a small window with a progress bar and a Cancel button that sets cancel_event."""
+        win = tk.Toplevel(self.root)
+        win.title(title)
+
+        status = tk.Label(win, text="Starting...", font=('Arial', 12))
+        status.pack(padx=10, pady=10)
+        bar = ttk.Progressbar(win, length=400, maximum=100, mode='determinate')
+        bar.pack(padx=10, pady=5)
+
+        def cancel():
+            cancel_event.set()
+            status.config(text="Cancelling...")
+
+        cancel_button = tk.Button(win, text="Cancel", command=cancel)
+        cancel_button.pack(pady=10)
+        win.protocol("WM_DELETE_WINDOW", cancel)
+        return win, bar, status
+
+    def import_csv_file(self):
+        """Import parts from a CSV file in the background with progress and cancel."""
+        path = filedialog.askopenfilename(title="Import CSV", filetypes=[('CSV files', '*.csv'), ('All files', '*.*')])
+        if not path:
+            return
+        upsert = messagebox.askyesno(
+            "Import CSV",
+            "Update existing parts whose Origin or McMaster-Carr part number matches a row in the file?\n\n"
+            "Choose No to add every row as a new part."
+        )
+        update_quantity = upsert and messagebox.askyesno(
+            "Import CSV",
+            "Also replace the quantity on hand of updated parts with the quantity in the file?\n\n"
+            "Choose No to keep their current stock and update only the other fields."
+        )
+
+        cancel_event = threading.Event()
+        win, bar, status = self.open_progress_window("Importing CSV", cancel_event)
+
+        def show_progress(bytes_read, total_bytes, inserted, updated, rejected):
+            if not win.winfo_exists():
+                return
+            bar['value'] = 100 * bytes_read / total_bytes if total_bytes else 100
+            status.config(text=f"{inserted} added, {updated} updated, {rejected} rejected")
+
+        def progress(bytes_read, total_bytes, summary):
+            self.post_to_ui(show_progress, bytes_read, total_bytes, summary['inserted'], summary['updated'], summary['rejected'])
+
+        def on_done(summary):
+            win.destroy()
+            message = f"{summary['inserted']} added, {summary['updated']} updated, {summary['rejected']} rejected."
+            if summary['cancelled']:
+                message = "Import cancelled. Rows saved before cancelling were kept.\n\n" + message
+            if summary['duplicates']:
+                message += f"\n{summary['duplicates']} row(s) repeat a vendor part number already in the file."
+            notes = summary['errors'][:10] + summary['warnings'][:max(10 - len(summary['errors']), 0)]
+            if notes:
+                message += "\n\n" + "\n".join(notes)
+            messagebox.showinfo("Import CSV", message)
+            self.reload_views()
+
+        def on_error(error):
+            win.destroy()
+            messagebox.showerror("Error", f"Import failed: {error}")
+            self.reload_views()
+
+        self.run_background_job(
+            import_csv, path, upsert, progress, cancel_event, update_quantity=update_quantity,
+            on_done=on_done, on_error=on_error
+        )
+
+    def export_csv_file(self):
+        """Export the whole inventory to a CSV file in the background with progress and cancel."""
+        path = filedialog.asksaveasfilename(
+            title="Export CSV", defaultextension='.csv', filetypes=[('CSV files', '*.csv')]
+        )
+        if not path:
+            return
+
+        cancel_event = threading.Event()
+        win, bar, status = self.open_progress_window("Exporting CSV", cancel_event)
+
+        def show_progress(written, total_rows):
+            if not win.winfo_exists():
+                return
+            bar['value'] = 100 * written / total_rows if total_rows else 100
+            status.config(text=f"{written} of {total_rows} rows written")
+
+        def progress(written, total_rows):
+            self.post_to_ui(show_progress, written, total_rows)
+
+        def on_done(result):
+            win.destroy()
+            if result['cancelled']:
+                messagebox.showinfo("Export CSV", "Export cancelled.")
+            else:
+                messagebox.showinfo("Export CSV", f"Exported {result['exported']} rows to {path}.")
+
+        def on_error(error):
+            win.destroy()
+            messagebox.showerror("Error", f"Export failed: {error}")
+
+        self.run_background_job(export_csv, path, progress, cancel_event, on_done=on_done, on_error=on_error)
+
+    def create_connection(self):
+        """Create a database connection, saving the database in a standard location."""
+        return connect_database(get_db_path())
+
+    def create_widgets(self):
+        """Create the main GUI components."""
+        # Create a frame at the top for the close button
+        top_bar = tk.Frame(self.root)
+        top_bar.pack(side=tk.TOP, fill=tk.X)
+
+        # Add a close button to exit the application
+        close_button = tk.Button(top_bar, text="X", command=self.close_application, fg="red", font=("Arial", 12, "bold"))
+        close_button.pack(side=tk.RIGHT, padx=5, pady=5)
+
+        # Shown while database work is taking long enough to notice
+        self.busy_label = tk.Label(top_bar, text="", fg="blue", font=("Arial", 12, "bold"))
+        self.busy_label.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Create a custom font for the tabs
+        tab_font = tkfont.Font(family='Helvetica', size=16, weight='bold')
+
+        # Create a style for the Notebook tabs
+        style = ttk.Style()
+        style.configure('Custom.TNotebook.Tab', padding=[10, 5], font=tab_font, borderwidth=2, relief='raised')
+        style.map('Custom.TNotebook.Tab',
+                  background=[('selected', 'lightblue'), ('!selected', 'lightgrey')],
+                  foreground=[('selected', 'black'), ('!selected', 'black')])
+
+        # Create the Notebook with the custom style
+        notebook = ttk.Notebook(self.root, style='Custom.TNotebook')
+        notebook.pack(fill='both', expand=True)
+        self.notebook = notebook
+
+        # Create frames for each tab
+        self.list_frame = tk.Frame(notebook)
+        self.check_frame = tk.Frame(notebook)
+        self.scan_out_frame = tk.Frame(notebook)
+        self.scan_in_frame = tk.Frame(notebook)
+        self.dashboard_frame = tk.Frame(notebook)
+        self.diagnostics_frame = tk.Frame(notebook)
+
+        # Add frames to notebook with tab labels
+        notebook.add(self.list_frame, text='List Items')
+        notebook.add(self.check_frame, text='Check Inventory Levels')
+        notebook.add(self.scan_out_frame, text='Scan Out Parts')
+        notebook.add(self.scan_in_frame, text='Scan In Parts')
+        notebook.add(self.dashboard_frame, text='Dashboard')
+        notebook.add(self.diagnostics_frame, text='Diagnostics')
+
+        # Each tab is built the first time it is selected; Scan Out is shown and built first
+        self.tab_initializers = {
+            str(self.list_frame): self.init_list_frame,
+            str(self.check_frame): self.init_check_frame,
+            str(self.scan_out_frame): self.init_scan_out_frame,
+            str(self.scan_in_frame): self.init_scan_in_frame,
+            str(self.dashboard_frame): self.init_dashboard_frame,
+            str(self.diagnostics_frame): self.init_diagnostics_frame,
+        }
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        notebook.select(self.scan_out_frame)
+        self.ensure_tab_initialized(str(self.scan_out_frame))
+
+    def ensure_tab_initialized(self, tab):
+        """Build a tab's widgets the first time it is needed."""
+        if tab in self.initialized_tabs:
+            return
+        self.initialized_tabs.add(tab)
+        started = time.perf_counter()
+        self.tab_initializers[tab]()
+        self.metrics.record('tab_init', (time.perf_counter() - started) * 1000)
+
+    def on_tab_changed(self, event=None):
+        """Build the newly selected tab on first view and keep focus where scans are typed."""
+        tab = self.notebook.select()
+        self.ensure_tab_initialized(tab)
+        if tab == str(self.scan_out_frame):
+            self.scan_entry.focus_set()
+        elif tab == str(self.scan_in_frame):
+            self.scan_in_entry.focus_set()
+        elif tab == str(self.list_frame):
+            self.flush_view('list')
+        elif tab == str(self.check_frame):
+            self.flush_view('check')
+        elif tab == str(self.dashboard_frame):
+            self.refresh_dashboard()
+        elif tab == str(self.diagnostics_frame):
+            self.refresh_diagnostics()
+
+    def init_list_frame(self):
+        """Initialize the List Items tab."""
+        top_frame = tk.Frame(self.list_frame)
+        top_frame.pack(pady=5)
+
+        controls_frame = tk.Frame(top_frame)
+        controls_frame.pack(anchor='center')
+
+        refresh_button = tk.Button(controls_frame, text="Refresh List", command=self.populate_list_tree)
+        refresh_button.pack(side=tk.LEFT, padx=5)
+
+        search_label = tk.Label(controls_frame, text="Search:")
+        search_label.pack(side=tk.LEFT, padx=5)
+        self.search_entry = tk.Entry(controls_frame)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind('<KeyRelease>', self.schedule_live_search)
+        self.search_entry.bind('<Return>', lambda event: self.search_items())
+        self.search_after_id = None
+        self.last_search_term = ''
+
+        search_button = tk.Button(controls_frame, text="Search", command=self.search_items)
+        search_button.pack(side=tk.LEFT, padx=5)
+        clear_button = tk.Button(controls_frame, text="Clear", command=self.clear_search)
+        clear_button.pack(side=tk.LEFT, padx=5)
+
+        filter_frame = tk.Frame(top_frame)
+        filter_frame.pack(anchor='center', pady=5)
+        self.filter_entries = {}
+        for name, label_text in (
+            ('location', "Location starts with:"), ('cost_min', "Cost from:"), ('cost_max', "to:"),
+            ('quantity_min', "Quantity from:"), ('quantity_max', "to:")
+        ):
+            tk.Label(filter_frame, text=label_text).pack(side=tk.LEFT, padx=(5, 0))
+            entry = tk.Entry(filter_frame, width=14 if name == 'location' else 8)
+            entry.pack(side=tk.LEFT, padx=5)
+            entry.bind('<Return>', lambda event: self.apply_list_filters())
+            if self.list_filters.get(name) not in (None, ''):
+                entry.insert(0, str(self.list_filters[name]))
+            self.filter_entries[name] = entry
+        apply_filter_button = tk.Button(filter_frame, text="Apply Filters", command=self.apply_list_filters)
+        apply_filter_button.pack(side=tk.LEFT, padx=5)
+        clear_filter_button = tk.Button(filter_frame, text="Clear Filters", command=self.clear_list_filters)
+        clear_filter_button.pack(side=tk.LEFT, padx=5)
+
+        action_frame = tk.Frame(self.list_frame)
+        action_frame.pack(pady=5)
+
+        add_button = tk.Button(action_frame, text="Add New Item", command=self.add_new_item)
+        add_button.pack(side=tk.LEFT, padx=5)
+        update_button = tk.Button(action_frame, text="Update Selected Item", command=self.update_selected_item)
+        update_button.pack(side=tk.LEFT, padx=5)
+        remove_button = tk.Button(action_frame, text="Remove Selected Item", command=self.remove_selected_item)
+        remove_button.pack(side=tk.LEFT, padx=5)
+        import_button = tk.Button(action_frame, text="Import CSV", command=self.import_csv_file)
+        import_button.pack(side=tk.LEFT, padx=5)
+        export_button = tk.Button(action_frame, text="Export CSV", command=self.export_csv_file)
+        export_button.pack(side=tk.LEFT, padx=5)
+
+        columns = (
+            'part_number', 'part_name', 'description', 'origin_partnumber',
+            'mcmaster_carr_partnumber', 'cost', 'quantity', 'min_on_hand', 'location'
+        )
+        tree_frame = tk.Frame(self.list_frame)
+        tree_frame.pack(fill='both', expand=True)
+
+        self.list_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode='browse')
+        self.list_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.list_tree.yview)
+        self.list_tree.configure(yscrollcommand=self.on_list_tree_scroll)
+        self.list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.list_tree.pack(side=tk.LEFT, fill='both', expand=True)
+
+        for col in columns:
+            self.list_tree.heading(col, command=lambda c=col: self.sort_list_by(c))
+            self.list_tree.column(col, width=150)
+        self.show_sort_headings(self.list_tree, *self.list_sort)
+
+        self.list_tree.tag_configure('below_min', background='yellow')
+        self.list_tree.tag_configure('out_of_stock', background='red')
+
+        self.populate_list_tree()
+
+    def init_check_frame(self):
+        """Initialize the Check Inventory Levels tab."""
+        top_frame = tk.Frame(self.check_frame)
+        top_frame.pack(pady=5)
+
+        controls_frame = tk.Frame(top_frame)
+        controls_frame.pack(anchor='center')
+
+        refresh_button = tk.Button(controls_frame, text="Refresh List", command=self.populate_check_tree)
+        refresh_button.pack(pady=5)
+        suggest_button = tk.Button(controls_frame, text="Suggest Minimums", command=self.suggest_minimums)
+        suggest_button.pack(pady=5)
+
+        self.check_status = tk.Label(controls_frame, text="", font=('Arial', 12))
+        self.check_status.pack(pady=5)
+        self.subscribe_low_stock(self.show_low_stock_change)
+
+        columns = (
+            'part_number', 'part_name', 'quantity', 'min_on_hand', 'origin_partnumber',
+            'mcmaster_carr_partnumber', 'cost', 'location'
+        )
+        tree_frame = tk.Frame(self.check_frame)
+        tree_frame.pack(fill='both', expand=True)
+
+        self.check_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode='browse')
+        self.check_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.check_tree.yview)
+        self.check_tree.configure(yscrollcommand=self.on_check_tree_scroll)
+        self.check_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.check_tree.pack(side=tk.LEFT, fill='both', expand=True)
+
+        for col in columns:
+            self.check_tree.heading(col, command=lambda c=col: self.sort_check_by(c))
+            self.check_tree.column(col, width=150)
+        self.show_sort_headings(self.check_tree, *self.check_sort)
+
+        self.check_tree.tag_configure('out_of_stock', background='red')
+
+        self.populate_check_tree()
+
+    def suggest_minimums(self):
+        """Compute suggested minimums from scan-out history in the background, then open the review window."""
+        if import_numpy() is None:
+            messagebox.showerror("Error", "Consumption analytics need NumPy. Install it with 'pip install numpy'.")
+            return
+        self.check_status.config(text="Analyzing consumption history...")
+
+        def compute(conn):
+            suggestions = suggest_min_on_hand(conn)
+            names = fetch_part_names(conn, [row[0] for row in suggestions[:REVIEW_MAX_ROWS]])
+            return suggestions, names
+
+        def on_done(result):
+            self.check_status.config(text="")
+            suggestions, names = result
+            if not suggestions:
+                messagebox.showinfo("Suggest Minimums", "Every minimum already matches recent consumption.")
+                return
+            self.show_min_on_hand_review(suggestions, names)
+
+        def on_error(error):
+            self.check_status.config(text="")
+            messagebox.showerror("Error", f"Failed to analyze consumption: {error}")
+
+        # Analytics can take seconds on a large catalog, so they stay off the scan worker
+        self.run_background_job(compute, on_done=on_done, on_error=on_error)
+
+    def show_min_on_hand_review(self, suggestions, names):
+        """Show suggested minimums and apply the selected ones, or all of them, in one batch."""
+        win = tk.Toplevel(self.root)
+        win.title("Review Suggested Minimums")
+
+        shown = suggestions[:REVIEW_MAX_ROWS]
+        summary = f"{len(suggestions)} parts have a suggested minimum that differs from the current one."
+        if len(suggestions) > len(shown):
+            summary += f" The {len(shown)} largest changes are shown."
+        summary += f"\nBased on {ANALYTICS_WINDOW_DAYS} days of scan-outs and a {REORDER_LEAD_TIME_DAYS}-day lead time."
+        tk.Label(win, text=summary, font=('Arial', 12), justify=tk.LEFT).pack(padx=10, pady=10)
+
+        columns = ('part_number', 'part_name', 'min_on_hand', 'daily_use', 'daily_std_dev', 'suggested')
+        tree = ttk.Treeview(win, columns=columns, show='headings', height=20)
+        tree.pack(fill='both', expand=True, padx=10)
+        for col in columns:
+            tree.heading(col, text=col.replace('_', ' ').title())
+            tree.column(col, width=300 if col == 'part_name' else 110)
+        for part_number, current, mean, std, suggested in shown:
+            tree.insert('', tk.END, iid=str(part_number), values=(
+                part_number, names.get(part_number, ''), current, mean, std, suggested
+            ))
+
+        def apply(changes):
+            def on_applied(applied):
+                win.destroy()
+                messagebox.showinfo("Success", f"Updated the minimum for {applied} parts.")
+                self.reload_views()
+
+            def on_failed(error):
+                messagebox.showerror("Error", f"Failed to update minimums: {error}")
+
+            self.db_worker.submit(
+                apply_min_on_hand, changes, self.part_cache, callback=on_applied, errback=on_failed
+            )
+
+        def apply_selected():
+            selected = {int(iid) for iid in tree.selection()}
+            if not selected:
+                messagebox.showwarning("Warning", "Please select the parts to update.")
+                return
+            apply([(row[0], row[4]) for row in shown if row[0] in selected])
+
+        def apply_all():
+            if messagebox.askyesno("Confirm", f"Update the minimum for all {len(suggestions)} parts?"):
+                apply([(row[0], row[4]) for row in suggestions])
+
+        button_frame = tk.Frame(win)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Apply Selected", command=apply_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Apply All", command=apply_all).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=win.destroy).pack(side=tk.LEFT, padx=5)
+
+    def show_sort_headings(self, tree, sort_column, descending):
+        """Title every column heading, marking the sorted column with its direction."""
+        for col in tree['columns']:
+            text = col.replace('_', ' ').title()
+            if col == sort_column:
+                text += ' \u25bc' if descending else ' \u25b2'
+            tree.heading(col, text=text)
+
+    def sort_list_by(self, column):
+        """Sort List Items by a column, reversing the order when it is already sorted by it."""
+        sort_column, descending = self.list_sort
+        self.list_sort = (column, not descending if column == sort_column else False)
+        self.show_sort_headings(self.list_tree, *self.list_sort)
+        self.save_view_settings()
+        self.populate_list_tree()
+
+    def sort_check_by(self, column):
+        """Sort the Check Inventory Levels view by a column, reversing it on a second click."""
+        sort_column, descending = self.check_sort
+        self.check_sort = (column, not descending if column == sort_column else False)
+        self.show_sort_headings(self.check_tree, *self.check_sort)
+        self.save_view_settings()
+        self.populate_check_tree()
+
+    def apply_list_filters(self):
+        """Read the filter entries, save them and reload List Items with them applied."""
+        filters = {}
+        try:
+            for name, entry in self.filter_entries.items():
+                value = entry.get().strip()
+                if not value:
+                    continue
+                if name == 'location':
+                    filters[name] = value
+                elif name.startswith('cost'):
+                    filters[name] = float(value)
+                else:
+                    filters[name] = int(value)
+        except ValueError:
+            messagebox.showerror("Error", "Cost filters must be numbers and quantity filters must be integers.")
+            return
+        self.list_filters = filters
+        self.save_view_settings()
+        self.search_entry.delete(0, tk.END)
+        self.last_search_term = ''
+        self.populate_list_tree()
+
+    def clear_list_filters(self):
+        """Remove every List Items filter."""
+        for entry in self.filter_entries.values():
+            entry.delete(0, tk.END)
+        self.apply_list_filters()
+
+    def init_scan_out_frame(self):
+        """Initialize the Scan Out Parts tab."""
+        instruction_label = tk.Label(self.scan_out_frame, text="Scan the part number or vendor label to check out parts:")
+        instruction_label.pack(pady=10)
+
+        self.scan_entry = tk.Entry(self.scan_out_frame, font=('Arial', 24))
+        self.scan_entry.pack(pady=5)
+        self.scan_entry.focus_set()
+
+        quantity_frame = tk.Frame(self.scan_out_frame)
+        quantity_frame.pack(pady=5)
+
+        quantity_label = tk.Label(quantity_frame, text="Quantity to Remove:")
+        quantity_label.pack(side=tk.LEFT)
+
+        self.scan_quantity_entry = tk.Entry(quantity_frame, width=5)
+        self.scan_quantity_entry.pack(side=tk.LEFT, padx=5)
+        self.scan_quantity_entry.insert(0, "1")
+
+        self.scan_entry.bind('<Return>', self.process_scan)
+
+        # Pick-list mode collects lines and checks them all out together
+        self.pick_mode = tk.BooleanVar(value=False)
+        pick_check = tk.Checkbutton(
+            self.scan_out_frame, text="Pick list mode (check out all lines together)",
+            variable=self.pick_mode, command=self.toggle_pick_mode
+        )
+        pick_check.pack(pady=5)
+
+        self.scan_message = tk.Label(self.scan_out_frame, text="", font=('Arial', 14))
+        self.scan_message.pack(pady=10)
+
+        self.pick_frame = tk.Frame(self.scan_out_frame)
+        columns = ('part_number', 'part_name', 'quantity', 'on_hand')
+        self.pick_tree = ttk.Treeview(self.pick_frame, columns=columns, show='headings', height=12, selectmode='extended')
+        self.pick_tree.pack(fill='both', expand=True)
+        for col in columns:
+            self.pick_tree.heading(col, text=col.replace('_', ' ').title())
+            self.pick_tree.column(col, width=300 if col == 'part_name' else 120)
+        self.pick_tree.tag_configure('short', background='red')
+
+        pick_buttons = tk.Frame(self.pick_frame)
+        pick_buttons.pack(pady=5)
+        tk.Button(pick_buttons, text="Check Out Pick List", command=self.check_out_pick_list).pack(side=tk.LEFT, padx=5)
+        tk.Button(pick_buttons, text="Remove Selected Lines", command=self.remove_pick_lines).pack(side=tk.LEFT, padx=5)
+        tk.Button(pick_buttons, text="Clear Pick List", command=self.clear_pick_list).pack(side=tk.LEFT, padx=5)
+        self.pick_lines = []
+
+    @instrumented('process_scan')
+    def process_scan(self, event=None):
+        """Process the scanned part number for scanning out."""
+        part_number_str = self.scan_entry.get().strip()
+        quantity_str = self.scan_quantity_entry.get().strip()
+
+        self.scan_entry.delete(0, tk.END)
+        self.scan_entry.focus_set()
+
+        try:
+            quantity = int(quantity_str)
+            if quantity <= 0:
+                raise ValueError
+        except ValueError:
+            self.scan_message.config(text="Invalid quantity. Please enter a positive integer.", fg='red')
+            return
+
+        if not part_number_str:
+            self.scan_message.config(text="No part number detected. Please try again.", fg='red')
+            return
+
+        if self.pick_mode.get():
+            self.scan_worker.submit(
+                self.scan_ops['pick_line'], part_number_str, self.part_cache, self.barcode_map,
+                callback=lambda row: self.add_pick_line(row, quantity),
+                errback=lambda e: self.scan_message.config(text=str(e), fg='red')
+            )
+            return
+
+        # Vendor labels (origin or McMaster-Carr part numbers) are resolved on the worker
+        started = time.perf_counter()
+        self.scan_worker.submit(
+            self.scan_ops['scan_out'], part_number_str, quantity, self.part_cache, self.barcode_map,
+            callback=lambda result: self.on_scan_out_done(result[0], quantity, result[1], started),
+            errback=lambda e: self.on_scan_failed(self.scan_message, e, 'scan_out.acknowledged', started)
+        )
+
+    def on_scan_failed(self, message_label, error, metric, started):
+        """Show why a scan was refused."""
+        self.metrics.record(metric, (time.perf_counter() - started) * 1000)
+        message_label.config(text=str(error), fg='red')
+
+    def on_scan_out_done(self, part_number, quantity, new_quantity, started):
+        """Confirm a completed scan-out."""
+        self.metrics.record('scan_out.acknowledged', (time.perf_counter() - started) * 1000)
+        self.scan_message.config(
+            text=f"Removed {quantity} units of item with part number '{part_number}'. Remaining quantity: {new_quantity}", fg='green'
+        )
+        self.refresh_part(part_number)
+
+    def toggle_pick_mode(self):
+        """Show or hide the pick list; lines already collected are kept until cleared."""
+        if self.pick_mode.get():
+            self.pick_frame.pack(fill='both', expand=True, padx=10, pady=5)
+            self.scan_message.config(text="Scan each line of the pick list, then check it out.", fg='black')
+        else:
+            self.pick_frame.pack_forget()
+            self.scan_message.config(text="")
+        self.scan_entry.focus_set()
+
+    def add_pick_line(self, row, quantity):
+        """Add a scanned line to the pick list, merging it with an earlier line for the same part."""
+        if row is None:
+            self.scan_message.config(text="Part was removed before it could be added.", fg='red')
+            return
+        part_number = row[0]
+        self.pick_lines.append((part_number, quantity))
+        total = merge_pick_lines(self.pick_lines)[part_number]
+        on_hand = int(row[6])
+        iid = str(part_number)
+        values = (part_number, row[1], total, on_hand)
+        tags = ('short',) if total > on_hand else ()
+        if self.pick_tree.exists(iid):
+            self.pick_tree.item(iid, values=values, tags=tags)
+        else:
+            self.pick_tree.insert('', tk.END, iid=iid, values=values, tags=tags)
+        self.scan_message.config(
+            text=f"Added {quantity} of part {part_number} ({total} in total). {len(self.pick_tree.get_children())} line(s) on the list.",
+            fg='green'
+        )
+
+    def remove_pick_lines(self):
+        """Drop the selected parts from the pick list."""
+        selected = {int(iid) for iid in self.pick_tree.selection()}
+        if not selected:
+            messagebox.showwarning("Warning", "Please select the lines to remove.")
+            return
+        self.pick_lines = [line for line in self.pick_lines if line[0] not in selected]
+        self.pick_tree.delete(*[str(part_number) for part_number in selected])
+
+    def clear_pick_list(self):
+        """Empty the pick list without changing stock."""
+        self.pick_lines = []
+        self.pick_tree.delete(*self.pick_tree.get_children())
+        self.scan_entry.focus_set()
+
+    @instrumented('check_out_pick_list')
+    def check_out_pick_list(self):
+        """Remove every line of the pick list in one transaction, or report each shortfall."""
+        if not self.pick_lines:
+            messagebox.showwarning("Warning", "The pick list is empty.")
+            return
+        lines = list(self.pick_lines)
+        started = time.perf_counter()
+
+        def on_done(rows):
+            self.metrics.record('pick_list.acknowledged', (time.perf_counter() - started) * 1000)
+            self.clear_pick_list()
+            self.scan_message.config(text=f"Checked out {len(rows)} part(s) from the pick list.", fg='green')
+            self.note_changes([row[0] for row in rows])
+
+        def on_failed(error):
+            self.metrics.record('pick_list.acknowledged', (time.perf_counter() - started) * 1000)
+            if isinstance(error, PickListShortageError):
+                for part_number, requested, available in error.shortfalls:
+                    iid = str(part_number)
+                    if self.pick_tree.exists(iid):
+                        name = self.pick_tree.item(iid, 'values')[1]
+                        self.pick_tree.item(iid, values=(part_number, name, requested, available or 0), tags=('short',))
+            self.scan_message.config(text="Pick list rejected, nothing was removed.", fg='red')
+            messagebox.showerror("Error", str(error))
+
+        self.scan_worker.submit(self.scan_ops['pick_list'], lines, self.part_cache, callback=on_done, errback=on_failed)
+
+    def init_scan_in_frame(self):
+        """Initialize the Scan In Parts tab."""
+        instruction_label = tk.Label(self.scan_in_frame, text="Scan the part number or vendor label to add parts to inventory:")
+        instruction_label.pack(pady=10)
+
+        self.scan_in_entry = tk.Entry(self.scan_in_frame, font=('Arial', 24))
+        self.scan_in_entry.pack(pady=5)
+        self.scan_in_entry.focus_set()
+
+        quantity_frame = tk.Frame(self.scan_in_frame)
+        quantity_frame.pack(pady=5)
+
+        quantity_label = tk.Label(quantity_frame, text="Quantity to Add:")
+        quantity_label.pack(side=tk.LEFT)
+
+        self.scan_in_quantity_entry = tk.Entry(quantity_frame, width=5)
+        self.scan_in_quantity_entry.pack(side=tk.LEFT, padx=5)
+        self.scan_in_quantity_entry.insert(0, "1")
+
+        self.scan_in_entry.bind('<Return>', self.process_scan_in)
+
+        self.burst_mode = tk.BooleanVar(value=False)
+        burst_check = tk.Checkbutton(
+            self.scan_in_frame, text="Burst mode (save scans in groups for fast receiving)",
+            variable=self.burst_mode, command=self.toggle_burst_mode
+        )
+        burst_check.pack(pady=5)
+
+        self.scan_in_message = tk.Label(self.scan_in_frame, text="", font=('Arial', 14))
+        self.scan_in_message.pack(pady=10)
+
+        self.burst_status = tk.Label(self.scan_in_frame, text="", font=('Arial', 12))
+        self.burst_status.pack(pady=5)
+
+    @instrumented('process_scan_in')
+    def process_scan_in(self, event=None):
+        """Process the scanned part number for scanning in."""
+        part_number_str = self.scan_in_entry.get().strip()
+        quantity_str = self.scan_in_quantity_entry.get().strip()
+
+        self.scan_in_entry.delete(0, tk.END)
+        self.scan_in_entry.focus_set()
+
+        try:
+            quantity = int(quantity_str)
+            if quantity <= 0:
+                raise ValueError
+        except ValueError:
+            self.scan_in_message.config(text="Invalid quantity. Please enter a positive integer.", fg='red')
+            return
+
+        if not part_number_str:
+            self.scan_in_message.config(text="No part number detected. Please try again.", fg='red')
+            return
+
+        if self.burst_mode.get():
+            self.queue_burst_scan(part_number_str, quantity)
+            return
+
+        started = time.perf_counter()
+        self.scan_worker.submit(
+            self.scan_ops['scan_in'], part_number_str, quantity, self.part_cache, self.barcode_map,
+            callback=lambda result: self.on_scan_in_done(result[0], quantity, result[1], started),
+            errback=lambda e: self.on_scan_failed(self.scan_in_message, e, 'scan_in.acknowledged', started)
+        )
+
+    def on_scan_in_done(self, part_number, quantity, new_quantity, started):
+        """Confirm a completed scan-in."""
+        self.metrics.record('scan_in.acknowledged', (time.perf_counter() - started) * 1000)
+        self.scan_in_message.config(
+            text=f"Added {quantity} units of item with part number '{part_number}'. New quantity: {new_quantity}", fg='green'
+        )
+        self.refresh_part(part_number)
+
+    def queue_burst_scan(self, code, quantity):
+        """Check a burst-mode scan against the database, then confirm and queue it."""
+        self.scan_worker.submit(
+            self.scan_ops['check'], code, self.part_cache, self.barcode_map,
+            callback=lambda result: self.on_burst_scan_checked(result[0], quantity, result[1]),
+            errback=lambda e: self.scan_in_message.config(text=str(e), fg='red')
+        )
+
+    def on_burst_scan_checked(self, part_number, quantity, current_quantity):
+        """Confirm a burst-mode scan right away and queue it for the next group commit."""
+        if current_quantity is None:
+            self.scan_in_message.config(text=f"Item with part number '{part_number}' not found in inventory.", fg='red')
+            return
+
+        self.burst_queue.append((part_number, quantity))
+        pending = sum(q for p, q in self.burst_queue if p == part_number)
+        self.scan_in_message.config(
+            text=f"Added {quantity} units of item with part number '{part_number}'. New quantity: {current_quantity + pending}", fg='green'
+        )
+
+        if len(self.burst_queue) >= BURST_FLUSH_SCANS:
+            self.flush_burst_queue()
+        else:
+            if self.burst_after_id is None:
+                self.burst_after_id = self.root.after(BURST_FLUSH_MS, self.flush_burst_queue)
+            self.burst_status.config(text=f"{len(self.burst_queue)} scan(s) waiting to be saved.", fg='black')
+
+    @instrumented('flush_burst_queue')
+    def flush_burst_queue(self):
+        """Write every queued burst-mode scan in a single transaction."""
+        if self.burst_after_id is not None:
+            self.root.after_cancel(self.burst_after_id)
+            self.burst_after_id = None
+        if not self.burst_queue:
+            return
+
+        scans = self.burst_queue
+        self.burst_queue = []
+        self.scan_worker.submit(
+            self.scan_ops['scan_in_batch'], scans, self.part_cache,
+            callback=lambda applied: self.on_burst_flushed(scans, applied),
+            errback=lambda e: self.on_burst_flush_failed(scans, e)
+        )
+
+    def on_burst_flushed(self, scans, applied):
+        """Report a completed group commit and refresh the parts it touched."""
+        if applied < len(scans):
+            self.burst_status.config(
+                text=f"Saved {applied} scan(s); {len(scans) - applied} matched no part (removed while queued).", fg='red'
+            )
+        else:
+            self.burst_status.config(text=f"Saved {applied} scan(s).", fg='green')
+        for part_number in dict.fromkeys(part_number for part_number, _ in scans):
+            self.refresh_part(part_number)
+
+    def on_burst_flush_failed(self, scans, error):
+        """Put scans from a failed group commit back at the front of the queue and retry later."""
+        self.burst_queue = scans + self.burst_queue
+        self.burst_status.config(text=f"Could not save {len(scans)} queued scan(s), retrying: {error}", fg='red')
+        if self.burst_after_id is None:
+            self.burst_after_id = self.root.after(BURST_FLUSH_MS, self.flush_burst_queue)
+
+    def toggle_burst_mode(self):
+        """Save anything still queued when burst mode is switched off."""
+        if not self.burst_mode.get():
+            self.flush_burst_queue()
+
+    @instrumented('add_new_item')
+    def add_new_item(self):
+        """Open a window to add a new item."""
+        add_win = tk.Toplevel(self.root)
+        add_win.title("Add New Item")
+
+        labels = [
+            'Part Name', 'Description', 'Origin Part Number',
+            'McMaster-Carr Part Number', 'Cost', 'Quantity', 'Min on Hand', 'Location'
+        ]
+        entries = {}
+
+        for idx, label_text in enumerate(labels):
+            label = tk.Label(add_win, text=label_text)
+            label.grid(row=idx, column=0, padx=5, pady=5, sticky='e')
+            entry = tk.Entry(add_win)
+            entry.grid(row=idx, column=1, padx=5, pady=5)
+            entries[label_text] = entry
+
+        def save_item():
+            try:
+                fields = validate_item_fields(*(entries[label_text].get() for label_text in labels))
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+
+            def on_saved(part_number):
+                messagebox.showinfo("Success", "Item added successfully.")
+                add_win.destroy()
+                self.refresh_part(part_number)
+
+            def on_failed(error):
+                if isinstance(error, sqlite3.IntegrityError):
+                    messagebox.showerror("Error", "Failed to add item due to database integrity error.")
+                else:
+                    messagebox.showerror("Error", f"Failed to add item: {error}")
+
+            self.db_worker.submit(add_part, fields, callback=on_saved, errback=on_failed)
+
+        save_button = tk.Button(add_win, text="Save Item", command=save_item)
+        save_button.grid(row=len(labels), column=0, columnspan=2, pady=10)
+
+    def schedule_live_search(self, event=None):
+        """Restart the debounce timer so a search runs once typing pauses."""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.run_live_search)
+
+    def run_live_search(self):
+        """Search as the user types, skipping keystrokes that did not change the term."""
+        self.search_after_id = None
+        search_term = self.search_entry.get().strip()
+        if search_term == self.last_search_term:
+            return
+        if search_term:
+            self.search_items(live=True)
+        else:
+            self.last_search_term = ''
+            self.populate_list_tree()
+
+    @instrumented('search_items')
+    def search_items(self, live=False):
+        """Search for items based on the search entry."""
+        search_term = self.search_entry.get().strip()
+        if not search_term:
+            messagebox.showwarning("Warning", "Please enter a search term.")
+            return
+
+        self.last_search_term = search_term
+        # Search results are shown as a single block, so paging is switched off
+        self.list_generation += 1
+        self.list_search_active = True
+        self.list_has_more = False
+        self.list_has_previous = False
+
+        generation = self.list_generation
+        self.db_worker.submit(
+            search_inventory, search_term, self.fts_enabled,
+            callback=lambda items: self.show_search_results(generation, items, live)
+        )
+
+    @instrumented('render.search_results')
+    def show_search_results(self, generation, items, live):
+        """Fill the List Items view with search results unless a newer request replaced them."""
+        if generation != self.list_generation:
+            return
+        self.list_tree.delete(*self.list_tree.get_children())
+        if items:
+            for item in items:
+                self.list_tree.insert('', tk.END, iid=str(item[0]), values=item, tags=stock_tags(int(item[6]), int(item[7])))
+            self.metrics.increment('treeview_inserts.list_tree', len(items))
+        elif not live:
+            messagebox.showinfo("Info", "No items found matching the search criteria.")
+
+    def clear_search(self):
+        """Clear the search entry and refresh the list."""
+        self.search_entry.delete(0, tk.END)
+        self.last_search_term = ''
+        self.populate_list_tree()
+
+    @instrumented('populate_list_tree')
+    def populate_list_tree(self):
+        """Reset the List Items view and load the first page of inventory items."""
+        self.list_generation += 1
+        self.pending_changes.pop('list', None)  # The reload covers them
+        self.list_tree.delete(*self.list_tree.get_children())
+        self.list_keys = {}
+        self.list_first_key = None
+        self.list_last_key = None
+        self.list_has_more = True
+        self.list_has_previous = False
+        self.list_page_pending = False
+        self.list_search_active = False
+        self.load_next_list_page()
+
+    def on_list_tree_scroll(self, first, last):
+        """Keep the scrollbar in sync and fetch another page when the view nears either end."""
+        self.list_scrollbar.set(first, last)
+        if self.list_page_pending:
+            return
+        if float(last) >= 0.9 and self.list_has_more:
+            self.load_next_list_page()
+        elif float(first) <= 0.1 and self.list_has_previous:
+            self.load_previous_list_page()
+
+    def load_next_list_page(self):
+        """Request the page of items that follows the last loaded part number."""
+        self.list_page_pending = True
+        generation = self.list_generation
+        sort_column, descending = self.list_sort
+        self.db_worker.submit(
+            fetch_list_page, self.list_last_key, LIST_PAGE_SIZE, sort_column, descending, self.list_filters,
+            callback=lambda items: self.append_list_page(generation, items)
+        )
+
+    @instrumented('render.list_page')
+    def append_list_page(self, generation, items):
+        """Append a fetched page to the List Items view."""
+        if generation != self.list_generation:
+            return
+        self.list_page_pending = False
+        self.list_has_more = len(items) == LIST_PAGE_SIZE
+        if not items:
+            return
+
+        sort_column = self.list_sort[0]
+        for item in items:
+            self.list_tree.insert('', tk.END, iid=str(item[0]), values=item, tags=stock_tags(int(item[6]), int(item[7])))
+            self.list_keys[str(item[0])] = list_sort_key(item, sort_column)
+        self.metrics.increment('treeview_inserts.list_tree', len(items))
+        if self.list_first_key is None:
+            self.list_first_key = list_sort_key(items[0], sort_column)
+        self.list_last_key = list_sort_key(items[-1], sort_column)
+
+        # Drop rows from the top so the number of loaded rows stays bounded
+        rows = self.list_tree.get_children()
+        excess = len(rows) - LIST_MAX_ROWS
+        if excess > 0:
+            top_index = round(self.list_tree.yview()[0] * len(rows))
+            self.list_tree.delete(*rows[:excess])
+            for iid in rows[:excess]:
+                self.list_keys.pop(iid, None)
+            self.list_first_key = self.list_keys[rows[excess]]
+            self.list_has_previous = True
+            self.list_tree.yview_moveto(max(top_index - excess, 0) / LIST_MAX_ROWS)
+
+    def load_previous_list_page(self):
+        """Request the page of items that precedes the first loaded part number."""
+        self.list_page_pending = True
+        generation = self.list_generation
+        sort_column, descending = self.list_sort
+        self.db_worker.submit(
+            fetch_list_page_before, self.list_first_key, LIST_PAGE_SIZE, sort_column, descending, self.list_filters,
+            callback=lambda items: self.prepend_list_page(generation, items)
+        )
+
+    @instrumented('render.list_page')
+    def prepend_list_page(self, generation, items):
+        """Prepend a fetched page to the List Items view."""
+        if generation != self.list_generation:
+            return
+        self.list_page_pending = False
+        self.list_has_previous = len(items) == LIST_PAGE_SIZE
+        if not items:
+            return
+
+        top_index = round(self.list_tree.yview()[0] * len(self.list_tree.get_children()))
+        # Rows arrive in descending order, so inserting each at the top restores ascending order
+        sort_column = self.list_sort[0]
+        for item in items:
+            self.list_tree.insert('', 0, iid=str(item[0]), values=item, tags=stock_tags(int(item[6]), int(item[7])))
+            self.list_keys[str(item[0])] = list_sort_key(item, sort_column)
+        self.metrics.increment('treeview_inserts.list_tree', len(items))
+        self.list_first_key = list_sort_key(items[-1], sort_column)
+
+        # Drop rows from the bottom so the number of loaded rows stays bounded
+        rows = self.list_tree.get_children()
+        excess = len(rows) - LIST_MAX_ROWS
+        if excess > 0:
+            self.list_tree.delete(*rows[-excess:])
+            for iid in rows[-excess:]:
+                self.list_keys.pop(iid, None)
+            self.list_last_key = self.list_keys[rows[-excess - 1]]
+            self.list_has_more = True
+        self.list_tree.yview_moveto((top_index + len(items)) / len(self.list_tree.get_children()))
+
+    @instrumented('update_selected_item')
+    def update_selected_item(self):
+        """Update the selected item from the list."""
+        selected_item = self.list_tree.selection()
+        if not selected_item:
+            messagebox.showwarning("Warning", "Please select an item to update.")
+            return
+
+        item_values = self.list_tree.item(selected_item, 'values')
+        part_number = item_values[0]
+
+        self.open_update_window(part_number)
+
+    def open_update_window(self, part_number):
+        """Load the selected item, then open a window to update it."""
+        self.db_worker.submit(
+            fetch_part, int(part_number), self.part_cache,
+            callback=lambda row: self.show_update_window(part_number, row)
+        )
+
+    def show_update_window(self, part_number, row):
+        """Open a window to update the selected item."""
+        if not row:
+            messagebox.showerror("Error", "Item not found.")
+            return
+        item = row[1:]
+
+        update_win = tk.Toplevel(self.root)
+        update_win.title(f"Update Item - Part Number {part_number}")
+
+        labels = [
+            'Part Name', 'Description', 'Origin Part Number', 'McMaster-Carr Part Number',
+            'Cost', 'Quantity', 'Min on Hand', 'Location'
+        ]
+        entries = {}
+
+        for idx, label_text in enumerate(labels):
+            label = tk.Label(update_win, text=label_text)
+            label.grid(row=idx, column=0, padx=5, pady=5, sticky='e')
+            entry = tk.Entry(update_win)
+            entry.grid(row=idx, column=1, padx=5, pady=5)
+            entry.insert(0, item[idx])
+            entries[label_text] = entry
+
+        def save_updates():
+            try:
+                fields = validate_item_fields(*(entries[label_text].get() for label_text in labels))
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+
+            def on_saved(result):
+                messagebox.showinfo("Success", "Item updated successfully.")
+                update_win.destroy()
+                self.refresh_part(part_number)
+
+            def on_failed(error):
+                if isinstance(error, sqlite3.IntegrityError):
+                    messagebox.showerror("Error", "Failed to update item due to database integrity error.")
+                else:
+                    messagebox.showerror("Error", f"Failed to update item: {error}")
+
+            self.db_worker.submit(update_part, part_number, fields, self.part_cache, callback=on_saved, errback=on_failed)
+
+        save_button = tk.Button(update_win, text="Save Updates", command=save_updates)
+        save_button.grid(row=len(labels), column=0, columnspan=2, pady=10)
+
+    @instrumented('remove_selected_item')
+    def remove_selected_item(self):
+        """Remove the selected item from the list."""
+        selected_item = self.list_tree.selection()
+        if not selected_item:
+            messagebox.showwarning("Warning", "Please select an item to remove.")
+            return
+
+        item_values = self.list_tree.item(selected_item, 'values')
+        part_number = item_values[0]
+
+        confirm = messagebox.askyesno("Confirm", f"Are you sure you want to remove item with Part Number '{part_number}'?")
+        if confirm:
+            def on_removed(result):
+                messagebox.showinfo("Success", "Item removed successfully.")
+                self.refresh_part(part_number)
+
+            self.db_worker.submit(delete_part, part_number, self.part_cache, callback=on_removed)
+
+    def refresh_part(self, part_number):
+        """Queue one changed part for the next coalesced refresh instead of reloading either Treeview."""
+        self.note_changes([int(part_number)])
+
+    @instrumented('render.changed_rows')
+    def apply_changed_rows(self, view, part_numbers, rows):
+        """Update one view's rows for a batch of changed parts from freshly read rows."""
+        tree = self.list_tree if view == 'list' else self.check_tree
+        apply_row = self.apply_list_row if view == 'list' else self.apply_check_row
+        rows_by_number = {row[0]: row for row in rows}
+        for part_number in part_numbers:
+            apply_row(tree, str(part_number), part_number, rows_by_number.get(part_number))
+
+    def apply_list_row(self, tree, iid, part_number, item):
+        """Update, add or drop one part's row in List Items; item is None if the part was removed."""
+        if item is None:
+            if tree.exists(iid):
+                tree.delete(iid)
+        elif tree.exists(iid):
+            tree.item(iid, values=item, tags=stock_tags(int(item[6]), int(item[7])))
+        elif (not self.list_search_active and not self.list_has_more
+              and self.list_sort == ('part_number', False) and not self.list_filters):
+            # New parts sort after everything loaded once the last page is showing
+            tree.insert('', tk.END, iid=iid, values=item, tags=stock_tags(int(item[6]), int(item[7])))
+            self.list_keys[iid] = part_number
+            self.metrics.increment('treeview_inserts.list_tree')
+            self.list_last_key = max(self.list_last_key or part_number, part_number)
+            if self.list_first_key is None:
+                self.list_first_key = part_number
+
+    def apply_check_row(self, tree, iid, part_number, item):
+        """Add, update or drop one part's row in Check Inventory Levels as it crosses its minimum.
+
+        Low-stock events are raised by check_low_stock_crossings, not here, so
+        they fire even while this tab is hidden.
+        """
+        if item is None or int(item[6]) >= int(item[7]):
+            if tree.exists(iid):
+                tree.delete(iid)
+                self.check_keys.pop(iid, None)
+            return
+
+        quantity = int(item[6])
+        check_values = (item[0], item[1], item[6], item[7], item[3], item[4], item[5], item[8])
+        check_tags = ('out_of_stock',) if quantity == 0 else ()
+        key = low_stock_sort_key(check_values, self.check_sort[0])
+        # Parts past the last loaded page are left for the page that will bring them
+        in_loaded_pages = not self.check_has_more or self.check_key_precedes(key, self.check_last_key)
+        if tree.exists(iid):
+            tree.item(iid, values=check_values, tags=check_tags)
+            if key == self.check_keys[iid]:
+                return
+            # The sort column changed, so the row moves to its new place
+            tree.detach(iid)
+            if in_loaded_pages:
+                tree.move(iid, '', self.check_row_index(key))
+                self.check_keys[iid] = key
+            else:
+                tree.delete(iid)
+                del self.check_keys[iid]
+        elif in_loaded_pages:
+            tree.insert('', self.check_row_index(key), iid=iid, values=check_values, tags=check_tags)
+            self.check_keys[iid] = key
+            self.metrics.increment('treeview_inserts.check_tree')
+
+    def check_key_precedes(self, key, other):
+        """Return whether a Check row with paging key key sorts before one with other, as fetch_low_stock orders them."""
+        if other is None:
+            return False
+        if isinstance(key, tuple):
+            # SQLite puts NULLs first in ascending order
+            key = (key[0] is not None, key[0] if key[0] is not None else 0, key[1])
+            other = (other[0] is not None, other[0] if other[0] is not None else 0, other[1])
+        return key > other if self.check_sort[1] else key < other
+
+    def check_row_index(self, key):
+        """Return the position among the loaded Check rows where a row with paging key key belongs."""
+        rows = self.check_tree.get_children()
+        for index, iid in enumerate(rows):
+            if self.check_key_precedes(key, self.check_keys[iid]):
+                return index
+        return len(rows)
+
+    def subscribe_low_stock(self, callback):
+        """Register callback(part_number, is_low, item) to be told when a part crosses its minimum."""
+        self.low_stock_listeners.append(callback)
+
+    def set_low_stock_state(self, part_number, is_low, item):
+        """Record a part's low-stock state and notify subscribers if it changed."""
+        if is_low == (part_number in self.low_stock_parts):
+            return
+        if is_low:
+            self.low_stock_parts.add(part_number)
+        else:
+            self.low_stock_parts.discard(part_number)
+        for callback in self.low_stock_listeners:
+            callback(part_number, is_low, item)
+
+    def show_low_stock_change(self, part_number, is_low, item):
+        """Report a low-stock crossing on the Check Inventory Levels tab."""
+        if is_low:
+            self.check_status.config(
+                text=f"Part '{part_number}' ({item[1]}) dropped below minimum: {item[6]} on hand, minimum {item[7]}.", fg='red'
+            )
+        else:
+            self.check_status.config(text=f"Part '{part_number}' ({item[1]}) is back at or above minimum.", fg='green')
+
+    @instrumented('populate_check_tree')
+    def populate_check_tree(self):
+        """Reset the Check Inventory Levels view and load the first page of items below minimum on-hand levels."""
+        self.check_generation += 1
+        self.pending_changes.pop('check', None)  # The reload covers them
+        self.check_tree.delete(*self.check_tree.get_children())
+        self.check_keys = {}
+        self.check_last_key = None
+        self.check_has_more = True
+        self.load_next_check_page()
+
+    def on_check_tree_scroll(self, first, last):
+        """Keep the scrollbar in sync and fetch another page when the view nears its end."""
+        self.check_scrollbar.set(first, last)
+        if float(last) >= 0.9 and self.check_has_more and not self.check_page_pending:
+            self.load_next_check_page()
+
+    def load_next_check_page(self):
+        """Request the page of short parts that follows the last one loaded."""
+        self.check_page_pending = True
+        generation = self.check_generation
+        self.db_worker.submit(
+            fetch_low_stock, *self.check_sort, self.check_last_key, LOW_STOCK_PAGE_SIZE,
+            callback=lambda items: self.show_check_items(generation, items)
+        )
+
+    @instrumented('render.check_tree')
+    def show_check_items(self, generation, items):
+        """Append a fetched page of items below minimum on-hand levels to the Treeview."""
+        if generation != self.check_generation:
+            return
+        self.check_page_pending = False
+        self.check_has_more = len(items) == LOW_STOCK_PAGE_SIZE
+        sort_column = self.check_sort[0]
+        for item in items:
+            quantity = int(item[2])
+            if quantity == 0:
+                tags = ('out_of_stock',)
+            else:
+                tags = ()
+            if self.check_tree.exists(str(item[0])):
+                # Already placed by apply_check_row while this page was on its way
+                continue
+            self.check_tree.insert('', tk.END, iid=str(item[0]), values=item, tags=tags)
+            self.check_keys[str(item[0])] = low_stock_sort_key(item, sort_column)
+        self.metrics.increment('treeview_inserts.check_tree', len(items))
+        if items:
+            self.check_last_key = low_stock_sort_key(items[-1], sort_column)
+
+        loaded = len(self.check_tree.get_children())
+        if self.check_has_more:
+            # The low-stock set counts every short part, not just the pages loaded so far
+            count = max(len(self.low_stock_parts), loaded)
+            self.check_status.config(text=f"{count} item(s) below minimum on-hand levels; scroll for more.", fg='black')
+        elif loaded:
+            self.check_status.config(text=f"{loaded} item(s) below minimum on-hand levels.", fg='black')
+        else:
+            # A status line rather than a dialog, so a refresh never blocks scanning
+            self.check_status.config(text="All items meet minimum on-hand levels.", fg='green')
+
+    def init_dashboard_frame(self):
+        """Initialize the Dashboard tab."""
+        controls_frame = tk.Frame(self.dashboard_frame)
+        controls_frame.pack(pady=5)
+
+        refresh_button = tk.Button(controls_frame, text="Refresh", command=self.refresh_dashboard)
+        refresh_button.pack(side=tk.LEFT, padx=5)
+        check_button = tk.Button(controls_frame, text="Check Consistency", command=self.check_dashboard_consistency)
+        check_button.pack(side=tk.LEFT, padx=5)
+
+        self.dashboard_totals = tk.Label(self.dashboard_frame, text="", font=('Arial', 14, 'bold'))
+        self.dashboard_totals.pack(pady=5)
+
+        columns = ('location', 'item_count', 'total_value', 'low_stock_count', 'out_of_stock_count')
+        self.dashboard_tree = ttk.Treeview(self.dashboard_frame, columns=columns, show='headings')
+        self.dashboard_tree.pack(fill='both', expand=True, padx=5, pady=5)
+        for col in columns:
+            self.dashboard_tree.heading(col, text=col.replace('_', ' ').title())
+            self.dashboard_tree.column(col, width=300 if col == 'location' else 150, anchor=tk.W if col == 'location' else tk.E)
+        self.dashboard_tree.tag_configure('out_of_stock', background='red')
+
+    def refresh_dashboard(self):
+        """Reload the per-location summary; it reads one row per location, not one per part."""
+        self.dashboard_stale = False
+        self.db_worker.submit(fetch_location_summary, callback=self.show_location_summary)
+
+    @instrumented('render.dashboard')
+    def show_location_summary(self, rows):
+        """Fill the Dashboard tab from location summary rows."""
+        self.dashboard_tree.delete(*self.dashboard_tree.get_children())
+        for location, item_count, total_value, low_stock_count, out_of_stock_count in rows:
+            self.dashboard_tree.insert('', tk.END, values=(
+                location or '(no location)', item_count, f"{total_value:,.2f}", low_stock_count, out_of_stock_count
+            ), tags=('out_of_stock',) if out_of_stock_count else ())
+        self.dashboard_totals.config(text=(
+            f"Total stock value: {sum(row[2] for row in rows):,.2f}    "
+            f"Items: {sum(row[1] for row in rows)}    "
+            f"Low stock: {sum(row[3] for row in rows)}    "
+            f"Out of stock: {sum(row[4] for row in rows)}    "
+            f"Locations: {len(rows)}"
+        ))
+
+    def check_dashboard_consistency(self, repair=False):
+        """Rebuild the location summary from every part in the background and report any drift."""
+        self.dashboard_totals.config(text="Checking the location summary against every part...")
+
+        def on_done(mismatches):
+            self.refresh_dashboard()
+            if repair:
+                messagebox.showinfo("Check Consistency", f"Location summary rebuilt ({len(mismatches)} location(s) corrected).")
+                return
+            if not mismatches:
+                messagebox.showinfo("Check Consistency", "The location summary matches the inventory.")
+                return
+            lines = [
+                f"{location or '(no location)'}: kept {kept}, rebuilt {fresh}"
+                for location, kept, fresh in mismatches[:20]
+            ]
+            if len(mismatches) > 20:
+                lines.append(f"...and {len(mismatches) - 20} more")
+            if messagebox.askyesno(
+                "Check Consistency",
+                "The location summary differs from the inventory:\n" + "\n".join(lines) + "\n\nRebuild it now?"
+            ):
+                self.check_dashboard_consistency(repair=True)
+
+        def on_error(error):
+            self.refresh_dashboard()
+            messagebox.showerror("Error", f"Consistency check failed: {error}")
+
+        # The rebuild reads every part, so it stays off the scan worker
+        self.run_background_job(check_location_summary, repair, on_done=on_done, on_error=on_error)
+
+    def init_diagnostics_frame(self):
+        """Initialize the Diagnostics tab."""
+        controls_frame = tk.Frame(self.diagnostics_frame)
+        controls_frame.pack(pady=5)
+
+        refresh_button = tk.Button(controls_frame, text="Refresh", command=self.refresh_diagnostics)
+        refresh_button.pack(side=tk.LEFT, padx=5)
+        export_button = tk.Button(controls_frame, text="Export JSON", command=self.export_diagnostics)
+        export_button.pack(side=tk.LEFT, padx=5)
+        reset_button = tk.Button(controls_frame, text="Reset", command=self.reset_diagnostics)
+        reset_button.pack(side=tk.LEFT, padx=5)
+        backup_button = tk.Button(controls_frame, text="Back Up Now", command=self.backup_now)
+        backup_button.pack(side=tk.LEFT, padx=5)
+        sync_folder_button = tk.Button(controls_frame, text="Sync Folder...", command=self.choose_sync_folder)
+        sync_folder_button.pack(side=tk.LEFT, padx=5)
+        sync_button = tk.Button(controls_frame, text="Sync Now", command=self.sync_now)
+        sync_button.pack(side=tk.LEFT, padx=5)
+        # Tracing every statement slows scans down, so SQL timing is sampled and only on request
+        self.profile_sql = tk.BooleanVar(value=self.sql_profiler.enabled)
+        profile_check = tk.Checkbutton(
+            controls_frame, text=f"Profile SQL (1 in {self.sql_profiler.sample_every} tasks)",
+            variable=self.profile_sql, command=self.toggle_sql_profiling
+        )
+        profile_check.pack(side=tk.LEFT, padx=5)
+
+        self.diagnostics_summary = tk.Label(self.diagnostics_frame, text="", font=('Arial', 12), justify=tk.LEFT)
+        self.diagnostics_summary.pack(pady=5)
+        self.ledger_summary = tk.Label(self.diagnostics_frame, text="", font=('Arial', 12), justify=tk.LEFT)
+        self.ledger_summary.pack(pady=5)
+
+        columns = ('operation', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        self.operations_tree = ttk.Treeview(self.diagnostics_frame, columns=columns, show='headings', height=12)
+        self.operations_tree.pack(fill='both', expand=True, padx=5)
+        for col in columns:
+            self.operations_tree.heading(col, text=col.replace('_', ' ').title())
+            self.operations_tree.column(col, width=250 if col == 'operation' else 100)
+
+        columns = ('sql', 'count', 'total_ms', 'mean_ms', 'max_ms', 'vm_steps')
+        self.sql_tree = ttk.Treeview(self.diagnostics_frame, columns=columns, show='headings', height=12)
+        self.sql_tree.pack(fill='both', expand=True, padx=5, pady=5)
+        for col in columns:
+            self.sql_tree.heading(col, text='SQL' if col == 'sql' else col.replace('_', ' ').title())
+            self.sql_tree.column(col, width=700 if col == 'sql' else 100)
+
+    def toggle_sql_profiling(self):
+        """Start or stop sampling SQL timings on the database worker."""
+        self.sql_profiler.enabled = self.profile_sql.get()
+
+    def collect_diagnostics(self, callback):
+        """Gather every metric the app keeps into one JSON-serializable dict and pass it to callback.
+
+        The part cache and barcode map belong to the database worker, so their
+        stats are read there and the dict is filled in once they come back.
+        """
+        def read_cache_stats(conn):
+            return self.part_cache.stats(), self.barcode_map.stats()
+
+        def on_done(stats):
+            snapshot = self.metrics.snapshot()
+            snapshot['part_cache'], snapshot['barcode_map'] = stats
+            snapshot['sql'] = self.sql_profiler.snapshot()
+            snapshot['ledger'] = self.last_ledger_stats
+            snapshot['last_backup'] = self.last_backup
+            snapshot['last_sync'] = self.last_sync
+            snapshot['service_url'] = self.service_url
+            callback(snapshot)
+
+        self.db_worker.submit(read_cache_stats, callback=on_done)
+
+    def refresh_diagnostics(self):
+        """Show the current metrics on the Diagnostics tab."""
+        self.collect_diagnostics(self.show_diagnostics)
+        self.run_background_job(ledger_stats, on_done=self.show_ledger_stats)
+
+    def show_diagnostics(self, snapshot):
+        """Fill the Diagnostics tab from a collect_diagnostics() snapshot."""
+        self.operations_tree.delete(*self.operations_tree.get_children())
+        for name, stats in snapshot['operations'].items():
+            self.operations_tree.insert('', tk.END, values=(
+                name, stats['count'], stats['mean_ms'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['max_ms']
+            ))
+
+        self.sql_tree.delete(*self.sql_tree.get_children())
+        for row in snapshot['sql']:
+            self.sql_tree.insert('', tk.END, values=(
+                row['sql'], row['count'], row['total_ms'], row['mean_ms'], row['max_ms'], row['vm_steps']
+            ))
+
+        cache = snapshot['part_cache']
+        counters = ', '.join(f"{name}: {value}" for name, value in snapshot['counters'].items()) or 'none'
+        self.diagnostics_summary.config(text=(
+            f"Uptime: {snapshot['uptime_s']} s    "
+            f"Part cache: {cache['size']}/{cache['maxsize']} records, hit rate {cache['hit_rate']:.1%}, "
+            f"{cache['evictions']} evictions, {cache['invalidations']} invalidations\n"
+            f"Counters: {counters}"
+        ))
+        if self.last_backup is not None:
+            backup = self.last_backup
+            self.diagnostics_summary.config(text=self.diagnostics_summary.cget('text') + (
+                f"\nLast backup: {os.path.basename(backup['path'])}, {backup['bytes'] / 1048576:.1f} MB "
+                f"in {backup['total_s']} s ({backup['mb_per_s']} MB/s, {backup['steps']} steps)"
+            ))
+        if self.last_sync is not None:
+            sync = self.last_sync
+            if 'error' in sync:
+                sync_text = f"\nLast sync ({sync['finished_at']}) failed: {sync['error']}"
+            else:
+                sync_text = (
+                    f"\nLast sync ({sync['finished_at']}): sent {sync['sent_movements']}, "
+                    f"applied {sync['received_movements']} ({sync['skipped_movements']} skipped) in {sync['duration_ms']} ms"
+                )
+            self.diagnostics_summary.config(text=self.diagnostics_summary.cget('text') + sync_text)
+
+    def show_ledger_stats(self, stats):
+        """Show the stock ledger's size and growth on the Diagnostics tab."""
+        self.last_ledger_stats = stats
+        size = f"{stats['ledger_bytes'] / 1048576:.1f} MB" if stats['ledger_bytes'] is not None else 'unknown size'
+        growth = f", about {stats['bytes_per_day'] / 1024:.0f} KB/day" if stats['bytes_per_day'] is not None else ''
+        self.ledger_summary.config(text=(
+            f"Stock ledger: {stats['movements']} movements, {stats['snapshots']} snapshots "
+            f"({stats['snapshot_items']} rows), {size}; write amplification {stats['write_amplification']}, "
+            f"{stats['movements_per_day']} movements and {stats['snapshot_items_per_day']} snapshot rows/day{growth}"
+        ))
+
+    def export_diagnostics(self):
+        """Save the current metrics to a JSON file."""
+        path = filedialog.asksaveasfilename(
+            title="Export Diagnostics", defaultextension='.json', filetypes=[('JSON files', '*.json')]
+        )
+        if not path:
+            return
+
+        def write(snapshot):
+            with open(path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+            messagebox.showinfo("Success", f"Diagnostics exported to {path}.")
+
+        self.collect_diagnostics(write)
+
+    def reset_diagnostics(self):
+        """Clear every histogram, counter and SQL timing."""
+        self.metrics.reset()
+        self.sql_profiler.reset()
+        self.refresh_diagnostics()
+
+
+def run_gui(service_url=None):
+    """Start the station and run the Tk main loop until it is closed."""
+    root = tk.Tk()
+    InventoryApp(root, service_url=service_url)
+    root.mainloop()
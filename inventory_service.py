@@ -0,0 +1,390 @@
+"""Headless HTTP service for the inventory database, and the client stations use to reach it.
+
+Start it with `python inventory.py serve`. It lives outside the core module so
+scripts and the Tk station only import asyncio when they actually serve.
+"""
+import asyncio
+import concurrent.futures
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import traceback
+import urllib.parse
+
+from inventory import (
+    LIST_COLUMN_NAMES, LOW_STOCK_COLUMN_NAMES, LOW_STOCK_EXPORT_ROWS, LOW_STOCK_PAGE_SIZE, SEARCH_RESULT_LIMIT, SERVICE_BATCH_MAX, SERVICE_HOST,
+    SERVICE_MAX_BODY_BYTES, SERVICE_PORT, SERVICE_READERS, SERVICE_TIMEOUT_S,
+    AmbiguousBarcodeError, InsufficientStockError, InventoryError, PartNotFoundError, PickListShortageError,
+    apply_service_writes, connect_database, create_schema, fetch_low_stock, fetch_pick_line, low_stock_sort_key,
+    row_dict, search_inventory, write_pick_list, write_scan,
+)
+
+
+def parse_scan_request(request):
+    """Validate a {'code': ..., 'quantity': ...} request; return (code, quantity)."""
+    if not isinstance(request, dict):
+        raise ValueError("Each scan must be an object with 'code' and 'quantity'")
+    code = request.get('code')
+    quantity = request.get('quantity', 1)
+    if isinstance(code, bool) or not isinstance(code, (str, int)) or not str(code).strip():
+        raise ValueError("'code' must be a part number or vendor part number")
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError("'quantity' must be a positive integer")
+    return str(code), quantity
+
+
+def service_error(error):
+    """Return the HTTP status and JSON body that report an exception to a service client."""
+    body = {'error': str(error), 'type': type(error).__name__}
+    if isinstance(error, InventoryError):
+        body.update(vars(error))  # part_number, available, shortfalls and so on
+        return (404 if isinstance(error, PartNotFoundError) else 409), body
+    if isinstance(error, KeyError):
+        body['error'] = f"Missing field {error}"
+        return 400, body
+    if isinstance(error, (ValueError, TypeError)):
+        return 400, body
+    if isinstance(error, sqlite3.OperationalError):
+        return 503, body  # Usually another station holding the write lock past the busy timeout
+    return 500, body
+
+
+def raise_service_error(status, body):
+    """Raise the exception a service error reply describes, as the local call would have."""
+    if not isinstance(body, dict):
+        raise InventoryError(f"Inventory service returned HTTP {status}")
+    kind = body.get('type')
+    if kind == 'PartNotFoundError':
+        raise PartNotFoundError(body['part_number'])
+    if kind == 'InsufficientStockError':
+        raise InsufficientStockError(body['part_number'], body['available'])
+    if kind == 'AmbiguousBarcodeError':
+        raise AmbiguousBarcodeError(body['code'], body['part_numbers'])
+    if kind == 'PickListShortageError':
+        raise PickListShortageError([tuple(shortfall) for shortfall in body['shortfalls']])
+    raise InventoryError(body.get('error') or f"Inventory service returned HTTP {status}")
+
+
+class InventoryService:
+    """Headless JSON-over-HTTP front end to one inventory database, built on asyncio.
+
+    Every write goes through a single writer connection on its own thread.
+    Writes that arrive while a batch is being committed queue up and are all
+    committed in the next transaction, so a burst of scans from many clients
+    costs one commit instead of one each. Reads run on a pool of threads that
+    each own a connection; under WAL they never wait for the writer.
+
+    Endpoints: POST /scan-out, /scan-in, /scans (a list of scans in one
+    request) and /pick-list; GET /parts/<code>, /search?q=, /low-stock,
+    /health (which names the database file served) and /stats. Single parts come back as objects; the list replies
+    are {'columns': [...], 'rows': [[...], ...]}, which is far cheaper to
+    encode for the thousands of rows a low-stock report can hold. /low-stock
+    is paged: its reply carries a 'next' key to pass back as ?after= for the
+    following page, or null after the last one.
+    """
+
+    def __init__(self, db_path, readers=SERVICE_READERS, batch_max=SERVICE_BATCH_MAX):
+        self.db_path = db_path
+        self.readers = readers
+        self.batch_max = batch_max
+        self.local = threading.local()
+        self.reader_pool = concurrent.futures.ThreadPoolExecutor(readers, thread_name_prefix='inventory-reader')
+        self.writer_pool = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='inventory-writer')
+        self.writes = None  # asyncio.Queue of (func, args, future), created on the event loop
+        self.fts_enabled = False
+        self.stats = {'requests': 0, 'refused': 0, 'errors': 0, 'writes': 0, 'write_batches': 0, 'largest_batch': 0}
+
+    def connection(self):
+        """Return the calling pool thread's own connection, opening it on first use."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = connect_database(self.db_path)
+        return conn
+
+    async def read(self, func, *args):
+        """Run func(conn, *args) on a reader thread and return its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.reader_pool, lambda: func(self.connection(), *args))
+
+    async def write(self, func, *args):
+        """Queue func(cursor, *args) for the next group commit and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        self.writes.put_nowait((func, args, future))
+        return await future
+
+    def commit_writes(self, writes):
+        """Apply one batch on the writer thread."""
+        return apply_service_writes(self.connection(), writes)
+
+    async def run_writer(self):
+        """Commit everything queued as one batch, then wait for the next write."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < self.batch_max and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+            try:
+                results = await loop.run_in_executor(
+                    self.writer_pool, self.commit_writes, [(func, args) for func, args, _ in batch]
+                )
+            except Exception as e:
+                results = [(None, e)] * len(batch)
+            self.stats['writes'] += len(batch)
+            self.stats['write_batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+            for (_, _, future), (result, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    async def lookup(self, code):
+        """Return the row of the part a code resolves to."""
+        row = await self.read(fetch_pick_line, code)
+        if row is None:
+            raise PartNotFoundError(code)
+        return row_dict(row)
+
+    async def handle(self, method, path, query, body):
+        """Route one request; return (status, JSON-able reply)."""
+        if method == 'GET':
+            if path == '/health':
+                return 200, {'status': 'ok', 'database': os.path.realpath(self.db_path)}
+            if path == '/stats':
+                return 200, dict(self.stats, readers=self.readers, queued_writes=self.writes.qsize())
+            if path.startswith('/parts/'):
+                return 200, await self.lookup(urllib.parse.unquote(path[len('/parts/'):]))
+            if path == '/search':
+                limit = min(int(query.get('limit', [SEARCH_RESULT_LIMIT])[0]), SEARCH_RESULT_LIMIT)
+                rows = await self.read(search_inventory, query.get('q', [''])[0], self.fts_enabled, limit)
+                return 200, {'columns': LIST_COLUMN_NAMES, 'rows': rows}
+            if path == '/low-stock':
+                sort_column = query.get('sort', ['part_number'])[0]
+                descending = query.get('descending', ['0'])[0].lower() in ('1', 'true')
+                after = json.loads(query['after'][0]) if 'after' in query else None
+                limit = max(min(int(query.get('limit', [LOW_STOCK_PAGE_SIZE])[0]), LOW_STOCK_EXPORT_ROWS), 1)
+                rows = await self.read(fetch_low_stock, sort_column, descending, after, limit)
+                next_key = low_stock_sort_key(rows[-1], sort_column) if len(rows) == limit else None
+                return 200, {'columns': LOW_STOCK_COLUMN_NAMES, 'rows': rows, 'next': next_key}
+        elif method == 'POST':
+            request = json.loads(body or b'{}')
+            if path in ('/scan-out', '/scan-in'):
+                code, quantity = parse_scan_request(request)
+                return 200, await self.write(write_scan, code, quantity, -1 if path == '/scan-out' else 1)
+            if path == '/scans':
+                # Every scan is queued before any is awaited, so they all land in the same group commit
+                scans = [(parse_scan_request(scan), -1 if scan.get('direction') == 'out' else 1) for scan in request['scans']]
+                results = await asyncio.gather(
+                    *(self.write(write_scan, code, quantity, direction) for (code, quantity), direction in scans),
+                    return_exceptions=True
+                )
+                return 200, {'results': [
+                    service_error(result)[1] if isinstance(result, Exception) else result for result in results
+                ]}
+            if path == '/pick-list':
+                lines = [parse_scan_request(line) for line in request['lines']]
+                if not lines:
+                    raise ValueError("A pick list needs at least one line")
+                rows = await self.write(write_pick_list, lines)
+                return 200, {'columns': LIST_COLUMN_NAMES, 'rows': rows}
+        return 404, {'error': f"No such endpoint: {method} {path}", 'type': 'NotFound'}
+
+    async def respond(self, method, target, body):
+        """Run one request and turn any exception into an error reply."""
+        self.stats['requests'] += 1
+        parts = urllib.parse.urlsplit(target)
+        try:
+            return await self.handle(method, parts.path, urllib.parse.parse_qs(parts.query), body)
+        except Exception as e:
+            status, reply = service_error(e)
+            if status >= 500:
+                self.stats['errors'] += 1
+                traceback.print_exception(type(e), e, e.__traceback__)
+            else:
+                self.stats['refused'] += 1
+            return status, reply
+
+    async def serve_connection(self, reader, writer):
+        """Answer HTTP/1.1 requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if length > SERVICE_MAX_BODY_BYTES:
+                    status, reply = 413, {'error': "Request body too large", 'type': 'TooLarge'}
+                    keep_alive = False  # The unread body would be taken for the next request
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, reply = await self.respond(method, target, body)
+
+                data = json.dumps(reply).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Malformed request or the client went away; drop the connection
+        finally:
+            writer.close()
+
+    async def serve(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Create the schema if needed, then serve until cancelled."""
+        conn = connect_database(self.db_path)
+        self.fts_enabled = create_schema(conn)
+        conn.close()
+
+        self.writes = asyncio.Queue()
+        writer_task = asyncio.create_task(self.run_writer())
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        bound_port = server.sockets[0].getsockname()[1]
+        print(f"Inventory service listening on http://{host}:{bound_port} ({self.db_path})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self.reader_pool.shutdown()
+            self.writer_pool.shutdown()
+
+
+def run_service(db_path, host=SERVICE_HOST, port=SERVICE_PORT, readers=SERVICE_READERS):
+    """Run the headless service in the foreground until interrupted."""
+    try:
+        asyncio.run(InventoryService(db_path, readers).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+class ServiceClient:
+    """Blocking client for the inventory service, over one kept-alive HTTP connection.
+
+    Refusals are raised as the same exceptions the local functions raise. A
+    client must only be used from one thread.
+    """
+
+    in_transaction = False  # Lets DatabaseWorker treat a client like a connection
+
+    def __init__(self, url, timeout=SERVICE_TIMEOUT_S):
+        parts = urllib.parse.urlsplit(url if '//' in url else 'http://' + url)
+        self.host = parts.hostname or SERVICE_HOST
+        self.port = parts.port or SERVICE_PORT
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, payload=None):
+        """Send one request and return the decoded reply; raise if it was refused or failed."""
+        body = None if payload is None else json.dumps(payload).encode()
+        # Only a read may be retried on a fresh connection; a write might already have been applied
+        attempts = 2 if method == 'GET' else 1
+        for attempt in range(attempts):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body, {'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt == attempts - 1:
+                    raise InventoryError(f"Inventory service at {self.host}:{self.port} is unavailable: {e}") from e
+        try:
+            reply = json.loads(data)
+        except ValueError:
+            reply = None
+        if response.status >= 400:
+            raise_service_error(response.status, reply)
+        return reply
+
+    def close(self):
+        """Close the connection; the next request opens a new one."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def check_service_database(client, db_path):
+    """Raise InventoryError unless the service client talks to serves the database file at db_path.
+
+    Only scans go through the service. A station still reads, edits and polls
+    for changes on its own connection, so it may only use a service that runs
+    on the same machine over the same database file; WAL cannot share a
+    database across machines anyway.
+    """
+    served = client.request('GET', '/health').get('database')
+    if served != os.path.realpath(db_path):
+        raise InventoryError(
+            f"The inventory service serves {served}, not this station's database {db_path}. "
+            "Run the service on this machine with --db pointing at that file."
+        )
+
+
+def remote_scan_out(client, code, quantity, cache=None, barcodes=None):
+    """scan_out_barcode through the service; return (part_number, remaining quantity)."""
+    result = client.request('POST', '/scan-out', {'code': code, 'quantity': quantity})
+    return result['part_number'], result['quantity']
+
+
+def remote_scan_in(client, code, quantity, cache=None, barcodes=None):
+    """scan_in_barcode through the service; return (part_number, new quantity)."""
+    result = client.request('POST', '/scan-in', {'code': code, 'quantity': quantity})
+    return result['part_number'], result['quantity']
+
+
+def remote_fetch_pick_line(client, code, cache=None, barcodes=None):
+    """fetch_pick_line through the service; return the part's row in List Items column order."""
+    item = client.request('GET', '/parts/' + urllib.parse.quote(code, safe=''))
+    return tuple(item[name] for name in LIST_COLUMN_NAMES)
+
+
+def remote_check_barcode(client, code, cache=None, barcodes=None):
+    """check_barcode through the service; return (part_number, quantity on hand)."""
+    row = remote_fetch_pick_line(client, code)
+    return row[0], row[6]
+
+
+def remote_scan_in_batch(client, scans, cache=None):
+    """scan_in_batch through the service, in one request; return how many scans matched a part."""
+    reply = client.request('POST', '/scans', {'scans': [
+        {'code': str(part_number), 'quantity': quantity, 'direction': 'in'} for part_number, quantity in scans
+    ]})
+    return sum(1 for result in reply['results'] if 'error' not in result)
+
+
+def remote_check_out_pick_list(client, lines, cache=None):
+    """check_out_pick_list through the service; return the updated rows in List Items column order."""
+    reply = client.request('POST', '/pick-list', {'lines': [
+        {'code': str(part_number), 'quantity': quantity} for part_number, quantity in lines
+    ]})
+    return [tuple(row) for row in reply['rows']]
+
+
+REMOTE_SCAN_OPS = {
+    'scan_out': remote_scan_out,
+    'scan_in': remote_scan_in,
+    'pick_line': remote_fetch_pick_line,
+    'check': remote_check_barcode,
+    'scan_in_batch': remote_scan_in_batch,
+    'pick_list': remote_check_out_pick_list,
+}  # inventory.LOCAL_SCAN_OPS, made through an inventory service instead
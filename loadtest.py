@@ -0,0 +1,200 @@
+"""Load test for the headless inventory service on localhost.
+
+Starts `inventory.py serve` against a seeded temporary database (or targets an
+already running service with --url), then runs many concurrent keep-alive
+clients issuing a mix of scan-outs, scan-ins, lookups, searches and low-stock
+reads for a fixed time. Reports requests per second, p50/p95/p99/max latency
+per endpoint, and how many writes the service committed per transaction.
+Exits with status 1 if any request failed with a server error.
+
+Usage: python loadtest.py [--clients 32] [--duration 10] [--parts 10000]
+                          [--mix scan_out=50,scan_in=20,lookup=25,search=4,low_stock=1]
+                          [--url http://127.0.0.1:8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from benchmark import SEARCH_TERMS, build_pristine_database, percentile
+from inventory import connect_database
+
+DEFAULT_MIX = 'scan_out=50,scan_in=20,lookup=25,search=4,low_stock=1'
+STARTUP_TIMEOUT_S = 30
+
+
+def parse_mix(text):
+    """Turn 'name=weight,...' into a list of (name, weight) pairs."""
+    mix = []
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ('scan_out', 'scan_in', 'lookup', 'search', 'low_stock'):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def make_request(name, rng, parts):
+    """Return (method, path, body) for one request of the given kind."""
+    part_number = rng.randint(1, parts)
+    if name == 'scan_out':
+        return 'POST', '/scan-out', {'code': str(part_number), 'quantity': 1}
+    if name == 'scan_in':
+        return 'POST', '/scan-in', {'code': str(part_number), 'quantity': 1}
+    if name == 'lookup':
+        return 'GET', f'/parts/{part_number}', None
+    if name == 'search':
+        return 'GET', '/search?' + urllib.parse.urlencode({'q': rng.choice(SEARCH_TERMS), 'limit': 50}), None
+    return 'GET', '/low-stock', None
+
+
+async def send(reader, writer, method, path, body=None):
+    """Send one request on a kept-alive connection and return (status, reply bytes)."""
+    data = b'' if body is None else json.dumps(body).encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(data)}\r\n\r\n'.encode('latin-1') + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def run_client(host, port, seed, deadline, mix, parts, samples, statuses):
+    """Issue requests back to back on one connection until the deadline."""
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body = make_request(name, rng, parts)
+            started = time.perf_counter()
+            status, _ = await send(reader, writer, method, path, body)
+            samples[name].append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def fetch_json(host, port, path):
+    """GET one path on a short-lived connection and return the decoded reply."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, data = await send(reader, writer, 'GET', path)
+    finally:
+        writer.close()
+    return json.loads(data)
+
+
+async def wait_for_service(host, port):
+    """Poll /health until the service answers."""
+    deadline = time.perf_counter() + STARTUP_TIMEOUT_S
+    while True:
+        try:
+            return await fetch_json(host, port, '/health')
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_load(host, port, clients, duration, mix, parts):
+    """Run every client for the given duration; return (samples, statuses, elapsed, stats before, stats after)."""
+    await wait_for_service(host, port)
+    before = await fetch_json(host, port, '/stats')
+    samples = {name: [] for name, _ in mix}
+    statuses = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, seed, started + duration, mix, parts, samples, statuses)
+        for seed in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+    after = await fetch_json(host, port, '/stats')
+    return samples, statuses, elapsed, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run the load for')
+    parser.add_argument('--parts', type=int, default=10000, help='catalog size to seed (and to pick part numbers from)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='relative weights of each request kind')
+    parser.add_argument('--readers', type=int, default=4, help='read connections for the started service')
+    parser.add_argument('--port', type=int, default=8765, help='port for the started service')
+    parser.add_argument('--url', help='load an already running service instead of starting one')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    tmp_dir = None
+    service = None
+    if args.url:
+        parts = urllib.parse.urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        # The service writes to a copy, as benchmark.py's runs do, so the seeded catalog stays untouched
+        pristine = build_pristine_database(os.path.join(tmp_dir.name, 'loadtest-pristine.db'), args.parts)
+        db_path = os.path.join(tmp_dir.name, 'loadtest.db')
+        conn = connect_database(db_path)
+        pristine.backup(conn)
+        pristine.close()
+        conn.close()
+        host, port = '127.0.0.1', args.port
+        service = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inventory.py'),
+            'serve', '--db', db_path, '--host', host, '--port', str(port), '--readers', str(args.readers),
+        ])
+
+    try:
+        samples, statuses, elapsed, before, after = asyncio.run(
+            run_load(host, port, args.clients, args.duration, mix, args.parts)
+        )
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    total = sum(len(latencies) for latencies in samples.values())
+    print(f"Clients: {args.clients}, duration: {elapsed:.1f} s, requests: {total}")
+    print(f"Throughput: {total / elapsed:.0f} requests/s")
+    print(f"{'endpoint':<10} {'count':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, latencies in samples.items():
+        if not latencies:
+            continue
+        latencies.sort()
+        print(
+            f"{name:<10} {len(latencies):>8} {len(latencies) / elapsed:>8.0f} "
+            f"{percentile(latencies, 0.50):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+            f"{percentile(latencies, 0.99):>8.2f} {latencies[-1]:>8.2f}"
+        )
+    print("Responses by status: " + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    batches = after['write_batches'] - before['write_batches']
+    writes = after['writes'] - before['writes']
+    if batches:
+        print(f"Group commits: {batches}, {writes / batches:.1f} writes per transaction (largest {after['largest_batch']})")
+
+    server_errors = sum(count for status, count in statuses.items() if status >= 500)
+    return 1 if server_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
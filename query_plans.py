@@ -0,0 +1,408 @@
+"""Query plan and latency check for every registered SQL statement.
+
+Runs the core functions the station and the service use (scans, pick lists,
+searches, list pages, low stock, edits, imports, the change poll) against
+seeded catalogs, capturing each statement they issue with SQLite's trace hook.
+Every captured statement must be one of inventory.SQL_STATEMENTS, and its
+EXPLAIN QUERY PLAN must use the indexes the case expects and never fall back
+to a full scan or a temporary sort where one is not allowed. Each case is also
+timed, and its p95 must stay within the budget for the catalog size. Every
+registered statement has to be exercised by at least one case. Exits with
+status 1 on any failure.
+
+Usage: python query_plans.py [--sizes 100000 1000000] [--iterations 50]
+                             [--data-dir DIR] [--budget-scale 1.0]
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from benchmark import build_database, percentile
+from inventory import (
+    BARCODE_MAP_MAX_PARTS, CSV_COLUMNS, LIST_COLUMN_NAMES, SQL_STATEMENTS, AmbiguousBarcodeError, BarcodeMap,
+    PartCache, add_part, apply_service_writes, check_out_pick_list, delete_part, fetch_list_page,
+    fetch_list_page_before, fetch_location_summary, fetch_low_stock, fetch_low_stock_part_numbers, fetch_part,
+    fetch_part_names, fetch_parts_by_number, import_csv, list_sort_key, low_stock_sort_key, poll_inventory_changes,
+    scan_in_barcode, scan_in_batch, scan_in_part, scan_out_barcode, scan_out_part, search_inventory, update_part, write_pick_list, write_scan,
+)
+
+BUDGET_SMALL_MAX_ROWS = 100000  # Catalogs up to this size get the first budget of each case, larger ones the second
+CONTROL_STATEMENT = re.compile(r'(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA)\b', re.IGNORECASE)
+MODULE_STATEMENT = re.compile(r"'main'\.'\w+'")  # FTS5 reads its shadow tables with schema-qualified, quoted names
+SQL_LITERAL = r"(?:'(?:[^']|'')*'|X'[0-9A-Fa-f]*'|-?\d+(?:\.\d+)?(?:e[+-]?\d+)?|NULL)"
+FULL_SCAN = re.compile(r'^SCAN (inventory|inventory_changes)$')  # A whole big table read without an index
+PK = r'SEARCH inventory USING INTEGER PRIMARY KEY'
+SOURCE_PK = r'SEARCH stock_movement_source USING INTEGER PRIMARY KEY'
+
+
+def index(column):
+    """Plan pattern for a read through the index on one inventory column."""
+    return rf'USING (COVERING )?INDEX idx_inventory_{column}\b'
+
+
+# (case label, statement name) pairs that may read a whole big table; anything else doing so fails
+FULL_SCAN_ALLOWED = {
+    ('barcode map rebuild', 'barcode_codes'),  # Maps the whole catalog on purpose, and only below BARCODE_MAP_MAX_PARTS
+    ('search short term', 'search_like'),  # Fallback for terms too short for the trigram index; bounded by its LIMIT
+    ('list by part number', 'list_page'),  # The first page walks the table in rowid order and stops at its LIMIT
+    ('list by part number, descending', 'list_page'),
+    ('list filtered by cost, many matches', 'list_page'),  # Matches are dense enough that the walk fills a page soon
+    ('low stock', 'low_stock'),  # Likewise for the short parts, each looked up in low_stock as the walk passes it
+}
+TEMP_SORT_ALLOWED = {
+    'search_fts',  # Orders at most SEARCH_RESULT_LIMIT hits by rank
+    'search_fts_filtered',  # Orders the trigram hits that also contain the short tokens
+    'low_stock',  # Sorts the parts below minimum when only a few are short
+    'change_log_parts',  # DISTINCT over at most REFRESH_MAX_PARTS + 1 rows
+}
+# Statements only run for catalogs up to a size, so coverage only asks for them when such a size was checked
+SIZE_LIMITED_STATEMENTS = {'barcode_codes': BARCODE_MAP_MAX_PARTS}
+# Filters matching few rows are read through their index and sorted into part number order
+SORTED_FILTER_CASES = {'list filtered by location', 'list filtered by cost'}
+BASELINE_LOOKUPS = 1000  # Primary key reads timed to gauge this machine's speed before each catalog's cases
+REFERENCE_BASELINE_MS = 8.5  # What those reads took on the machine the budgets were set on
+BUDGET_RETRIES = 2  # A case over budget is timed again this many times, so one burst of load does not fail it
+
+
+def statement_patterns():
+    """Return (name, compiled regex) for every registered statement, matching its expanded, traced form."""
+    patterns = []
+    for name, template in SQL_STATEMENTS.items():
+        pattern = re.escape(' '.join(template.split())).replace(r'\ ', r'\s*')
+        pattern = pattern.replace(r'\?', SQL_LITERAL)
+        pattern = re.sub(r'\\\{\w+\\\}', '.*?', pattern)
+        patterns.append((name, re.compile(pattern + '$', re.DOTALL)))
+    return patterns
+
+
+def identify(patterns, statement):
+    """Return the registered name a traced statement was built from, or None."""
+    text = ' '.join(statement.split())
+    for name, pattern in patterns:
+        if pattern.match(text):
+            return name
+    return None
+
+
+class Context:
+    """Inputs shared by the cases: random part numbers and vendor codes that exist in the catalog."""
+
+    def __init__(self, conn, size, import_path, seed=3):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.import_path = import_path  # Scratch CSV file for the import case
+        self.origin_codes = [row[0] for row in conn.execute(
+            'SELECT origin_partnumber FROM inventory WHERE part_number % 997 = 0 AND origin_partnumber != \'\''
+        )]
+        self.mcmaster_codes = [row[0] for row in conn.execute(
+            'SELECT mcmaster_carr_partnumber FROM inventory WHERE part_number % 997 = 0 AND mcmaster_carr_partnumber != \'\''
+        )]
+        self.middle_rows = {
+            column: fetch_list_page(conn, None, 1, column, False, {'location': 'Aisle 1'})[0]
+            for column in LIST_COLUMN_NAMES
+        }
+
+    def part(self):
+        return self.rng.randint(1, self.size)
+
+    def parts(self, count):
+        return self.rng.sample(range(1, self.size + 1), count)
+
+
+def cold_fetch_part(conn, ctx):
+    cache = PartCache()  # A fresh cache so every lookup misses and reads the row
+    fetch_part(conn, ctx.part(), cache)
+
+
+def scan_out_in(conn, ctx):
+    part_number = ctx.part()
+    scan_in_part(conn, part_number, 1)
+    scan_out_part(conn, part_number, 1)
+
+
+def scan_vendor_codes(conn, ctx):
+    for codes in (ctx.origin_codes, ctx.mcmaster_codes):
+        try:
+            scan_in_barcode(conn, ctx.rng.choice(codes), 1)
+        except AmbiguousBarcodeError:
+            pass  # Shared vendor numbers turn up in large catalogs; the lookups ran all the same
+
+
+def scan_part_number_label(conn, ctx):
+    part_number = ctx.part()
+    scan_in_barcode(conn, str(part_number), 1)
+    scan_out_barcode(conn, str(part_number), 1)
+
+
+def pick_list(conn, ctx):
+    part_numbers = ctx.parts(20)
+    scan_in_batch(conn, [(part_number, 1) for part_number in part_numbers])
+    check_out_pick_list(conn, [(part_number, 1) for part_number in part_numbers])
+
+
+def service_writes(conn, ctx):
+    part_number = ctx.part()
+    apply_service_writes(conn, [
+        (write_scan, (str(part_number), 2, 1)),
+        (write_scan, (str(part_number), 1, -1)),
+        (write_pick_list, ([(str(part_number), 1)],)),
+    ])
+
+
+def edit_part(conn, ctx):
+    fields = ('Plan check part', '', 'PLAN-1', '', 1.0, 5, 1, 'Aisle 1 Bay 1')
+    part_number = add_part(conn, fields)
+    update_part(conn, part_number, fields[:5] + (0,) + fields[6:])
+    delete_part(conn, part_number)
+
+
+def import_upsert(conn, ctx):
+    """Re-import 20 parts from a CSV, matching them on their vendor part numbers."""
+    rows = fetch_parts_by_number(conn, ctx.parts(20))
+    with open(ctx.import_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(rows)
+    import_csv(conn, ctx.import_path)
+
+
+def barcode_map_rebuild(conn, ctx):
+    BarcodeMap().validate(conn)
+
+
+def list_pages(sort_column, descending=False, filters=None):
+    """Return a case that loads a first page, the page after it and the page before that."""
+    def run(conn, ctx):
+        first = fetch_list_page(conn, None, sort_column=sort_column, descending=descending, filters=filters)
+        if not first:
+            return
+        after = fetch_list_page(conn, list_sort_key(first[-1], sort_column), sort_column=sort_column,
+                                descending=descending, filters=filters)
+        if after:
+            fetch_list_page_before(conn, list_sort_key(after[0], sort_column), sort_column=sort_column,
+                                   descending=descending, filters=filters)
+    return run
+
+
+def list_page_from_middle(sort_column, descending=False):
+    """Return a case that pages from a row in the middle of the order, as scrolling does."""
+    def run(conn, ctx):
+        key = list_sort_key(ctx.middle_rows[sort_column], sort_column)
+        fetch_list_page(conn, key, sort_column=sort_column, descending=descending)
+        fetch_list_page_before(conn, key, sort_column=sort_column, descending=descending)
+    return run
+
+
+def low_stock_pages(sort_column, descending=False):
+    """Return a case that loads the first page of short parts and the page after it."""
+    def run(conn, ctx):
+        first = fetch_low_stock(conn, sort_column, descending)
+        if first:
+            fetch_low_stock(conn, sort_column, descending, low_stock_sort_key(first[-1], sort_column))
+    return run
+
+
+def poll_changes(conn, ctx):
+    _, newest, _ = poll_inventory_changes(conn, None)
+    poll_inventory_changes(conn, max(newest - 50, 0))
+
+
+# (label, run(conn, ctx), {statement name: [plan patterns every use of it must match]}, (budget ms up to
+# BUDGET_SMALL_MAX_ROWS parts, budget ms above)). Budgets are p95 for one run of the case, including commits.
+CASES = [
+    ('fetch part', lambda conn, ctx: fetch_part(conn, ctx.part()), {'part_row': [PK]}, (2, 2)),
+    ('fetch part, cold cache', cold_fetch_part, {'part_row': [PK]}, (2, 2)),
+    ('scan in and out', scan_out_in, {
+        'scan_in': [PK], 'scan_out': [PK], 'part_quantity': [PK], 'set_movement_source': [SOURCE_PK],
+    }, (10, 10)),
+    ('scan part number label', scan_part_number_label, {'part_exists': [PK], 'scan_in': [PK]}, (10, 10)),
+    ('scan vendor codes', scan_vendor_codes, {
+        'part_by_vendor_number': [r'idx_inventory_(origin|mcmaster_carr)_partnumber \((origin|mcmaster_carr)_partnumber=\?\)'],
+    }, (10, 10)),
+    ('pick list of 20', pick_list, {
+        'part_quantities_in': [PK], 'part_rows_in': [PK], 'scan_out': [PK], 'set_movement_source': [SOURCE_PK],
+    }, (40, 40)),
+    ('service group commit', service_writes, {'part_quantities_in': [PK], 'part_rows_in': [PK]}, (10, 10)),
+    ('add, update and delete part', edit_part, {'update_part': [PK], 'delete_part': [PK]}, (25, 25)),
+    ('part names', lambda conn, ctx: fetch_part_names(conn, ctx.parts(200)), {'part_names_in': [PK]}, (5, 5)),
+    ('search trigram', lambda conn, ctx: search_inventory(conn, 'stainless bolt'), {
+        'search_fts': [r'SCAN inventory_fts VIRTUAL TABLE INDEX', PK],
+    }, (100, 400)),
+    ('search trigram with short token', lambda conn, ctx: search_inventory(conn, 'M8 bolt'), {
+        'search_fts_filtered': [r'SCAN inventory_fts VIRTUAL TABLE INDEX', PK],
+    }, (100, 300)),
+    ('search short term', lambda conn, ctx: search_inventory(conn, 'M8'), {}, (25, 25)),
+    ('search part number', lambda conn, ctx: search_inventory(conn, str(ctx.part())), {'part_row': [PK]}, (25, 50)),
+    ('list by part number', list_pages('part_number'), {'list_page': [r'^SCAN inventory$|' + PK]}, (5, 5)),
+    ('list by part number, descending', list_pages('part_number', True), {'list_page': [r'^SCAN inventory$|' + PK]}, (5, 5)),
+    ('list filtered by location', list_pages('part_number', filters={'location': 'Aisle 3 Bay 1'}), {
+        'list_filter_probe': [index('location')], 'list_page': [index('location')],
+    }, (50, 100)),
+    ('list filtered by cost', list_pages('part_number', filters={'cost_min': 200}), {
+        'list_filter_probe': [index('cost')], 'list_page': [index('cost')],
+    }, (50, 50)),
+    ('list filtered by cost, many matches', list_pages('part_number', filters={'cost_min': 50}), {
+        'list_filter_probe': [index('cost')], 'list_page': [r'^SCAN inventory$|' + PK],
+    }, (10, 10)),
+] + [
+    (f'list by {column}{", descending" if descending else ""}', list_pages(column, descending),
+     {'list_page': [index(column)]}, (5, 5))
+    for column in LIST_COLUMN_NAMES[1:] for descending in (False, True)
+] + [
+    (f'list by {column} from the middle', list_page_from_middle(column), {'list_page': [index(column)]}, (5, 5))
+    for column in LIST_COLUMN_NAMES[1:]
+] + [
+    ('low stock', low_stock_pages('part_number'), {
+        'list_filter_probe': [r'low_stock'], 'low_stock': [r'^SCAN inventory$|' + PK, r'low_stock'],
+    }, (5, 5)),
+    ('low stock by cost', low_stock_pages('cost', True), {
+        'list_filter_probe': [r'low_stock'], 'low_stock': [index('cost'), r'low_stock'],
+    }, (10, 10)),
+    ('low stock part numbers', lambda conn, ctx: fetch_low_stock_part_numbers(conn), {
+        'low_stock_part_numbers': [r'SCAN low_stock'],
+    }, (20, 200)),
+    ('location summary', lambda conn, ctx: fetch_location_summary(conn), {'location_summary': [r'SCAN location_summary']}, (5, 5)),
+    ('change poll', poll_changes, {
+        'change_log_bounds': [r'SEARCH inventory_changes'],
+        'change_log_parts': [r'SEARCH inventory_changes USING INTEGER PRIMARY KEY'],
+    }, (5, 5)),
+    ('import upsert of 20 rows', import_upsert, {
+        'parts_by_vendor_number_in': [index('(origin|mcmaster_carr)_partnumber')],
+        'update_part_details': [PK],
+    }, (50, 50)),
+    ('barcode map rebuild', barcode_map_rebuild, {'barcode_version': [r'SEARCH barcode_version']}, (500, 500)),
+]
+
+
+def check_plan(conn, name, statement, expected, allow_scan=False, allow_sort=False):
+    """Return the plan of a traced statement and a list of problems with it."""
+    plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + statement)]
+    problems = []
+    for line in plan:
+        if FULL_SCAN.match(line) and not allow_scan:
+            problems.append(f"full table scan: {line}")
+        if line.startswith('USE TEMP B-TREE') and name not in TEMP_SORT_ALLOWED and not allow_sort:
+            problems.append(f"temporary sort: {line}")
+    for pattern in expected.get(name, ()):
+        if not any(re.search(pattern, line) for line in plan):
+            problems.append(f"expected plan step /{pattern}/")
+    return plan, problems
+
+
+def run_case(conn, ctx, patterns, case, iterations, budget_scale, used):
+    """Trace one run of a case to check its plans, then time it; return a list of failures."""
+    label, run, expected, budgets = case
+    failures = []
+    traced = []
+    conn.set_trace_callback(traced.append)
+    try:
+        run(conn, ctx)
+    finally:
+        conn.set_trace_callback(None)
+
+    checked = set()
+    for statement in traced:
+        if statement.startswith('--') or CONTROL_STATEMENT.match(statement) or MODULE_STATEMENT.search(statement):
+            continue  # Trigger bodies, transaction control and FTS5 internals are not the app's statements
+        name = identify(patterns, statement)
+        if name is None:
+            failures.append(f"{label}: statement not in SQL_STATEMENTS: {' '.join(statement.split())[:200]}")
+            continue
+        used.add(name)
+        shape = re.sub(SQL_LITERAL, '?', ' '.join(statement.split()))
+        if shape in checked:
+            continue
+        checked.add(shape)
+        plan, problems = check_plan(
+            conn, name, statement, expected, (label, name) in FULL_SCAN_ALLOWED, label in SORTED_FILTER_CASES
+        )
+        for problem in problems:
+            failures.append(f"{label}: {name}: {problem}\n      plan: {' | '.join(plan)}")
+
+    budget = budgets[0 if ctx.size <= BUDGET_SMALL_MAX_ROWS else 1] * budget_scale
+    for attempt in range(BUDGET_RETRIES + 1):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run(conn, ctx)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        p95 = percentile(samples, 0.95)
+        if p95 <= budget:
+            break
+    status = 'ok' if p95 <= budget else 'OVER'
+    retried = f' after {attempt} retr{"y" if attempt == 1 else "ies"}' if attempt else ''
+    print(f"  {label:<40} p50 {percentile(samples, 0.5):>9.3f} ms  p95 {p95:>9.3f} ms  "
+          f"budget {budget:>7.1f} ms  {status}{retried}")
+    if p95 > budget:
+        failures.append(f"{label}: p95 {p95:.3f} ms is over the {budget:.1f} ms budget")
+    return failures
+
+
+def measure_baseline(conn, ctx):
+    """Return the median time in ms of BASELINE_LOOKUPS primary key reads, to scale budgets to this machine."""
+    runs = []
+    for _ in range(5):
+        part_numbers = ctx.parts(BASELINE_LOOKUPS)
+        started = time.perf_counter()
+        for part_number in part_numbers:
+            conn.execute(SQL_STATEMENTS['part_row'], (part_number,)).fetchone()
+        runs.append((time.perf_counter() - started) * 1000)
+    return percentile(sorted(runs), 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='catalog sizes to check')
+    parser.add_argument('--iterations', type=int, default=50, help='timed runs of each case')
+    parser.add_argument('--data-dir', help='keep generated databases here and reuse them between runs')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiply every budget on top of the scaling measured from this machine')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        data_dir = tmp_dir.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    patterns = statement_patterns()
+    used = set()
+    failures = []
+    for size in args.sizes:
+        conn = build_database(os.path.join(data_dir, f'bench_{size}.db'), size)
+        ctx = Context(conn, size, os.path.join(data_dir, 'import_check.csv'))
+        baseline = measure_baseline(conn, ctx)
+        # Budgets were set on a reference machine; a slower one gets proportionally more, a faster one no less
+        budget_scale = args.budget_scale * max(baseline / REFERENCE_BASELINE_MS, 1.0)
+        print(f"{size} rows (baseline {baseline:.2f} ms for {BASELINE_LOOKUPS} lookups, budgets x{budget_scale:.2f}):")
+        for case in CASES:
+            failures.extend(f"{size} rows: {failure}" for failure in run_case(
+                conn, ctx, patterns, case, args.iterations, budget_scale, used
+            ))
+        conn.close()
+        if os.path.exists(ctx.import_path):
+            os.remove(ctx.import_path)
+
+    for name in SQL_STATEMENTS:
+        if name in SIZE_LIMITED_STATEMENTS and min(args.sizes) > SIZE_LIMITED_STATEMENTS[name]:
+            continue
+        if name not in used:
+            failures.append(f"{name}: registered but not exercised by any case")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    print(f"{len(CASES)} cases, {len(SQL_STATEMENTS)} statements, {len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
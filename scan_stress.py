@@ -0,0 +1,116 @@
+"""Multi-process scan-out stress test for the shared inventory database.
+
+Several processes act as scanner stations and hammer the same SQLite file with
+scan-outs through scan_out_part(). Afterwards the final quantities are checked
+against the scans each station reports as successful, so a lost update or a
+negative quantity fails the run. Throughput is reported in scans per second.
+
+Usage: python scan_stress.py [--stations 4] [--scans 2000] [--parts 20] [--stock 300]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from inventory import InsufficientStockError, connect_database, create_schema, scan_out_part
+
+
+def seed_database(db_path, parts, stock):
+    """Create a fresh database with the given number of parts, each holding the same stock."""
+    conn = connect_database(db_path)
+    create_schema(conn)
+    conn.executemany(
+        'INSERT INTO inventory (part_name, quantity, min_on_hand, location) VALUES (?, ?, ?, ?)',
+        [(f'Stress part {i}', stock, 0, 'Stress') for i in range(parts)]
+    )
+    conn.commit()
+    part_numbers = [row[0] for row in conn.execute('SELECT part_number FROM inventory')]
+    conn.close()
+    return part_numbers
+
+
+def run_station(db_path, part_numbers, scans, seed, start_barrier, results):
+    """Scan out random parts one unit at a time and report what succeeded."""
+    conn = connect_database(db_path)
+    rng = random.Random(seed)
+    removed = {}
+    refused = 0
+    start_barrier.wait()
+    for _ in range(scans):
+        part_number = rng.choice(part_numbers)
+        try:
+            scan_out_part(conn, part_number, 1)
+        except InsufficientStockError:
+            refused += 1
+        else:
+            removed[part_number] = removed.get(part_number, 0) + 1
+    conn.close()
+    results.put((removed, refused))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stations', type=int, default=4, help='number of concurrent scanner processes')
+    parser.add_argument('--scans', type=int, default=2000, help='scan-outs per station')
+    parser.add_argument('--parts', type=int, default=20, help='number of parts to spread the scans over')
+    parser.add_argument('--stock', type=int, default=300, help='starting quantity of each part')
+    parser.add_argument('--db', help='database file to use (a temporary file by default)')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_path = args.db
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, 'stress.db')
+
+    part_numbers = seed_database(db_path, args.parts, args.stock)
+
+    start_barrier = multiprocessing.Barrier(args.stations + 1)
+    results = multiprocessing.Queue()
+    stations = [
+        multiprocessing.Process(
+            target=run_station, args=(db_path, part_numbers, args.scans, seed, start_barrier, results)
+        )
+        for seed in range(args.stations)
+    ]
+    for station in stations:
+        station.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+
+    removed = {}
+    refused = 0
+    for _ in stations:
+        station_removed, station_refused = results.get()
+        refused += station_refused
+        for part_number, count in station_removed.items():
+            removed[part_number] = removed.get(part_number, 0) + count
+    elapsed = time.perf_counter() - started
+    for station in stations:
+        station.join()
+
+    conn = connect_database(db_path)
+    final = dict(conn.execute('SELECT part_number, quantity FROM inventory'))
+    conn.close()
+
+    lost_updates = [
+        part_number for part_number in part_numbers
+        if final[part_number] != args.stock - removed.get(part_number, 0)
+    ]
+    negative = [part_number for part_number, quantity in final.items() if quantity < 0]
+
+    total_scans = args.stations * args.scans
+    print(f"Stations: {args.stations}, scans: {total_scans} ({sum(removed.values())} removed, {refused} refused)")
+    print(f"Elapsed: {elapsed:.2f} s, throughput: {total_scans / elapsed:.0f} scans/s")
+    print(f"Lost updates: {len(lost_updates)}, negative quantities: {len(negative)}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    return 1 if lost_updates or negative else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())